@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from CircleciLibrary.polling import Backoff, PollResult, PollTimeoutError
+
+
+class AsyncBackend:
+    """
+    runs the api calls and waits of the library on one asyncio event loop
+
+    The event loop lives in a daemon thread. Waiting pipelines are coroutines which cost no thread
+    while they sleep; only the http calls themselves run on a bounded pool of worker threads sharing
+    the pooled session of the api client. The keywords stay synchronous and block on ``run``.
+    """
+
+    def __init__(self, workers: int = 10):
+        """
+        :param workers: maximum number of concurrent http calls
+        """
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='circleci-io',
+            initializer=self._mark_worker
+        )
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(self._executor)
+        self._thread = threading.Thread(target=self._loop.run_forever, name='circleci-loop', daemon=True)
+        self._thread.start()
+
+    def _mark_worker(self):
+        self._local.worker = True
+
+    def in_backend(self) -> bool:
+        """
+        :return: True if the current thread belongs to this backend
+        """
+        return threading.current_thread() is self._thread or getattr(self._local, 'worker', False)
+
+    def run(self, coro):
+        """
+        runs a coroutine on the event loop and blocks until it is done
+
+        :param coro: coroutine to run
+
+        :return: the result of the coroutine
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def call_sync(self, func, *args, **kwargs):
+        """
+        runs a blocking function on a worker thread, directly if already called from the backend
+        """
+        if self.in_backend():
+            return func(*args, **kwargs)
+        return self.run(self.call(func, *args, **kwargs))
+
+    async def call(self, func, *args, **kwargs):
+        """
+        awaits a blocking function executed on a worker thread
+        """
+        return await self._loop.run_in_executor(None, partial(func, *args, **kwargs))
+
+    async def poll(
+            self,
+            fetch,
+            done,
+            timeout: float,
+            backoff: Backoff,
+            sleep=None,
+            clock=None,
+            wait=None,
+            schedule=None
+    ) -> PollResult:
+        """
+        asynchronous counterpart of ``CircleciLibrary.polling.poll``, ``fetch`` is a blocking function
+
+        A ``sleep`` function replaces the asynchronous sleep, it must not block. A ``wait`` coroutine
+        function replaces it as well and may return early.
+        """
+        clock = clock or time.monotonic
+        start = clock()
+        deadline = start + timeout
+        calls = 0
+        for delay in backoff:
+            value = await self.call(fetch)
+            calls += 1
+            now = clock()
+            if done(value):
+                return PollResult(value, calls, now - start)
+            if now >= deadline:
+                error = PollTimeoutError(f"no final result after {calls} calls in {now - start:.1f}s")
+                error.result = PollResult(value, calls, now - start)
+                raise error
+            if schedule is not None:
+                delay = schedule(value, delay)
+            if wait is not None:
+                await wait(min(delay, deadline - now))
+            elif sleep is None:
+                await asyncio.sleep(min(delay, deadline - now))
+            else:
+                sleep(min(delay, deadline - now))
+                await asyncio.sleep(0)
+
+    async def gather(self, func, items, concurrency: int) -> list:
+        """
+        awaits ``func(item)`` for all items with at most ``concurrency`` coroutines in flight
+
+        :return: the results in the order of the items
+
+        :raise: the first exception (in the order of the items) after all coroutines finished
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be >= 1, got {concurrency}")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(item):
+            async with semaphore:
+                return await func(item)
+
+        results = await asyncio.gather(*[bounded(i) for i in items], return_exceptions=True)
+        for r in results:
+            if isinstance(r, BaseException):
+                raise r
+        return results
+
+    def close(self):
+        """
+        stops the event loop and the worker threads
+        """
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        self._executor.shutdown(wait=False)
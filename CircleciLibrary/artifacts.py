@@ -0,0 +1,119 @@
+import os
+import re
+import threading
+import time
+from requests.exceptions import RequestException
+
+_CONTENT_RANGE = re.compile(r'bytes (?:\d+-\d+|\*)/(\d+|\*)')
+
+
+class ArtifactSizeError(Exception):
+    """
+    this exception will be raised if a downloaded artifact does not have the announced size
+    """
+
+
+class DownloadSummary:
+    """thread safe summary of an artifact download run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.files = 0
+        self.skipped = 0
+        self.bytes = 0
+
+    def add(self, downloaded: int, skipped: bool):
+        with self._lock:
+            self.files += 1
+            self.skipped += int(skipped)
+            self.bytes += downloaded
+
+    def to_dict(self) -> dict:
+        seconds = time.monotonic() - self._started
+        return {
+            'files': self.files,
+            'skipped': self.skipped,
+            'bytes': self.bytes,
+            'seconds': round(seconds, 3),
+            'bytes_per_second': round(self.bytes / seconds) if seconds > 0 else 0
+        }
+
+
+def artifact_target(directory: str, job_number, path: str) -> str:
+    """
+    :return: the local path ``directory/job_number/path`` of an artifact
+
+    :raise: ValueError if the artifact path would leave the directory
+    """
+    base = os.path.abspath(os.path.join(directory, str(job_number)))
+    target = os.path.abspath(os.path.join(base, path.lstrip('/')))
+    if os.path.commonpath([base, target]) != base:
+        raise ValueError(f"artifact path leaves the download directory: {path}")
+    return target
+
+
+def _total_size(response, offset: int):
+    match = _CONTENT_RANGE.match(response.headers.get('Content-Range', ''))
+    if match and match.group(1) != '*':
+        return int(match.group(1))
+    length = response.headers.get('Content-Length')
+    return offset + int(length) if length is not None else None
+
+
+def download(session, url: str, target: str, headers: dict = None, chunk_size: int = 1024 * 1024, timeout: float = 60):
+    """
+    streams an artifact to disk in chunks, resuming a partial download
+
+    The data is written to ``<target>.part`` which is renamed when the download is complete. An existing
+    part file is resumed with a ``Range`` request. A complete target file is not downloaded again if the
+    server announces the same size.
+
+    :param session: requests session
+    :param url: url of the artifact
+    :param target: local path of the artifact
+    :param headers: additional request headers, e.g. the api token
+    :param chunk_size: size of the chunks written to disk
+    :param timeout: connect and read timeout in seconds
+
+    :return: tuple of the number of downloaded bytes and whether the download was skipped
+
+    :raise: ArtifactSizeError if the size of the downloaded file differs from the announced size
+    """
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    part = f"{target}.part"
+    # sizes are checked against the bytes on the wire
+    headers = dict(headers or {}, **{'Accept-Encoding': 'identity'})
+    if os.path.exists(target):
+        with session.head(url, headers=headers, timeout=timeout, allow_redirects=True) as response:
+            if response.ok and _total_size(response, 0) == os.path.getsize(target):
+                return 0, True
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    request_headers = dict(headers, Range=f"bytes={offset}-") if offset else headers
+    with session.get(url, headers=request_headers, stream=True, timeout=timeout) as response:
+        if offset and response.status_code == 416:
+            if _total_size(response, 0) == offset:
+                os.replace(part, target)
+                return 0, False
+            os.remove(part)
+            return download(session, url, target, headers, chunk_size, timeout)
+        response.raise_for_status()
+        if response.status_code != 206:
+            offset = 0
+        total = _total_size(response, offset)
+        downloaded = 0
+        with open(part, 'ab' if offset else 'wb') as f:
+            try:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+                    downloaded += len(chunk)
+            except RequestException as e:
+                # the part file is kept, the next download resumes it
+                raise ArtifactSizeError(f"{url}: connection lost after {offset + downloaded} of {total} bytes") from e
+    size = os.path.getsize(part)
+    if total is not None and size > total:
+        os.remove(part)
+    if total is not None and size != total:
+        raise ArtifactSizeError(f"{url}: {size} bytes downloaded, {total} bytes expected")
+    os.replace(part, target)
+    return downloaded, False
@@ -0,0 +1,270 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from CircleciLibrary.model import Project, WorkflowList
+
+
+class ProjectIndex:
+    """
+    index of the projects of the current user with a time to live
+
+    Projects are indexed by ``(vcs_type, username, reponame)`` and by their bare ``reponame``.
+    If several projects share a name, the bare name resolves to the first one of the project list.
+    """
+
+    def __init__(self, ttl: float, clock=time.monotonic):
+        """
+        :param ttl: time to live of the index in seconds, 0 disables caching
+        """
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._projects = None
+        self._by_key = {}
+        self._by_owner = {}
+        self._by_name = {}
+        self._loaded_at = None
+
+    def invalidate(self):
+        """
+        drops the index, the next lookup fetches the projects again
+        """
+        with self._lock:
+            self._projects = None
+            self._loaded_at = None
+
+    def is_fresh(self) -> bool:
+        """
+        :return: True if the index is loaded and not expired
+        """
+        return self._projects is not None and self._clock() - self._loaded_at < self.ttl
+
+    def load(self, projects):
+        """
+        replaces the index with the given projects
+        """
+        projects = list(projects)
+        by_key = {}
+        by_owner = {}
+        by_name = {}
+        for p in projects:
+            by_key.setdefault((p.vcs_type, p.username, p.reponame), p)
+            by_owner.setdefault((p.username, p.reponame), p)
+            by_name.setdefault(p.reponame, p)
+        with self._lock:
+            self._projects = projects
+            self._by_key = by_key
+            self._by_owner = by_owner
+            self._by_name = by_name
+            self._loaded_at = self._clock()
+
+    def projects(self) -> list:
+        """
+        :return: all indexed projects
+        """
+        return list(self._projects or [])
+
+    def lookup(self, name: str, username: str = None, vcs_type: str = None) -> Project:
+        """
+        :return: the indexed project or None
+        """
+        if username is not None and vcs_type is not None:
+            return self._by_key.get((vcs_type, username, name))
+        if username is not None:
+            return self._by_owner.get((username, name))
+        project = self._by_name.get(name)
+        if project is None or vcs_type is None or project.vcs_type == vcs_type:
+            return project
+        return next((p for p in self.projects() if p.reponame == name and p.vcs_type == vcs_type), None)
+
+
+class CacheEntry:
+    """validators and decoded body of a cached http response"""
+    __slots__ = ('etag', 'last_modified', 'digest', 'content', 'payload')
+
+    def __init__(self, etag: str, last_modified: str, digest: str, content: bytes, payload):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.content = content
+        self.payload = payload
+
+
+class ResponseCache:
+    """
+    bounded cache of http responses for conditional requests
+
+    The cache stores the ``ETag`` and ``Last-Modified`` validators and the decoded json body per url.
+    If the server sends no validators, a hash of the body is used to recognize unchanged responses.
+    An unchanged response hands out the identical decoded body of the previous response, so the
+    models decoded from it can be reused as well (see ``DecodeCache``).
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.not_modified = 0
+        self.unchanged = 0
+        self.misses = 0
+
+    def get(self, key) -> CacheEntry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def conditional_headers(entry: CacheEntry) -> dict:
+        """
+        :return: the validator headers for a conditional request
+        """
+        headers = {}
+        if entry is not None and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def update(self, key, response):
+        """
+        stores a fresh response or replays the cached one if the response is unchanged
+
+        :param key: cache key of the request
+        :param response: requests.Response, patched in place to carry the cached body
+        """
+        entry = self.get(key)
+        if response.status_code == 304 and entry is not None:
+            self.not_modified += 1
+            response.status_code = 200
+            response._content = entry.content
+        elif response.status_code == 200:
+            digest = hashlib.sha1(response.content).hexdigest()
+            if entry is not None and entry.digest == digest:
+                self.unchanged += 1
+            else:
+                try:
+                    payload = response.json()
+                except ValueError:
+                    return
+                self.misses += 1
+                entry = CacheEntry(
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified'),
+                    digest=digest,
+                    content=response.content,
+                    payload=payload
+                )
+                self.put(key, entry)
+        else:
+            return
+        payload = entry.payload
+        response.from_cache = True
+        response.json = lambda **kwargs: payload
+
+    def statistics(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'not_modified': self.not_modified,
+            'unchanged': self.unchanged,
+            'misses': self.misses
+        }
+
+
+class DecodeCache:
+    """
+    reuses decoded models as long as the json payload they were decoded from is identical
+
+    Identity (not equality) is checked, which is cheap and matches the payloads handed out
+    by the ``ResponseCache`` for unchanged responses.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _same(a, b) -> bool:
+        if a is b:
+            return True
+        if type(a) is list and type(b) is list:
+            return len(a) == len(b) and all(x is y for x, y in zip(a, b))
+        return False
+
+    def decode(self, key, payload, factory):
+        """
+        :param key: cache key of the model
+        :param payload: json payload
+        :param factory: function decoding the payload
+
+        :return: the cached model if the payload is unchanged, otherwise the freshly decoded model
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and self._same(entry[0], payload):
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        model = factory(payload)
+        with self._lock:
+            self._entries[key] = (payload, model)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return model
+
+    def statistics(self) -> dict:
+        return {
+            'decode_hits': self.hits,
+            'decode_misses': self.misses
+        }
+
+
+class WorkflowStates:
+    """
+    last known workflows of the recently polled pipelines
+
+    Every poll is merged into the stored ``WorkflowList`` of its pipeline, which yields only the workflows
+    whose status changed since the previous poll. The states of ``max_pipelines`` pipelines are kept.
+    """
+
+    def __init__(self, max_pipelines: int = 1024):
+        self.max_pipelines = max_pipelines
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def merge(self, pipeline_id: str, workflows) -> list:
+        """
+        :param pipeline_id: id of the polled pipeline
+        :param workflows: workflows of the poll
+
+        :return: the transitions since the previous poll of the pipeline
+        """
+        with self._lock:
+            state = self._states.get(pipeline_id)
+            if state is None:
+                state = self._states[pipeline_id] = WorkflowList()
+            self._states.move_to_end(pipeline_id)
+            while len(self._states) > self.max_pipelines:
+                self._states.popitem(last=False)
+            return state.merge(workflows)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
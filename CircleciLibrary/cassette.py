@@ -0,0 +1,218 @@
+import atexit
+import base64
+import gzip
+import io
+import json
+import os
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from requests import Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+RECORDED_HEADERS = ('Content-Type', 'Content-Length', 'Content-Range', 'ETag', 'Last-Modified')
+
+
+class CassetteError(Exception):
+    """
+    this exception will be raised if a replayed request was not recorded
+    """
+
+
+def _request_key(request) -> tuple:
+    url = urlsplit(request.url)
+    query = urlencode(sorted(parse_qsl(url.query, keep_blank_values=True)))
+    body = request.body
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    if body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True)
+        except ValueError:
+            pass
+    return request.method, urlunsplit((url.scheme, url.netloc, url.path, query, '')), body or None
+
+
+class _TeeReader:
+    """
+    raw body of a streamed response which copies every chunk read by the consumer to a file
+    """
+
+    def __init__(self, raw, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._raw = raw
+        self._file = open(path, 'wb')
+
+    def stream(self, amt: int = 2 ** 16, decode_content: bool = None):
+        for chunk in self._raw.stream(amt, decode_content=decode_content):
+            self._file.write(chunk)
+            yield chunk
+        self._file.close()
+
+    def read(self, *args, **kwargs) -> bytes:
+        chunk = self._raw.read(*args, **kwargs)
+        if chunk:
+            self._file.write(chunk)
+        else:
+            self._file.close()
+        return chunk
+
+    def close(self):
+        self._file.close()
+        self._raw.close()
+
+    def __getattr__(self, name: str):
+        return getattr(self._raw, name)
+
+
+class Cassette:
+    """
+    gzip compressed json file with the http interactions of a run
+
+    Replayed requests are matched by method, url with sorted query and json body. The n-th identical request
+    gets the n-th recorded response, every further request the last one. The bodies of streamed responses,
+    e.g. artifact downloads, are written chunk by chunk to files in ``<path>.bodies`` instead of the cassette.
+    """
+
+    def __init__(self, path: str, mode: str):
+        """
+        :param path: path of the cassette file
+        :param mode: ``record`` starts an empty cassette which is saved at exit, ``replay`` loads it
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"cassette mode must be record or replay, got {mode}")
+        self.path = path
+        self.mode = mode
+        self.bodies = f"{path}.bodies"
+        self._body_files = 0
+        self._interactions = []
+        self._responses = defaultdict(list)
+        self._played = defaultdict(int)
+        self._lock = threading.Lock()
+        if mode == 'replay':
+            self._load()
+        else:
+            atexit.register(self.save)
+
+    def _load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        for interaction in data['interactions']:
+            request = interaction['request']
+            self._responses[(request['method'], request['url'], request['body'])].append(interaction['response'])
+
+    def record(self, request, response, stream: bool = False):
+        """
+        records an interaction, the body of a streamed response is recorded while the consumer reads it
+
+        :param stream: the response body is streamed, its ``raw`` is replaced
+        """
+        body = encoding = body_file = None
+        if stream:
+            with self._lock:
+                self._body_files += 1
+                body_file = f"{self._body_files}.bin"
+            response.raw = _TeeReader(response.raw, os.path.join(self.bodies, body_file))
+        else:
+            content = response.content or b''
+            try:
+                body = content.decode('utf-8')
+            except UnicodeDecodeError:
+                body, encoding = base64.b64encode(content).decode('ascii'), 'base64'
+        headers = {h: response.headers[h] for h in RECORDED_HEADERS if h in response.headers}
+        if 'Content-Encoding' in response.headers:
+            # the recorded body is decoded already
+            headers.pop('Content-Length', None)
+        method, url, request_body = _request_key(request)
+        interaction = {
+            'request': {'method': method, 'url': url, 'body': request_body},
+            'response': {
+                'status': response.status_code,
+                'reason': response.reason,
+                'headers': headers,
+                'body': body,
+                'encoding': encoding
+            }
+        }
+        if body_file is not None:
+            interaction['response']['body_file'] = body_file
+        with self._lock:
+            self._interactions.append(interaction)
+
+    def play(self, request) -> dict:
+        """
+        :return: the recorded response of the request
+
+        :raise: CassetteError if the request was not recorded
+        """
+        key = _request_key(request)
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                raise CassetteError(f"no recorded response for {key[0]} {key[1]} in {self.path}")
+            index = self._played[key]
+            self._played[key] += 1
+        return responses[min(index, len(responses) - 1)]
+
+    def save(self):
+        """
+        writes the recorded interactions
+        """
+        if self.mode != 'record':
+            return
+        with self._lock:
+            data = {'version': 1, 'interactions': list(self._interactions)}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """http adapter which records every final response, i.e. after the retries, to a cassette"""
+
+    def __init__(self, cassette: Cassette, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        self.cassette.record(request, response, stream=bool(kwargs.get('stream')))
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """adapter which answers every request from a cassette without network access"""
+
+    def __init__(self, cassette: Cassette):
+        super().__init__()
+        self.cassette = cassette
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        recorded = self.cassette.play(request)
+        response = Response()
+        response.status_code = recorded['status']
+        response.reason = recorded.get('reason')
+        response.headers = CaseInsensitiveDict(recorded['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        if recorded.get('body_file'):
+            # streamed from its file like the recorded response from the network
+            response.raw = open(os.path.join(self.cassette.bodies, recorded['body_file']), 'rb')
+        else:
+            content = recorded['body'].encode('utf-8')
+            if recorded.get('encoding') == 'base64':
+                content = base64.b64decode(content)
+            response.raw = io.BytesIO(content)
+            response._content = content
+            response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
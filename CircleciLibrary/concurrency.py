@@ -0,0 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def run_concurrently(func, items, concurrency: int) -> list:
+    """
+    calls ``func`` for every item on a bounded thread pool
+
+    :param func: function which is called with one item
+    :param items: items to process
+    :param concurrency: maximum number of parallel calls
+
+    :return: the results in the order of the items
+
+    :raise: the first exception raised by ``func`` (in the order of the items) after all calls finished
+    """
+    items = list(items)
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be >= 1, got {concurrency}")
+    if len(items) == 0:
+        return []
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items)), thread_name_prefix='circleci') as executor:
+        futures = [executor.submit(func, item) for item in items]
+    return [f.result() for f in futures]
@@ -0,0 +1,153 @@
+import atexit
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from CircleciLibrary.model import Workflow
+
+# quantiles of the insights duration metrics, in percent
+_INSIGHTS_QUANTILES = ((0, 'min'), (50, 'median'), (95, 'p95'), (100, 'max'))
+
+
+def _interpolate(points: list, q: float) -> float:
+    for (q0, v0), (q1, v1) in zip(points, points[1:]):
+        if q <= q1:
+            return v0 if q1 == q0 else v0 + (v1 - v0) * (q - q0) / (q1 - q0)
+    return points[-1][1]
+
+
+class DurationHistory:
+    """
+    durations of the successful workflows per project slug and workflow name
+
+    The durations from ``created_at`` to ``stopped_at`` of the last ``max_samples`` successful runs of a
+    workflow are kept; a workflow is recorded once however often it is polled. Seeding from the insights
+    api adds samples spread over the reported duration quantiles. With a path the history is loaded at
+    start and saved at exit.
+    """
+
+    def __init__(self, path: str = None, max_samples: int = 50, min_samples: int = 3, max_seen: int = 4096):
+        """
+        :param path: path of a json file which keeps the history across runs (optional)
+        :param max_samples: number of durations kept per workflow
+        :param min_samples: number of durations required for a prediction
+        :param max_seen: number of recorded workflow ids remembered to skip repeated polls
+        """
+        self.path = path
+        self.max_samples = max_samples
+        self.min_samples = min_samples
+        self.max_seen = max_seen
+        self._durations = {}
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+        if path:
+            if os.path.exists(path):
+                self._load()
+            atexit.register(self.save)
+
+    def _samples(self, project_slug: str, name: str) -> deque:
+        key = (project_slug, name)
+        samples = self._durations.get(key)
+        if samples is None:
+            samples = self._durations[key] = deque(maxlen=self.max_samples)
+        return samples
+
+    def record(self, workflows) -> int:
+        """
+        :param workflows: polled workflows, only the successful ones are recorded
+
+        :return: number of newly recorded durations
+        """
+        recorded = 0
+        for w in workflows:
+            if w.status != Workflow.Status.SUCCESS or w.id in self._seen:
+                continue
+            created_at, stopped_at = w.created_at, w.stopped_at
+            if created_at is None or stopped_at is None:
+                continue
+            with self._lock:
+                if w.id in self._seen:
+                    continue
+                self._seen[w.id] = None
+                while len(self._seen) > self.max_seen:
+                    self._seen.popitem(last=False)
+                self._samples(w.project_slug, w.name).append((stopped_at - created_at).total_seconds())
+            recorded += 1
+        return recorded
+
+    def seed(self, project_slug: str, name: str, duration_metrics: dict, samples: int = 20) -> bool:
+        """
+        :param duration_metrics: ``metrics.duration_metrics`` of the insights api with ``min``, ``median``,
+            ``p95`` and ``max`` in seconds
+        :param samples: number of added samples
+
+        :return: False if the metrics are incomplete
+        """
+        try:
+            points = [(q, float(duration_metrics[k])) for q, k in _INSIGHTS_QUANTILES]
+        except (KeyError, TypeError, ValueError):
+            return False
+        with self._lock:
+            self._samples(project_slug, name).extend(
+                _interpolate(points, 100 * i / (samples - 1)) for i in range(samples)
+            )
+        return True
+
+    def percentile(self, project_slug: str, name: str, percentile: float):
+        """
+        :param percentile: percentile between 0 and 100
+
+        :return: the duration percentile in seconds or None if there are too few samples
+        """
+        with self._lock:
+            samples = sorted(self._durations.get((project_slug, name), ()))
+        if len(samples) < max(self.min_samples, 1):
+            return None
+        return _interpolate([(100 * i / max(len(samples) - 1, 1), v) for i, v in enumerate(samples)], percentile)
+
+    def remaining(self, workflows, percentile: float, now: datetime = None):
+        """
+        :param workflows: polled workflows of a pipeline
+        :param percentile: percentile of the expected durations
+
+        :return: seconds until the running workflows are expected to stop or None if a running workflow has
+            no history or none is running
+        """
+        now = now or datetime.now(timezone.utc)
+        remaining = None
+        for w in workflows:
+            if not w.in_progress():
+                continue
+            expected = self.percentile(w.project_slug, w.name, percentile)
+            if expected is None or w.created_at is None:
+                return None
+            left = expected - (now - w.created_at).total_seconds()
+            remaining = left if remaining is None else max(remaining, left)
+        return remaining
+
+    def _load(self):
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        for entry in data['workflows']:
+            self._samples(entry['project_slug'], entry['name']).extend(entry['durations'])
+
+    def save(self):
+        """
+        writes the history atomically to its path
+        """
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                'workflows': [
+                    {'project_slug': slug, 'name': name, 'durations': list(samples)}
+                    for (slug, name), samples in self._durations.items()
+                ]
+            }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
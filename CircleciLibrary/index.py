@@ -0,0 +1,140 @@
+import json
+import sqlite3
+import threading
+from CircleciLibrary.model import Pipeline
+from CircleciLibrary.query import PipelineQuery
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS pipelines ("
+    " id TEXT PRIMARY KEY, project_slug TEXT NOT NULL, number INTEGER NOT NULL, revision TEXT,"
+    " branch TEXT, tag TEXT, json TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS pipelines_revision ON pipelines (project_slug, revision)",
+    "CREATE INDEX IF NOT EXISTS pipelines_branch ON pipelines (project_slug, branch, number)",
+    "CREATE INDEX IF NOT EXISTS pipelines_number ON pipelines (project_slug, number)",
+    "CREATE TABLE IF NOT EXISTS projects (project_slug TEXT PRIMARY KEY, synced_number INTEGER NOT NULL)"
+)
+
+
+class PipelineIndex:
+    """
+    sqlite index of the pipelines seen by the library, by project, revision, branch, tag and trigger parameters
+
+    Every pipeline is stored with its raw json, so a lookup returns complete Pipeline objects without api calls.
+    ``synced_number`` remembers up to which pipeline number the pipeline list of a project was read, a refresh
+    only needs the newer pipelines. Without a path the index lives in memory and keeps the ``max_pipelines``
+    last stored pipelines; the projects which lost pipelines are read again by their next refresh.
+    """
+
+    def __init__(self, path: str = None, max_pipelines: int = None):
+        """
+        :param path: path of the sqlite file, created if missing (default: in memory)
+        :param max_pipelines: maximum number of kept pipelines (default: unlimited with a path, 10000 in memory)
+        """
+        self.path = path or ':memory:'
+        self.max_pipelines = max_pipelines if max_pipelines is not None or path else 10000
+        self._db = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        # upper estimate of the stored pipelines, counted exactly once it exceeds max_pipelines
+        self._stored = 0
+        with self._lock:
+            if path:
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+
+    @staticmethod
+    def _row(pipeline: Pipeline, project_slug: str = None):
+        data = pipeline._json
+        if data is None or 'number' not in data:
+            return None
+        slug = data.get('project_slug') or project_slug
+        if slug is None:
+            return None
+        vcs = data.get('vcs') or {}
+        return (pipeline.id, slug, pipeline.number, vcs.get('revision'), vcs.get('branch'), vcs.get('tag'),
+                json.dumps(data, separators=(',', ':')))
+
+    def add(self, pipelines, project_slug: str = None) -> int:
+        """
+        stores decoded pipelines, pipelines without raw json or project are skipped
+
+        :param pipelines: Pipeline objects decoded from api responses
+        :param project_slug: project of pipelines whose json has no ``project_slug``
+
+        :return: number of stored pipelines
+        """
+        rows = [r for r in (self._row(p, project_slug) for p in pipelines) if r is not None]
+        if rows:
+            with self._lock:
+                self._db.executemany("INSERT OR REPLACE INTO pipelines VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self._stored += len(rows)
+                if self.max_pipelines and self._stored > self.max_pipelines:
+                    self._prune()
+        return len(rows)
+
+    def _prune(self):
+        # drops the oldest pipelines down to 90% of the limit so the next count is due after 10% new ones
+        keep = self.max_pipelines * 9 // 10
+        excess = self._db.execute("SELECT COUNT(*) FROM pipelines").fetchone()[0] - keep
+        if excess > 0:
+            oldest = "SELECT rowid FROM pipelines ORDER BY rowid LIMIT ?"
+            self._db.execute(
+                f"DELETE FROM projects WHERE project_slug IN "
+                f"(SELECT DISTINCT project_slug FROM pipelines WHERE rowid IN ({oldest}))",
+                (excess,)
+            )
+            self._db.execute(f"DELETE FROM pipelines WHERE rowid IN ({oldest})", (excess,))
+        self._stored = keep + min(excess, 0)
+
+    def synced_number(self, project_slug: str) -> int:
+        """
+        :return: the number of the newest pipeline up to which the pipeline list of the project was read or None
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT synced_number FROM projects WHERE project_slug = ?", (project_slug,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_synced_number(self, project_slug: str, number: int):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO projects VALUES (?, ?) ON CONFLICT (project_slug) DO UPDATE "
+                "SET synced_number = MAX(synced_number, excluded.synced_number)",
+                (project_slug, number)
+            )
+
+    def lookup(self, project_slug: str, query: PipelineQuery = None, limit: int = None) -> list:
+        """
+        :param project_slug: project slug like ``gh/org/repo``
+        :param query: filter of the pipelines, its revision is a prefix of the commit sha
+        :param limit: maximum number of pipelines (default: all)
+
+        :return: the matching Pipeline objects, newest first
+        """
+        query = query or PipelineQuery()
+        sql = "SELECT json FROM pipelines WHERE project_slug = ?"
+        args = [project_slug]
+        if query.revision:
+            sql += " AND revision LIKE ? ESCAPE '\\'"
+            args.append(query.revision.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        for column in ('branch', 'tag'):
+            if getattr(query, column) is not None:
+                sql += f" AND {column} = ?"
+                args.append(getattr(query, column))
+        sql += " ORDER BY number DESC"
+        with self._lock:
+            rows = self._db.execute(sql, args).fetchall()
+        pipelines = []
+        for (data,) in rows:
+            pipeline = Pipeline.from_json(json.loads(data))
+            if query.matches(pipeline):
+                pipelines.append(pipeline)
+                if limit and len(pipelines) >= limit:
+                    break
+        return pipelines
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -1,8 +1,60 @@
-from os import environ
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
+from importlib import import_module
+from itertools import islice
 from robot.api.deco import library, keyword
-from CircleciLibrary.model import Project, Workflow, Pipeline, WorkflowList
-from CircleciLibrary.log import trace
-from pycircleci.api import Api, API_BASE_URL
+from robot.utils import timestr_to_secs, secs_to_timestr
+from CircleciLibrary.model import Project, Workflow, Pipeline, WorkflowList, Job, Artifact, FAILURE_STATUSES
+from CircleciLibrary.log import Messages, Tracer, info, warn
+from CircleciLibrary.polling import Backoff, PollTimeoutError, RequestCount, VirtualClock, poll
+from CircleciLibrary.scheduler import PollScheduler
+from CircleciLibrary.concurrency import run_concurrently
+from CircleciLibrary.cache import ProjectIndex, ResponseCache, DecodeCache, WorkflowStates
+from CircleciLibrary.pagination import page_items, paginate
+from CircleciLibrary.query import PipelineQuery
+from CircleciLibrary.history import DurationHistory
+from CircleciLibrary.results import TestResultSummary
+from CircleciLibrary.metrics import ApiMetrics, MetricsListener
+
+# modules which import requests, sqlite3, asyncio or http.server are imported on first use, see __getattr__
+_LAZY_IMPORTS = {
+    'Api': 'pycircleci.api',
+    'API_BASE_URL': 'pycircleci.api',
+    'API_VER_V2': 'pycircleci.api',
+    'GET': 'pycircleci.api',
+    'AsyncBackend': 'CircleciLibrary.aio',
+    'create_session': 'CircleciLibrary.session',
+    'PipelineIndex': 'CircleciLibrary.index',
+    'DownloadSummary': 'CircleciLibrary.artifacts',
+    'artifact_target': 'CircleciLibrary.artifacts',
+    'download': 'CircleciLibrary.artifacts',
+    'SharedStore': 'CircleciLibrary.shared',
+    'TriggerRegistry': 'CircleciLibrary.shared',
+    'Cassette': 'CircleciLibrary.cassette',
+    'WebhookReceiver': 'CircleciLibrary.webhooks'
+}
+
+
+def __getattr__(name: str):
+    try:
+        module = _LAZY_IMPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = globals()[name] = getattr(import_module(module), name)
+    return value
+
+
+def _imported(name: str):
+    """
+    :return: the lazily imported name, a patched module attribute takes precedence
+    """
+    return globals()[name] if name in globals() else __getattr__(name)
+
+
+IN_PROGRESS_STATUSES = frozenset({Workflow.Status.RUNNING, Workflow.Status.ON_HOLD, Workflow.Status.FAILING})
+RERUN_STATUSES = frozenset({Workflow.Status.FAILED, Workflow.Status.ERROR})
 
 
 class WorkflowRunningError(Exception):
@@ -23,19 +75,236 @@ class ProjectNotFoundError(Exception):
     """
 
 
+class PipelineNotFoundError(Exception):
+    """
+    this exception will be raised if no pipeline matches the given filters
+    """
+
+
 class CircleciLibraryKeywords:
     """
     circleci keywords
     """
 
-    def __init__(self, api_token=None, base_url=API_BASE_URL):
+    BACKENDS = ('sync', 'async')
+    MODES = ('live', 'record', 'replay')
+    # attributes created by _connect on first access
+    CONNECTED = frozenset({'api', '_aio', '_cassette', '_pipelines', '_durations', '_shared', '_triggers', '_webhooks'})
+
+    def __init__(
+            self,
+            api_token=None,
+            base_url=None,
+            max_concurrency: int = 8,
+            backend: str = 'sync',
+            pool_size: int = 10,
+            max_retries: int = 3,
+            retry_backoff: float = 0.5,
+            rate_limit: float = None,
+            rate_burst: int = None,
+            project_cache_ttl: str = '5m',
+            response_cache_size: int = 1024,
+            trace_max_length: int = 2000,
+            trace_sink: str = None,
+            shared_cache: str = None,
+            shared_cache_freshness: str = '5s',
+            trigger_dedup_window: str = '0s',
+            api_metrics: bool = False,
+            metrics_report: str = None,
+            metrics_textfile: str = None,
+            mode: str = 'live',
+            cassette: str = None,
+            pipeline_index: str = None,
+            coalesce_polls: bool = False,
+            min_poll_interval: str = '2s',
+            webhook_secret: str = None,
+            webhook_port: int = None,
+            webhook_host: str = '0.0.0.0',
+            webhook_url: str = None,
+            webhook_fallback_interval: str = '5m',
+            predict_durations: bool = False,
+            duration_percentile: float = 50,
+            duration_history: str = None
+    ):
         """
-        :param api_token: circleci api token
+        :param api_token: circleci api token, not needed with ``mode=replay``
         :param base_url: circleci base url (default: pycircleci.api.API_BASE_URL)
+        :param max_concurrency: default number of parallel api requests of the bulk keywords (default: 8)
+        :param backend: ``sync`` polls in the calling thread (one thread per pipeline for the bulk keywords),
+            ``async`` runs all api calls and waits on one event loop so a single library instance can
+            watch hundreds of pipelines at once (default: sync)
+        :param pool_size: number of kept alive http connections (default: 10)
+        :param max_retries: retries of failed GET requests on connection errors, 429 and 5xx (default: 3)
+        :param retry_backoff: backoff factor between two retries in seconds, a ``Retry-After`` header
+            of the server takes precedence (default: 0.5)
+        :param rate_limit: client side limit of api requests per second shared by all keywords (default: unlimited)
+        :param rate_burst: maximum burst of requests above the rate limit (default: one second worth of requests)
+        :param project_cache_ttl: time to live of the cached project list, 0 disables the cache (default: 5m)
+        :param response_cache_size: number of pipeline and workflow responses cached for conditional
+            requests, 0 disables the cache (default: 1024)
+        :param trace_max_length: maximum length of an api response traced with log level TRACE,
+            0 for unlimited (default: 2000)
+        :param trace_sink: path of a json lines file which receives the full api responses
+            instead of the robot framework log (optional)
+        :param shared_cache: path of a sqlite file which shares the polled pipelines and workflows between
+            the processes of a pabot run, e.g. ``${OUTPUT DIR}/circleci.db`` (optional)
+        :param shared_cache_freshness: maximum age of a shared pipeline or workflow poll (default: 5s)
+        :param trigger_dedup_window: triggers of the same project, branch or tag and parameters within this
+            time return the first triggered pipeline, across pabot processes with a ``shared_cache``.
+            0 triggers every time (default: 0s)
+        :param api_metrics: record the endpoint, latency, status, size and retries of every api request
+            per library keyword and log them after each keyword (default: False)
+        :param metrics_report: path of a json report of the api metrics per test and for the whole run,
+            implies ``api_metrics`` (optional)
+        :param metrics_textfile: path of a prometheus textfile with the api metrics of the run,
+            implies ``api_metrics`` (optional)
+        :param mode: ``live`` talks to circleci, ``record`` additionally records all api traffic to the
+            ``cassette``, ``replay`` serves the recorded traffic without network access and without
+            waiting between two polls (default: live)
+        :param cassette: path of the gzip compressed cassette file of the ``record`` and ``replay`` modes
+        :param pipeline_index: path of a sqlite file which keeps the index of all seen pipelines across runs,
+            without a path the last 10000 seen pipelines are indexed in memory (optional)
+        :param coalesce_polls: poll the workflows of all pipelines from one background scheduler, concurrent
+            reads of the same pipeline share one api request (default: False)
+        :param min_poll_interval: minimum time between two workflow polls of the same pipeline with
+            ``coalesce_polls``, a faster read waits for the next poll (default: 2s)
+        :param webhook_secret: secret of the circleci webhook, required by the webhook receiver (optional)
+        :param webhook_port: port of an embedded receiver of the circleci ``workflow-completed`` webhooks,
+            0 picks a free port. A received event ends the sleep of the wait keywords at once (optional)
+        :param webhook_host: interface the webhook receiver listens on (default: 0.0.0.0)
+        :param webhook_url: url under which circleci reaches the webhook receiver, e.g. through a proxy
+            or the public address of the host (optional)
+        :param webhook_fallback_interval: poll interval of the wait keywords with a webhook receiver,
+            in case an event is lost (default: 5m)
+        :param predict_durations: the wait keywords sleep until the running workflows are expected to stop,
+            according to the durations of their previous successful runs, and poll with the usual backoff
+            from then on (default: False)
+        :param duration_percentile: percentile of the previous durations used as expected duration (default: 50)
+        :param duration_history: path of a json file which keeps the workflow durations across runs (optional)
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"backend must be one of {self.BACKENDS}, got {backend}")
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}, got {mode}")
+        if mode != 'live' and not cassette:
+            raise ValueError(f"mode {mode} requires a cassette")
+        if webhook_port is not None and not webhook_secret:
+            raise ValueError("the webhook receiver requires a webhook_secret")
+        self._mode = mode
+        self.max_concurrency = int(max_concurrency)
+        self._projects = ProjectIndex(timestr_to_secs(project_cache_ttl))
+        self._responses = ResponseCache(int(response_cache_size)) if int(response_cache_size) > 0 else None
+        self._decoded = DecodeCache(max(int(response_cache_size), 1))
+        self._workflow_states = WorkflowStates()
+        self._trace = Tracer(max_length=int(trace_max_length), sink=trace_sink or None)
+        self._prefetch = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='circleci-prefetch')
+        self._shared_freshness = timestr_to_secs(shared_cache_freshness)
+        self._trigger_dedup_window = timestr_to_secs(trigger_dedup_window)
+        self._scheduler = None
+        self._webhook_url = webhook_url
+        self._webhook_fallback = timestr_to_secs(webhook_fallback_interval)
+        self._predict_durations = predict_durations and mode != 'replay'
+        self._duration_percentile = float(duration_percentile)
+        if coalesce_polls:
+            self._scheduler = PollScheduler(
+                timestr_to_secs(min_poll_interval) if mode != 'replay' else 0,
+                workers=self.max_concurrency
+            )
+        self._metrics = None
+        if api_metrics or metrics_report or metrics_textfile:
+            self._metrics = ApiMetrics()
+            self.ROBOT_LIBRARY_LISTENER = MetricsListener(self._metrics, metrics_report, metrics_textfile, self)
+        self._settings = {
+            'api_token': api_token,
+            'base_url': base_url,
+            'backend': backend,
+            'pool_size': int(pool_size),
+            'max_retries': int(max_retries),
+            'retry_backoff': float(retry_backoff),
+            'rate_limit': float(rate_limit) if rate_limit else None,
+            'rate_burst': int(rate_burst) if rate_burst else None,
+            'cassette': cassette,
+            'pipeline_index': pipeline_index,
+            'duration_history': duration_history,
+            'shared_cache': shared_cache,
+            'webhook_secret': webhook_secret,
+            'webhook_port': webhook_port,
+            'webhook_host': webhook_host
+        }
+        self._connect_lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        if name not in self.CONNECTED:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        self._connect()
+        return self.__dict__[name]
+
+    def _connect(self):
+        """
+        creates the api client, its session and the other network resources on first use
+
+        Neither the import of the library nor libdoc or a dry-run touch the network dependencies; they are
+        imported and built when the first keyword needs one of the ``CONNECTED`` attributes.
         """
-        if "1" == environ.get('INIT_FOR_LIBDOC_ONLY', "0"):
-            return
-        self.api = Api(api_token, url=base_url)
+        with self._connect_lock:
+            if 'api' in self.__dict__:
+                return
+            settings = self._settings
+            token = settings['api_token']
+            if not token and self._mode == 'replay':
+                # the cassette does not match the token, a placeholder keeps the client from requiring one
+                token = 'replay'
+            api = _imported('Api')(token, url=settings['base_url'] or _imported('API_BASE_URL'))
+            cassette = _imported('Cassette')(settings['cassette'], self._mode) if self._mode != 'live' else None
+            api._session = _imported('create_session')(
+                pool_size=settings['pool_size'],
+                max_retries=settings['max_retries'],
+                backoff_factor=settings['retry_backoff'],
+                rate_limit=settings['rate_limit'],
+                rate_burst=settings['rate_burst'],
+                response_cache=self._responses,
+                metrics=self._metrics,
+                cassette=cassette
+            )
+            shared = _imported('SharedStore')(settings['shared_cache']) if settings['shared_cache'] else None
+            webhooks = None
+            if settings['webhook_port'] is not None and self._mode != 'replay':
+                try:
+                    webhooks = _imported('WebhookReceiver')(
+                        settings['webhook_secret'], host=settings['webhook_host'], port=int(settings['webhook_port'])
+                    )
+                except OSError as e:
+                    warn(f"Webhook receiver not started, the wait keywords poll instead: {e}")
+            self._cassette = cassette
+            self._pipelines = _imported('PipelineIndex')(settings['pipeline_index'])
+            self._durations = DurationHistory(settings['duration_history'])
+            self._shared = shared
+            self._triggers = _imported('TriggerRegistry')(shared)
+            self._webhooks = webhooks
+            self._aio = _imported('AsyncBackend')(workers=self.max_concurrency) if settings['backend'] == 'async' else None
+            self.api = api
+
+    def _read_shared(self, key: str, fetch):
+        if self._shared is None:
+            return fetch()
+        return self._shared.get_or_refresh(key, self._shared_freshness, fetch)
+
+    def _call_api(self, func, *args, **kwargs):
+        if self._aio is None or self._in_scheduler():
+            return func(*args, **kwargs)
+        return self._aio.call_sync(func, *args, **kwargs)
+
+    def _in_scheduler(self) -> bool:
+        return self._scheduler is not None and self._scheduler.in_scheduler()
+
+    def _map_concurrently(self, func, items, concurrency: int = None) -> list:
+        concurrency = int(concurrency or self.max_concurrency)
+        try:
+            if self._aio is None or self._aio.in_backend():
+                return run_concurrently(func, items, concurrency)
+            return self._aio.run(self._aio.gather(partial(self._aio.call, func), list(items), concurrency))
+        finally:
+            self._trace.flush()
 
     @keyword
     def define_project(self, vcs_type: str, username: str, reponame: str) -> Project:
@@ -60,22 +329,37 @@ class CircleciLibraryKeywords:
             project: Project,
             branch: str = None,
             tag: str = None,
-            parameters: dict = {}
+            parameters: dict = {},
+            dedup_window: str = None
     ) -> Pipeline:
         """
         Triggers a circleci pipeline
 
+        With a deduplication window the first call triggers the pipeline and every concurrent or later call
+        for the same project, branch or tag and parameters within the window returns the same pipeline.
+
         :param project: the circleci project
         :param branch: the branch to build
             Defaults to None. Cannot be used with the ``tag`` parameter.
         :param tag: the tag to build
             Defaults to None. Cannot be used with the ``branch`` parameter.
         :param parameters:  additional pipeline parameters (default: {})
+        :param dedup_window: deduplication window, 0 triggers every time
+            (default: library ``trigger_dedup_window``)
 
         :return: Pipeline object
         """
-        response = trace(
-            self.api.trigger_pipeline(
+        window = self._trigger_dedup_window if dedup_window is None else timestr_to_secs(dedup_window)
+        trigger = partial(self._trigger_pipeline, project, branch, tag, parameters)
+        if window <= 0:
+            return trigger()
+        key = _imported('TriggerRegistry').key(project.slug, branch, tag, parameters)
+        return self._triggers.trigger(key, window, trigger)
+
+    def _trigger_pipeline(self, project: Project, branch: str, tag: str, parameters: dict) -> Pipeline:
+        response = self._trace(
+            self._call_api(
+                self.api.trigger_pipeline,
                 username=project.username,
                 project=project.reponame,
                 branch=branch,
@@ -95,7 +379,17 @@ class CircleciLibraryKeywords:
 
         :return: Pipeline object
         """
-        return Pipeline.from_json(trace(self.api.get_pipeline(pipeline_id)))
+        return self._read_shared(f"pipeline/{pipeline_id}", partial(self._fetch_pipeline, pipeline_id))
+
+    def _fetch_pipeline(self, pipeline_id) -> Pipeline:
+        response = self._trace(self._call_api(self.api.get_pipeline, pipeline_id), f"pipeline/{pipeline_id}")
+        return self._decoded.decode(('pipeline', pipeline_id), response, self._decode_pipeline)
+
+    def _decode_pipeline(self, response: dict) -> Pipeline:
+        # only changed responses reach the index, repeated polls are served by the decode cache
+        pipeline = Pipeline.from_json(response)
+        self._pipelines.add([pipeline])
+        return pipeline
 
     @keyword
     def get_workflows(self, pipeline: Pipeline) -> WorkflowList:
@@ -106,15 +400,440 @@ class CircleciLibraryKeywords:
 
         :return: list of workflows object
         """
-        response = trace(self.api.get_pipeline_workflow(pipeline.id))
-        if isinstance(response, list):
-            workflow_items = response
-        elif isinstance(response, dict):
-            workflow_items = response['items']
+        return self._get_workflows(pipeline)
+
+    def _get_workflows(self, pipeline: Pipeline, requests: RequestCount = None) -> WorkflowList:
+        key = f"workflows/{pipeline.id}"
+        fetch = partial(self._read_shared, key, partial(self._fetch_workflows, pipeline, requests))
+        if self._scheduler is None or self._in_scheduler():
+            return fetch()
+        try:
+            return self._scheduler.poll(key, fetch)
+        finally:
+            self._trace.flush()
+
+    def _fetch_workflows(self, pipeline: Pipeline, requests: RequestCount = None) -> WorkflowList:
+        workflow_items = list(self._iter_items(f"pipeline/{pipeline.id}/workflow", requests=requests))
+        workflows = self._decoded.decode(('workflows', pipeline.id), workflow_items, self._decode_workflows)
+        self._durations.record(workflows)
+        return workflows
+
+    @staticmethod
+    def _decode_workflows(workflow_items: list) -> WorkflowList:
+        return WorkflowList.from_list([Workflow.from_json(w) for w in workflow_items])
+
+    @keyword
+    def get_workflow_transitions(self, pipeline: Pipeline) -> list:
+        """
+        Get the workflows of the given pipeline which changed their status since the pipeline was polled last
+
+        The first poll of a pipeline reports all its workflows as new. The transitions are logged like
+        ``build: running -> failed``; the wait keywords collect the transitions of every poll and log them
+        in order when the wait ended, also with the ``async`` backend.
+
+        :param pipeline: circleci pipeline object
+
+        :return: list of transitions with the ``workflow``, its ``previous`` and its ``current`` status
+        """
+        messages = Messages()
+        transitions = self._track_workflows(pipeline, self.get_workflows(pipeline), messages)
+        messages.log()
+        return transitions
+
+    def _track_workflows(self, pipeline: Pipeline, workflows: WorkflowList, messages: Messages) -> list:
+        transitions = self._workflow_states.merge(pipeline.id, workflows)
+        if transitions:
+            messages.info(f"Pipeline {pipeline.id}: {', '.join(str(t) for t in transitions)}")
+        return transitions
+
+    def _poll_workflows(
+            self, pipeline: Pipeline, messages: Messages, requests: RequestCount, fresh: bool = False
+    ) -> WorkflowList:
+        if fresh:
+            workflows = self._fetch_workflows(pipeline, requests)
+        else:
+            workflows = self._get_workflows(pipeline, requests)
+        self._track_workflows(pipeline, workflows, messages)
+        return workflows
+
+    def _iter_items(self, endpoint: str, params: dict = None, requests: RequestCount = None):
+        method, api_version = _imported('GET'), _imported('API_VER_V2')
+
+        def fetch_page(token):
+            page_params = dict(params or {})
+            if token:
+                page_params['page-token'] = token
+            if requests is not None:
+                requests.add()
+            response = self._trace(
+                self._call_api(self.api._request, method, endpoint, params=page_params or None, api_version=api_version),
+                f"{endpoint}?page-token={token}" if token else endpoint
+            )
+            return page_items(response)
+
+        # a consumer running inside the async backend must not wait for another backend worker
+        # the prefetch threads of a scheduled poll must not wait for the event loop workers blocked on the poll
+        in_backend = self._aio is not None and (self._aio.in_backend() or self._in_scheduler())
+        executor = None if in_backend else self._prefetch
+        return paginate(fetch_page, executor, on_page=self._trace.flush)
+
+    def iter_workflows(self, pipeline: Pipeline):
+        """
+        streams the workflows of a pipeline page by page, the next page is prefetched in the background
+
+        :param pipeline: circleci pipeline object
+
+        :return: generator of Workflow objects
+        """
+        return map(Workflow.from_json, self._iter_items(f"pipeline/{pipeline.id}/workflow"))
+
+    def iter_workflow_jobs(self, workflow: Workflow):
+        """
+        streams the jobs of a workflow page by page, the next page is prefetched in the background
+
+        :param workflow: circleci workflow object
+
+        :return: generator of Job objects
+        """
+        return map(Job.from_json, self._iter_items(f"workflow/{workflow.id}/job"))
+
+    def iter_project_pipelines(
+            self,
+            project: Project,
+            branch: str = None,
+            query: PipelineQuery = None,
+            limit: int = None,
+            scan_limit: int = None
+    ):
+        """
+        streams the pipelines of a project, newest first, the next page is prefetched in the background
+
+        No further page is fetched once the query is exhausted, the limit is reached or the generator is closed.
+
+        :param project: the circleci project
+        :param branch: only pipelines of this branch, ignored with a query (optional)
+        :param query: filter of the pipelines, its branch is sent to the api (optional)
+        :param limit: maximum number of returned pipelines (optional)
+        :param scan_limit: maximum number of pipelines read from the api (optional)
+
+        :return: generator of Pipeline objects
+        """
+        query = query or PipelineQuery(branch=branch)
+        params = {'branch': query.branch} if query.branch else None
+        items = self._iter_items(f"project/{project.slug}/pipeline", params)
+        pipelines = map(Pipeline.from_json, islice(items, scan_limit) if scan_limit else items)
+        try:
+            yield from query.select(self._index_each(pipelines, project), limit)
+        finally:
+            items.close()
+
+    def _index_each(self, pipelines, project: Project):
+        for pipeline in pipelines:
+            self._pipelines.add([pipeline], project.slug)
+            yield pipeline
+
+    @keyword
+    def refresh_pipeline_index(self, project: Project, scan_limit: int = 1000) -> int:
+        """
+        Reads the pipelines of a project into the local pipeline index
+
+        Only the pipelines newer than the newest pipeline of the previous refresh are read.
+
+        :param project: the circleci project
+        :param scan_limit: maximum number of pipelines read by the first refresh of a project, 0 for all (default: 1000)
+
+        :return: the number of read pipelines
+        """
+        synced = self._pipelines.synced_number(project.slug)
+        newest = None
+        count = 0
+        pipelines = self.iter_project_pipelines(project, scan_limit=None if synced is not None else int(scan_limit) or None)
+        try:
+            for pipeline in pipelines:
+                if synced is not None and pipeline.number <= synced:
+                    break
+                newest = pipeline.number if newest is None else newest
+                count += 1
+        finally:
+            pipelines.close()
+        if newest is not None:
+            self._pipelines.set_synced_number(project.slug, newest)
+        info(f"{count} new pipelines of {project.slug} indexed")
+        return count
+
+    @keyword
+    def lookup_pipelines(
+            self,
+            project: Project,
+            revision: str = None,
+            branch: str = None,
+            tag: str = None,
+            parameters: dict = None,
+            limit: int = 20
+    ) -> list:
+        """
+        Get the pipelines of a project from the local pipeline index
+
+        The index holds every pipeline the library has read. Only if no indexed pipeline matches, the index
+        is refreshed with the pipelines created since its last refresh, see `Refresh Pipeline Index`.
+
+        :param project: the circleci project
+        :param revision: commit sha or its prefix (optional)
+        :param branch: vcs branch (optional)
+        :param tag: vcs tag (optional)
+        :param parameters: dict of trigger parameters the pipelines must have (optional)
+        :param limit: maximum number of pipelines, 0 for all (default: 20)
+
+        :return: list of Pipeline objects, newest first
+        """
+        query = PipelineQuery(branch=branch, tag=tag, parameters=parameters, revision=revision)
+        pipelines = self._pipelines.lookup(project.slug, query, int(limit) or None)
+        if not pipelines:
+            self.refresh_pipeline_index(project)
+            pipelines = self._pipelines.lookup(project.slug, query, int(limit) or None)
+        return pipelines
+
+    @keyword
+    def find_pipeline_for_revision(
+            self,
+            project: Project,
+            revision: str,
+            branch: str = None,
+            tag: str = None,
+            parameters: dict = None
+    ) -> Pipeline:
+        """
+        Find the newest pipeline of a commit in the local pipeline index, see `Lookup Pipelines`
+
+        :param project: the circleci project
+        :param revision: commit sha or its prefix
+        :param branch: vcs branch (optional)
+        :param tag: vcs tag (optional)
+        :param parameters: dict of trigger parameters the pipeline must have (optional)
+
+        :return: the Pipeline object
+
+        :raise: PipelineNotFoundError if no pipeline of this revision is known
+        """
+        pipelines = self.lookup_pipelines(project, revision, branch, tag, parameters, limit=1)
+        if not pipelines:
+            raise PipelineNotFoundError(f"No pipeline of {project.slug} for revision {revision}")
+        return pipelines[0]
+
+    @keyword
+    def get_project_pipelines(
+            self,
+            project: Project,
+            branch: str = None,
+            tag: str = None,
+            state: str = None,
+            created_after=None,
+            created_before=None,
+            parameters: dict = None,
+            limit: int = 20
+    ) -> list:
+        """
+        Get the newest pipelines of a project which match all given filters
+
+        The pipelines are read page by page, newest first, and the scan ends as soon as ``limit`` pipelines
+        matched or the pipelines are older than ``created_after``.
+
+        :param project: the circleci project
+        :param branch: vcs branch, filtered by the api (optional)
+        :param tag: vcs tag (optional)
+        :param state: pipeline state, e.g. ``created`` or ``errored`` (optional)
+        :param created_after: ISO-8601 time, only pipelines created at or after it (optional)
+        :param created_before: ISO-8601 time, only pipelines created before it (optional)
+        :param parameters: dict of trigger parameters the pipelines must have, nested keys are joined with dots
+            like ``git.branch`` (optional)
+        :param limit: maximum number of pipelines, 0 for all (default: 20)
+
+        :return: list of Pipeline objects, newest first
+        """
+        query = PipelineQuery(branch, tag, state, created_after, created_before, parameters)
+        return list(self.iter_project_pipelines(project, query=query, limit=int(limit) or None))
+
+    @keyword
+    def find_latest_pipeline(
+            self,
+            project: Project,
+            branch: str = None,
+            tag: str = None,
+            state: str = None,
+            created_after=None,
+            created_before=None,
+            parameters: dict = None,
+            workflow_status: Workflow.Status = None,
+            scan_limit: int = 1000
+    ) -> Pipeline:
+        """
+        Find the newest pipeline of a project which matches all given filters
+
+        With ``workflow_status`` the workflows of every matching pipeline are read until a pipeline is found
+        whose workflows all have this status, e.g. the last green pipeline of a branch.
+
+        :param project: the circleci project
+        :param branch: vcs branch, filtered by the api (optional)
+        :param tag: vcs tag (optional)
+        :param state: pipeline state (optional)
+        :param created_after: ISO-8601 time, only pipelines created at or after it (optional)
+        :param created_before: ISO-8601 time, only pipelines created before it (optional)
+        :param parameters: dict of trigger parameters the pipeline must have (optional)
+        :param workflow_status: status all workflows of the pipeline must have (optional)
+        :param scan_limit: maximum number of pipelines read from the api, 0 for unlimited (default: 1000)
+
+        :return: the Pipeline object
+
+        :raise: PipelineNotFoundError if no pipeline matches
+        """
+        query = PipelineQuery(branch, tag, state, created_after, created_before, parameters)
+        status = Workflow.Status(workflow_status) if workflow_status else None
+        candidates = self.iter_project_pipelines(project, query=query, scan_limit=int(scan_limit) or None)
+        try:
+            for pipeline in candidates:
+                if status is None:
+                    return pipeline
+                workflows = self.get_workflows(pipeline)
+                if len(workflows) and workflows.overall_status(status):
+                    return pipeline
+        finally:
+            candidates.close()
+        raise PipelineNotFoundError(f"No pipeline of {project.slug} matches the filters")
+
+    @keyword
+    def get_workflow_jobs(self, workflow: Workflow) -> list:
+        """
+        Get all jobs of a given workflow
+
+        :param workflow: circleci workflow object
+
+        :return: list of Job objects
+        """
+        return list(self.iter_workflow_jobs(workflow))
+
+    def _jobs(self, source, concurrency: int = None) -> list:
+        return [job for _, job in self._workflow_jobs(source, concurrency)]
+
+    def _workflow_jobs(self, source, concurrency: int = None) -> list:
+        """
+        :return: list of ``(workflow_name, job)``, the workflow name of a given Job is None
+        """
+        if isinstance(source, Job):
+            return [(None, source)]
+        if isinstance(source, Workflow):
+            return [(source.name, j) for j in self.get_workflow_jobs(source)]
+        if isinstance(source, Pipeline):
+            workflows = self.get_workflows(source)
+        elif isinstance(source, (list, tuple)):
+            return [pair for s in source for pair in self._workflow_jobs(s, concurrency)]
         else:
-            raise RuntimeError(f"list or dict expected for the response: {response}")
-        workflows = [Workflow.from_json(w) for w in workflow_items]
-        return WorkflowList.from_list(workflows)
+            raise ValueError(f"Pipeline, Workflow or Job expected: {source}")
+        jobs = self._map_concurrently(self.get_workflow_jobs, workflows, concurrency)
+        return [(w.name, j) for w, workflow_jobs in zip(workflows, jobs) for j in workflow_jobs]
+
+    @keyword
+    def get_artifacts(self, source, pattern: str = '*', concurrency: int = None) -> list:
+        """
+        Get the artifacts of all jobs of a pipeline, workflow or job
+
+        The artifacts of the jobs are listed concurrently.
+
+        :param source: Pipeline, Workflow, Job or a list of them
+        :param pattern: glob pattern the artifact path has to match (default: *)
+        :param concurrency: maximum number of parallel requests (default: library ``max_concurrency``)
+
+        :return: list of Artifact objects
+        """
+        def artifacts(job):
+            return [
+                Artifact.from_json(a, job.job_number, job.project_slug)
+                for a in self._iter_items(f"project/{job.project_slug}/{job.job_number}/artifacts")
+            ]
+
+        jobs = [j for j in self._jobs(source, concurrency) if j.job_number is not None]
+        found = self._map_concurrently(artifacts, jobs, concurrency)
+        return [a for job_artifacts in found for a in job_artifacts if fnmatchcase(a.path, pattern)]
+
+    @keyword
+    def get_pipeline_test_results(self, source, slowest: int = 10, concurrency: int = None) -> dict:
+        """
+        Aggregates the test metadata of all jobs of a pipeline, workflow or job
+
+        The jobs and their paginated test metadata are fetched concurrently and folded into a compact
+        summary as they arrive, the raw test metadata is not kept.
+
+        :param source: Pipeline, Workflow, Job or a list of them
+        :param slowest: number of slowest tests in the summary (default: 10)
+        :param concurrency: maximum number of parallel requests (default: library ``max_concurrency``)
+
+        :return: dict with ``total``, ``jobs``, ``run_time``, ``counts`` by result, ``failed``,
+            the ``failing`` test names and the ``slowest`` tests as ``(run_time, name, job)``; a job is
+            labelled ``workflow/job``
+        """
+        summary = TestResultSummary(int(slowest))
+
+        def fold(pair):
+            workflow_name, job = pair
+            summary.add(
+                (job.project_slug, job.job_number),
+                f"{workflow_name}/{job.name}" if workflow_name else job.name,
+                self._iter_items(f"project/{job.project_slug}/{job.job_number}/tests")
+            )
+
+        jobs = [(w, j) for w, j in self._workflow_jobs(source, concurrency) if j.job_number is not None]
+        self._map_concurrently(fold, jobs, concurrency)
+        result = summary.to_dict()
+        info(f"{result['total']} tests in {result['jobs']} jobs: {result['counts']}")
+        return result
+
+    @keyword
+    def download_artifacts(
+            self,
+            source,
+            directory: str,
+            pattern: str = '*',
+            concurrency: int = None,
+            chunk_size: int = 1024 * 1024
+    ) -> dict:
+        """
+        Downloads the artifacts of a pipeline, workflow or job
+
+        Every artifact is streamed in chunks to ``directory/<job number>/<artifact path>``. A partial
+        download of an earlier run is resumed and complete files with the announced size are skipped.
+
+        :param source: Pipeline, Workflow, Job, a list of them or a list of Artifact objects
+        :param directory: download directory
+        :param pattern: glob pattern the artifact path has to match (default: *)
+        :param concurrency: maximum number of parallel downloads (default: library ``max_concurrency``)
+        :param chunk_size: size of the chunks written to disk in bytes (default: 1 MiB)
+
+        :return: summary dict with the number of ``files``, ``skipped`` files, downloaded ``bytes``,
+            ``seconds`` and ``bytes_per_second``
+
+        :raise: ArtifactSizeError if a downloaded artifact does not have the announced size
+        """
+        if isinstance(source, (list, tuple)) and all(isinstance(a, Artifact) for a in source):
+            artifacts = [a for a in source if fnmatchcase(a.path, pattern)]
+        else:
+            artifacts = self.get_artifacts(source, pattern, concurrency)
+        summary = _imported('DownloadSummary')()
+        download, artifact_target = _imported('download'), _imported('artifact_target')
+
+        def fetch(artifact):
+            downloaded, skipped = download(
+                self.api._session,
+                artifact.url,
+                artifact_target(directory, artifact.job_number, artifact.path),
+                headers={'Circle-Token': self.api.token},
+                chunk_size=int(chunk_size)
+            )
+            summary.add(downloaded, skipped)
+
+        self._map_concurrently(fetch, artifacts, concurrency)
+        result = summary.to_dict()
+        info(f"Downloaded {result['files']} artifacts ({result['skipped']} skipped, {result['bytes']} bytes) "
+             f"in {secs_to_timestr(result['seconds'])}")
+        return result
 
     @keyword
     def all_workflows_stopped(self, pipeline: Pipeline) -> bool:
@@ -145,10 +864,7 @@ class CircleciLibraryKeywords:
         """
         :return: True if all workflows have the desired status
         """
-        for w in self.get_workflows(pipeline):
-            if w.status != status:
-                return False
-        return True
+        return self.get_workflows(pipeline).overall_status(status)
 
     @keyword
     def all_workflows_should_have_the_status(self, pipeline: Pipeline, status: Workflow.Status):
@@ -163,29 +879,557 @@ class CircleciLibraryKeywords:
         if not self.all_workflows_have_status(pipeline, status):
             raise WorkflowStatusError(f"Workflows do not have the status {status.name} for pipeline: {pipeline}")
 
+    @keyword
+    def wait_for_pipeline(
+            self,
+            pipeline: Pipeline,
+            timeout: str = '30m',
+            initial_interval: str = '1s',
+            max_interval: str = '30s',
+            backoff_factor: float = 2.0,
+            jitter: float = 0.2,
+            fail_fast: bool = False,
+            cancel_remaining: bool = False
+    ) -> WorkflowList:
+        """
+        Waits until all workflows of the given pipeline stopped
+
+        The workflows are polled with an exponential backoff: the first poll happens at once, the second
+        one ``initial_interval`` later, every further interval grows by ``backoff_factor`` up to
+        ``max_interval`` and is randomly deviated by ``jitter`` to spread the load of parallel suites.
+
+        With ``fail_fast`` the keyword returns as soon as one workflow has the status ``failed``,
+        ``failing``, ``error`` or ``unauthorized``; ``cancel_remaining`` then cancels all workflows
+        of the pipeline which are still running, the failing ones included.
+
+        :param pipeline: circleci pipeline object
+        :param timeout: total time to wait, robot framework time format (default: 30m)
+        :param initial_interval: interval after the first poll (default: 1s)
+        :param max_interval: upper cap of the poll interval (default: 30s)
+        :param backoff_factor: growth factor of the poll interval (default: 2.0)
+        :param jitter: relative random deviation of the poll interval (default: 0.2)
+        :param fail_fast: return on the first failed workflow (default: False)
+        :param cancel_remaining: cancel the running workflows after a failure, requires ``fail_fast`` (default: False)
+
+        :return: the final list of workflows
+
+        :raise: WorkflowRunningError if not all workflows stopped within the timeout
+        """
+        return self._wait_for_pipeline(
+            pipeline, timeout, initial_interval, max_interval, backoff_factor, jitter, fail_fast, cancel_remaining
+        )
+
+    def _wait_for_pipeline(
+            self,
+            pipeline: Pipeline,
+            timeout: str = '30m',
+            initial_interval: str = '1s',
+            max_interval: str = '30s',
+            backoff_factor: float = 2.0,
+            jitter: float = 0.2,
+            fail_fast: bool = False,
+            cancel_remaining: bool = False,
+            expected: frozenset = frozenset(),
+            messages: Messages = None
+    ) -> WorkflowList:
+        if messages is None:
+            messages = Messages()
+            try:
+                return self._wait_for_pipeline(
+                    pipeline, timeout, initial_interval, max_interval, backoff_factor, jitter, fail_fast,
+                    cancel_remaining, expected, messages
+                )
+            finally:
+                self._trace.flush()
+                messages.log()
+        backoff = self._backoff(initial_interval, max_interval, backoff_factor, jitter)
+        fetch, backoff, timing, subscription, requests = self._wait_plan(
+            pipeline, backoff, messages, asynchronous=self._aio is not None
+        )
+        done = self._wait_condition(fail_fast, expected)
+        try:
+            if self._aio is None:
+                result = poll(fetch, done, timeout=timestr_to_secs(timeout), backoff=backoff, **timing)
+            else:
+                result = self._aio.run(
+                    self._aio.poll(fetch, done, timeout=timestr_to_secs(timeout), backoff=backoff, **timing)
+                )
+        except PollTimeoutError as e:
+            raise self._still_running(pipeline, e, requests) from e
+        finally:
+            if subscription is not None:
+                subscription.close()
+        return self._finish_wait(pipeline, result, requests, messages, cancel_remaining)
+
+    def _wait_plan(self, pipeline: Pipeline, backoff: Backoff, messages: Messages, asynchronous: bool = False) -> tuple:
+        requests = RequestCount()
+        if self._webhooks is None:
+            timing = self._poll_timing()
+            subscription = None
+            fetch = partial(self._poll_workflows, pipeline, messages, requests)
+        else:
+            subscription = self._webhooks.subscribe(pipeline.id)
+            backoff = Backoff(self._webhook_fallback, self._webhook_fallback, jitter=backoff.jitter)
+            timing = {'wait': subscription.wait} if asynchronous else {'sleep': subscription.sleep}
+
+            def fetch():
+                # the cached workflows may predate the event which ended the sleep
+                return self._poll_workflows(pipeline, messages, requests, fresh=subscription.woken)
+
+        if self._predict_durations:
+            timing['schedule'] = partial(self._predicted_delay, pipeline, messages)
+        return fetch, backoff, timing, subscription, requests
+
+    def _predicted_delay(self, pipeline: Pipeline, messages: Messages, workflows: WorkflowList, delay: float) -> float:
+        remaining = self._durations.remaining(workflows, self._duration_percentile)
+        if remaining is None or remaining <= delay:
+            return delay
+        messages.info(f"Pipeline {pipeline.id} is expected to stop in {secs_to_timestr(remaining)}")
+        return remaining
+
+    def _poll_timing(self) -> dict:
+        if self._mode != 'replay':
+            return {}
+        clock = VirtualClock()
+        return {'sleep': clock.sleep, 'clock': clock.time}
+
+    @staticmethod
+    def _wait_condition(fail_fast: bool, expected: frozenset = frozenset()):
+        if fail_fast:
+            stopped = lambda workflows: workflows.completed() or workflows.failed()  # noqa: E731
+        else:
+            stopped = WorkflowList.completed
+        if not expected:
+            return stopped
+        # rerun workflows may not be listed yet by the first polls
+        return lambda workflows: all(workflows.get(i) is not None for i in expected) and stopped(workflows)
+
+    def _finish_wait(
+            self, pipeline: Pipeline, result, requests: RequestCount, messages: Messages, cancel_remaining: bool = False
+    ):
+        workflows = result.value
+        cost = self._wait_cost(result, requests)
+        if workflows.completed():
+            messages.info(f"Pipeline {pipeline.id} stopped after {cost}")
+            return workflows
+        failed = [w.name for w in workflows if w.status in FAILURE_STATUSES]
+        messages.info(f"Pipeline {pipeline.id} failed fast after {cost}: {', '.join(failed)}")
+        # a failing workflow still runs its remaining jobs
+        running = [w for w in workflows if w.in_progress()] if cancel_remaining else []
+        if running:
+            self._cancel_workflows(running, messages)
+            messages.info(f"Cancelled workflows: {', '.join(w.name for w in running)}")
+        return workflows
+
+    def _cancel_workflows(self, workflows: list, messages: Messages, concurrency: int = None) -> list:
+        def cancel(workflow: Workflow):
+            self._call_api(self.api.cancel_workflow, workflow.id)
+
+        return self._apply_to_workflows(cancel, workflows, messages, concurrency)
+
+    def _apply_to_workflows(self, func, workflows: list, messages: Messages, concurrency: int = None) -> list:
+        """
+        calls ``func(workflow)`` concurrently, a failed call does not stop the others and is added to the
+        messages as warning; ``func`` returns a dict of further result fields or None
+
+        :return: one result dict per workflow with its ``pipeline_id``, ``workflow_id``, ``name``,
+            ``status``, ``ok`` and ``error``
+        """
+        def apply(workflow: Workflow) -> dict:
+            result = {
+                'pipeline_id': workflow.pipeline_id,
+                'workflow_id': workflow.id,
+                'name': workflow.name,
+                'status': getattr(workflow.status, 'value', workflow.status),
+                'ok': True,
+                'error': None
+            }
+            try:
+                result.update(func(workflow) or {})
+            except Exception as e:
+                result.update(ok=False, error=f"{type(e).__name__}: {e}")
+            return result
+
+        results = self._map_concurrently(apply, workflows, concurrency)
+        for r in results:
+            if not r['ok']:
+                messages.warn(f"Workflow {r['name']} ({r['workflow_id']}) of pipeline {r['pipeline_id']}: {r['error']}")
+        return results
+
+    @staticmethod
+    def _backoff(initial_interval: str, max_interval: str, backoff_factor: float = 2.0, jitter: float = 0.2) -> Backoff:
+        return Backoff(
+            initial=timestr_to_secs(initial_interval),
+            maximum=timestr_to_secs(max_interval),
+            factor=float(backoff_factor),
+            jitter=float(jitter)
+        )
+
+    @staticmethod
+    def _wait_cost(result, requests: RequestCount) -> str:
+        # a poll may send no request within the shared cache freshness or several for paginated workflows
+        return f"{result.calls} polls and {requests.value} api requests in {secs_to_timestr(result.elapsed)}"
+
+    def _still_running(self, pipeline: Pipeline, error: PollTimeoutError, requests: RequestCount):
+        return WorkflowRunningError(
+            f"Workflows still running for pipeline: {pipeline} after {self._wait_cost(error.result, requests)}"
+        )
+
+    @staticmethod
+    def _pipeline_spec(spec) -> tuple:
+        if isinstance(spec, Project):
+            return spec, None, None, {}
+        if isinstance(spec, dict):
+            return spec['project'], spec.get('branch'), spec.get('tag'), spec.get('parameters') or {}
+        if isinstance(spec, (list, tuple)) and 1 <= len(spec) <= 3:
+            project, ref, parameters = (list(spec) + [None, None])[:3]
+            branch, tag = None, None
+            if ref and ref.startswith('refs/tags/'):
+                tag = ref[len('refs/tags/'):]
+            elif ref:
+                branch = ref[len('refs/heads/'):] if ref.startswith('refs/heads/') else ref
+            return project, branch, tag, parameters or {}
+        raise ValueError(f"Project, dict or (project, branch/tag, parameters) expected as pipeline spec: {spec}")
+
+    @keyword
+    def trigger_pipelines(self, specs: list, concurrency: int = None) -> list:
+        """
+        Triggers several circleci pipelines concurrently
+
+        A spec is either a ``Project`` (default branch), a dict with the keys ``project``, ``branch``,
+        ``tag`` and ``parameters`` or a list ``(project, ref, parameters)``. A ``ref`` starting with
+        ``refs/tags/`` triggers a tag, every other ref is used as branch name.
+
+        :param specs: list of pipeline specs
+        :param concurrency: maximum number of parallel requests (default: library ``max_concurrency``)
+
+        :return: list of Pipeline objects in the order of the specs
+        """
+        def trigger(spec):
+            project, branch, tag, parameters = self._pipeline_spec(spec)
+            return self.trigger_pipeline(project, branch=branch, tag=tag, parameters=parameters)
+
+        return self._map_concurrently(trigger, specs, concurrency)
+
+    @keyword
+    def wait_for_pipelines(
+            self,
+            pipelines: list,
+            timeout: str = '30m',
+            initial_interval: str = '1s',
+            max_interval: str = '30s',
+            concurrency: int = None,
+            fail_fast: bool = False,
+            cancel_remaining: bool = False
+    ) -> dict:
+        """
+        Waits concurrently until all workflows of the given pipelines stopped
+
+        Every pipeline is polled like in `Wait For Pipeline`.
+
+        :param pipelines: list of circleci pipeline objects
+        :param timeout: total time to wait for each pipeline (default: 30m)
+        :param initial_interval: interval after the first poll (default: 1s)
+        :param max_interval: upper cap of the poll interval (default: 30s)
+        :param concurrency: maximum number of pipelines polled in parallel (default: library ``max_concurrency``)
+        :param fail_fast: stop waiting for a pipeline on its first failed workflow (default: False)
+        :param cancel_remaining: cancel the running workflows of a failed pipeline, requires ``fail_fast`` (default: False)
+
+        :return: dict of Pipeline to its final list of workflows
+
+        :raise: WorkflowRunningError if not all workflows stopped within the timeout
+        """
+        return self._wait_for_pipelines(
+            pipelines, timeout, initial_interval, max_interval, concurrency, fail_fast, cancel_remaining
+        )
+
+    def _wait_for_pipelines(
+            self,
+            pipelines: list,
+            timeout: str = '30m',
+            initial_interval: str = '1s',
+            max_interval: str = '30s',
+            concurrency: int = None,
+            fail_fast: bool = False,
+            cancel_remaining: bool = False,
+            expected: dict = None
+    ) -> dict:
+        pipelines = list(pipelines)
+        concurrency = int(concurrency or self.max_concurrency)
+        timeout = timestr_to_secs(timeout)
+        expected = expected or {}
+        messages = Messages()
+
+        async def wait(pipeline):
+            fetch, backoff, timing, subscription, requests = self._wait_plan(
+                pipeline, self._backoff(initial_interval, max_interval), messages, asynchronous=True
+            )
+            try:
+                result = await self._aio.poll(
+                    fetch,
+                    self._wait_condition(fail_fast, expected.get(pipeline.id, frozenset())),
+                    timeout=timeout,
+                    backoff=backoff,
+                    **timing
+                )
+            except PollTimeoutError as e:
+                raise self._still_running(pipeline, e, requests) from e
+            finally:
+                if subscription is not None:
+                    subscription.close()
+            return await self._aio.call(self._finish_wait, pipeline, result, requests, messages, cancel_remaining)
+
+        try:
+            if self._aio is None:
+                results = run_concurrently(
+                    lambda p: self._wait_for_pipeline(
+                        p,
+                        timeout=timeout,
+                        initial_interval=initial_interval,
+                        max_interval=max_interval,
+                        fail_fast=fail_fast,
+                        cancel_remaining=cancel_remaining,
+                        expected=expected.get(p.id, frozenset()),
+                        messages=messages
+                    ),
+                    pipelines,
+                    concurrency
+                )
+            else:
+                results = self._aio.run(self._aio.gather(wait, pipelines, concurrency))
+        finally:
+            self._trace.flush()
+            messages.log()
+        info(f"{len(pipelines)} pipelines finished")
+        return dict(zip(pipelines, results))
+
+    @staticmethod
+    def _sources(sources) -> list:
+        return [sources] if isinstance(sources, (Pipeline, Workflow, WorkflowList)) else list(sources)
+
+    def _select_workflows(self, sources, statuses: frozenset, concurrency: int = None) -> list:
+        sources = self._sources(sources)
+        pipelines = [s for s in sources if isinstance(s, Pipeline)]
+        fetched = dict(zip(
+            (p.id for p in pipelines),
+            self._map_concurrently(self.get_workflows, pipelines, concurrency)
+        ))
+        selected = {}
+        for source in sources:
+            if isinstance(source, Pipeline):
+                workflows = fetched[source.id]
+            elif isinstance(source, Workflow):
+                workflows = [source]
+            else:
+                workflows = source
+            for w in workflows:
+                if w.status in statuses:
+                    selected.setdefault(w.id, w)
+        return list(selected.values())
+
+    @staticmethod
+    def _statuses(statuses, default: frozenset) -> frozenset:
+        if not statuses:
+            return default
+        if isinstance(statuses, (str, Workflow.Status)):
+            statuses = [statuses]
+        return frozenset(s if isinstance(s, Workflow.Status) else Workflow.Status(s) for s in statuses)
+
+    @keyword
+    def cancel_pipelines(self, sources, statuses: list = None, concurrency: int = None) -> list:
+        """
+        Cancel the workflows of many pipelines concurrently
+
+        A failed cancel call does not stop the others, it is logged as warning and reported in its result.
+
+        :param sources: Pipeline, WorkflowList or a list of them; the workflows of a pipeline are fetched first
+        :param statuses: workflow statuses to cancel (default: running, on_hold and failing)
+        :param concurrency: maximum number of parallel cancel calls (default: library ``max_concurrency``)
+
+        :return: one dict per cancelled workflow with its ``pipeline_id``, ``workflow_id``, ``name``,
+            ``status``, ``ok`` and ``error``
+        """
+        workflows = self._select_workflows(sources, self._statuses(statuses, IN_PROGRESS_STATUSES), concurrency)
+        messages = Messages()
+        results = self._cancel_workflows(workflows, messages, concurrency)
+        messages.log()
+        info(f"Cancelled {sum(r['ok'] for r in results)} of {len(results)} workflows")
+        return results
+
+    @keyword
+    def rerun_failed_workflows(
+            self,
+            sources,
+            statuses: list = None,
+            from_failed: bool = True,
+            concurrency: int = None,
+            wait: bool = False,
+            timeout: str = '30m',
+            initial_interval: str = '1s',
+            max_interval: str = '30s'
+    ) -> list:
+        """
+        Rerun the failed workflows of many pipelines concurrently
+
+        A rerun workflow gets a new id within its pipeline. With ``wait`` the keyword waits like
+        `Wait For Pipelines` until the rerun workflows of all pipelines stopped.
+
+        :param sources: Pipeline, WorkflowList or a list of them; the workflows of a pipeline are fetched first
+        :param statuses: workflow statuses to rerun (default: failed and error)
+        :param from_failed: rerun only the failed jobs and their dependents, else the whole workflow (default: True)
+        :param concurrency: maximum number of parallel rerun calls and waits (default: library ``max_concurrency``)
+        :param wait: wait until the rerun workflows stopped (default: False)
+        :param timeout: total time to wait for each pipeline (default: 30m)
+        :param initial_interval: interval after the first poll (default: 1s)
+        :param max_interval: upper cap of the poll interval (default: 30s)
+
+        :return: one dict per rerun workflow with its ``pipeline_id``, ``workflow_id``, ``name``, ``status``,
+            ``ok``, ``error`` and the ``rerun_workflow_id``; with ``wait`` also the ``rerun_status``
+
+        :raise: WorkflowRunningError if a rerun workflow did not stop within the timeout
+        """
+        workflows = self._select_workflows(sources, self._statuses(statuses, RERUN_STATUSES), concurrency)
+
+        def rerun(workflow: Workflow) -> dict:
+            response = self._call_api(self.api.rerun_workflow, workflow.id, from_failed=bool(from_failed))
+            return {'rerun_workflow_id': (response or {}).get('workflow_id')}
+
+        messages = Messages()
+        results = self._apply_to_workflows(rerun, workflows, messages, concurrency)
+        messages.log()
+        for r in results:
+            r.setdefault('rerun_workflow_id', None)
+        info(f"Rerun {sum(r['ok'] for r in results)} of {len(results)} workflows")
+        if not wait:
+            return results
+        expected = {}
+        for r in results:
+            if r['rerun_workflow_id']:
+                expected.setdefault(r['pipeline_id'], set()).add(r['rerun_workflow_id'])
+        given = {s.id: s for s in self._sources(sources) if isinstance(s, Pipeline)}
+        pipelines = [given.get(i) or self.get_pipeline(i) for i in expected]
+        finished = self._wait_for_pipelines(
+            pipelines, timeout, initial_interval, max_interval, concurrency,
+            expected={k: frozenset(v) for k, v in expected.items()}
+        )
+        rerun = {w.id: w for workflows in finished.values() for w in workflows}
+        for r in results:
+            w = rerun.get(r['rerun_workflow_id'])
+            r['rerun_status'] = w.status.value if w is not None else None
+        return results
+
     def _get_projects(self):
-        for p in trace(self.api.get_projects()):
+        for p in self._trace(self._call_api(self.api.get_projects), "projects"):
             yield Project.from_json(p)
 
+    def _refresh_projects(self):
+        self._projects.load(self._get_projects())
+
     @keyword
     def get_projects(self):
         """
         :return: all projects of the current user
         """
-        return list(self._get_projects())
+        if not self._projects.is_fresh():
+            self._refresh_projects()
+        return self._projects.projects()
 
     @keyword
-    def get_project(self, name: str):
+    def get_project(self, name: str, username: str = None, vcs_type: str = None):
         """
         returns the desired project of the current user
 
+        The project list is cached for ``project_cache_ttl``. A project which is not in the
+        cached list triggers one refresh of the list before the lookup fails.
+
         :param name: name of the desired project
+        :param username: project organisation, to distinguish projects with the same name (optional)
+        :param vcs_type: vcs type, to distinguish projects with the same name (optional)
 
         :return: the desired project of the current user
 
         :raise: ProjectNotFoundError if no project was found for the given name
         """
-        for p in self._get_projects():
-            if p.reponame == name:
-                return p
-        raise ProjectNotFoundError(f"project {name} was not found in the projects list of the current user")
+        refreshed = False
+        if not self._projects.is_fresh():
+            self._refresh_projects()
+            refreshed = True
+        project = self._projects.lookup(name, username, vcs_type)
+        if project is None and not refreshed:
+            self._refresh_projects()
+            project = self._projects.lookup(name, username, vcs_type)
+        if project is None:
+            raise ProjectNotFoundError(f"project {name} was not found in the projects list of the current user")
+        return project
+
+    @keyword
+    def get_response_cache_statistics(self) -> dict:
+        """
+        returns the counters of the response cache for pipeline and workflow reads
+
+        ``not_modified`` counts 304 responses to conditional requests, ``unchanged`` counts responses
+        recognized by the hash of their body, ``misses`` counts changed responses and the
+        ``decode_*`` counters show how often decoded Pipeline and WorkflowList objects were reused.
+
+        :return: dict of counters
+        """
+        statistics = self._responses.statistics() if self._responses is not None else {}
+        statistics.update(self._decoded.statistics())
+        return statistics
+
+    @keyword
+    def get_api_metrics(self) -> dict:
+        """
+        returns the api metrics of the run so far, requires the library argument ``api_metrics``
+
+        :return: dict with the number of ``calls``, ``errors`` and ``retries``, the received ``bytes``, the
+            summed latency in ``seconds`` and the number of calls per endpoint in ``endpoints``
+        """
+        if self._metrics is None:
+            raise RuntimeError("api metrics are disabled, import the library with api_metrics=True")
+        return self._metrics.summary()
+
+    @keyword
+    def seed_workflow_durations(self, project: Project, branch: str = None) -> int:
+        """
+        Seed the workflow duration history of the project from the duration metrics of the insights api
+
+        The history predicts the end of the running workflows for the wait keywords with the library
+        argument ``predict_durations``; without seeding it is built from the polled workflows only.
+
+        :param project: circleci project object
+        :param branch: branch of the metrics (default: the default branch of the project)
+
+        :return: number of seeded workflows
+        """
+        params = {'branch': branch} if branch else None
+        seeded = 0
+        for item in self._iter_items(f"insights/{project.slug}/workflows", params):
+            metrics = (item.get('metrics') or {}).get('duration_metrics') or {}
+            seeded += self._durations.seed(project.slug, item['name'], metrics)
+        info(f"Seeded the durations of {seeded} workflows of {project.slug}")
+        return seeded
+
+    @keyword
+    def get_webhook_url(self) -> str:
+        """
+        Get the url of the embedded webhook receiver
+
+        Configure the ``webhook_url`` of the library as the url of the circleci webhook. Without it the
+        local address of the receiver is returned, like ``http://127.0.0.1:8080/`` when it listens on all
+        interfaces, which circleci cannot reach.
+
+        :return: the ``webhook_url`` or the local url of the receiver
+
+        :raise: RuntimeError if the library runs without a webhook receiver
+        """
+        if self._webhooks is None:
+            raise RuntimeError("the webhook receiver is not running, set webhook_port and webhook_secret")
+        return self._webhook_url or self._webhooks.url
+
+    @keyword
+    def invalidate_project_cache(self):
+        """
+        drops the cached project list, the next project lookup fetches it again
+        """
+        self._projects.invalidate()
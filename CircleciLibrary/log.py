@@ -1,5 +1,152 @@
-from robot.libraries.BuiltIn import BuiltIn
+import json
+import threading
+import time
+from collections import OrderedDict
+from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError
+
+# robot framework writes only the log messages of these threads, see robot.output.librarylogger
+_LOGGING_THREADS = ('MainThread', 'RobotFrameworkTimeoutThread')
+
+
+def trace_enabled() -> bool:
+    """
+    :return: True if robot framework is running with log level TRACE
+    """
+    try:
+        return BuiltIn().get_variable_value('${LOG_LEVEL}') == 'TRACE'
+    except RobotNotRunningError:
+        return False
+
+
+def in_logging_thread() -> bool:
+    """
+    :return: True if the messages logged by the current thread reach the robot framework log
+    """
+    return threading.current_thread().name in _LOGGING_THREADS
+
 
 def trace(obj, level="TRACE"):
     BuiltIn().log(str(obj), level=level)
-    return obj
\ No newline at end of file
+    return obj
+
+
+def info(message: str):
+    BuiltIn().log(message, level="INFO")
+
+
+def warn(message: str):
+    BuiltIn().log(message, level="WARN")
+
+
+class Messages:
+    """
+    log messages of worker threads
+
+    Robot framework drops the messages logged by other threads than the one running the keyword. The
+    workers collect their messages here and the keyword logs them in order once the workers finished.
+    """
+
+    def __init__(self):
+        self._messages = []
+        self._lock = threading.Lock()
+
+    def trace(self, message: str):
+        with self._lock:
+            self._messages.append(("TRACE", message))
+
+    def info(self, message: str):
+        with self._lock:
+            self._messages.append(("INFO", message))
+
+    def warn(self, message: str):
+        with self._lock:
+            self._messages.append(("WARN", message))
+
+    def log(self):
+        """
+        logs and drops the collected messages, to be called from the thread running the keyword
+        """
+        with self._lock:
+            messages, self._messages = self._messages, []
+        for level, message in messages:
+            BuiltIn().log(message, level=level)
+
+
+class Tracer:
+    """
+    traces api responses
+
+    Nothing is done while TRACE is disabled. A response is only traced if it differs from the previous
+    response of the same endpoint and it is truncated to ``max_length`` characters. With a ``sink`` file
+    the full responses are written as json lines to this file instead of the robot framework log.
+    Responses traced by worker threads are kept until the keyword thread traces or calls ``flush``.
+    """
+
+    def __init__(self, max_length: int = 2000, sink: str = None, only_changes: bool = True, max_endpoints: int = 1024):
+        """
+        :param max_length: maximum length of a traced response in the log, 0 for unlimited
+        :param sink: path of a json lines file receiving the full responses (optional)
+        :param only_changes: skip responses which equal the previous response of the endpoint
+        :param max_endpoints: number of endpoints whose previous response is remembered
+        """
+        self.max_length = max_length
+        self.sink = sink
+        self.only_changes = only_changes
+        self.max_endpoints = max_endpoints
+        self._previous = OrderedDict()
+        self._pending = Messages()
+        self._lock = threading.Lock()
+
+    def _changed(self, endpoint: str, obj) -> bool:
+        if not self.only_changes or endpoint is None:
+            return True
+        with self._lock:
+            previous = self._previous.get(endpoint, self)
+            self._previous[endpoint] = obj
+            self._previous.move_to_end(endpoint)
+            while len(self._previous) > self.max_endpoints:
+                self._previous.popitem(last=False)
+        return previous is not obj and previous != obj
+
+    def truncate(self, message: str) -> str:
+        if self.max_length and len(message) > self.max_length:
+            return f"{message[:self.max_length]}... ({len(message)} characters, truncated)"
+        return message
+
+    def _write_sink(self, endpoint: str, obj):
+        line = json.dumps({'time': time.time(), 'endpoint': endpoint, 'response': obj}, default=str)
+        with self._lock:
+            with open(self.sink, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    def __call__(self, obj, endpoint: str = None):
+        """
+        traces the response of an endpoint
+
+        :param obj: the response
+        :param endpoint: name of the endpoint, responses are compared per endpoint
+
+        :return: the response
+        """
+        if self.sink is None and not trace_enabled():
+            return obj
+        if not self._changed(endpoint, obj):
+            return obj
+        if self.sink is not None:
+            self._write_sink(endpoint, obj)
+        else:
+            message = self.truncate(str(obj))
+            message = message if endpoint is None else f"{endpoint}: {message}"
+            if in_logging_thread():
+                self.flush()
+                trace(message)
+            else:
+                self._pending.trace(message)
+        return obj
+
+    def flush(self):
+        """
+        logs the responses traced by worker threads, does nothing outside of the keyword thread
+        """
+        if in_logging_thread():
+            self._pending.log()
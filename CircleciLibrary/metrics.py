@@ -0,0 +1,261 @@
+import json
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError
+from CircleciLibrary.log import info
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SCOPES = ('run', 'test', 'keyword')
+
+_VERSION = re.compile(r'/v\d+(?:\.\d+)?(?=/|$)')
+_SLUG = re.compile(r'/project/[^/]+/[^/]+/[^/]+')
+_ID = re.compile(r'/(?:[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|\d+)(?=/|$)')
+
+
+def endpoint(url: str) -> str:
+    """
+    :return: the path of an api url with ids and project slugs as placeholders, e.g. ``/v2/pipeline/{id}/workflow``,
+        ``{download}`` for urls outside of the api like artifacts
+    """
+    path = urlsplit(url).path
+    match = _VERSION.search(path)
+    if match is None:
+        return '{download}'
+    path = _SLUG.sub('/project/{slug}', path[match.start():])
+    return _ID.sub('/{id}', path)
+
+
+class _Series:
+    """calls, errors, bytes, retries and latency histogram of one keyword, method, endpoint and status"""
+    __slots__ = ('calls', 'seconds', 'bytes', 'retries', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.retries = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def add(self, seconds: float, size: int, retries: int):
+        self.calls += 1
+        self.seconds += seconds
+        self.bytes += size
+        self.retries += retries
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+
+class ApiMetrics:
+    """
+    records every http request of the library session
+
+    The requests are aggregated by calling keyword, method, endpoint and status, once for the whole run,
+    once for the current test and once for the current keyword. The keyword is set by the
+    ``MetricsListener``; requests outside of a robot framework keyword have an empty keyword.
+    """
+
+    def __init__(self):
+        self.keyword = None
+        self._scopes = {scope: {} for scope in SCOPES}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, url: str, response, seconds: float, stream: bool = False):
+        """
+        records a response as received from the network, the size of a streamed response is taken from its
+        ``Content-Length``
+        """
+        if stream:
+            size = int(response.headers.get('Content-Length') or 0)
+        else:
+            size = len(response.content or b'')
+        retries = getattr(getattr(response.raw, 'retries', None), 'history', None) or ()
+        self.record(method, url, response.status_code, seconds, size, len(retries))
+
+    def record(self, method: str, url: str, status, seconds: float, size: int = 0, retries: int = 0):
+        """
+        :param method: http method
+        :param url: requested url
+        :param status: http status code or ``error`` if the request failed without response
+        :param seconds: latency of the request
+        :param size: size of the response body in bytes
+        :param retries: number of retries of the request
+        """
+        key = (self.keyword or '', method.upper(), endpoint(url), str(status))
+        with self._lock:
+            for series in self._scopes.values():
+                entry = series.get(key)
+                if entry is None:
+                    entry = series[key] = _Series()
+                entry.add(seconds, size, retries)
+
+    def take(self, scope: str) -> dict:
+        """
+        :param scope: ``test`` or ``keyword``
+        :return: the summary of the scope, which starts from scratch afterwards
+        """
+        with self._lock:
+            series = self._scopes[scope]
+            self._scopes[scope] = {}
+        return self._summary(series)
+
+    def summary(self) -> dict:
+        """
+        :return: the summary of the whole run
+        """
+        with self._lock:
+            return self._summary(self._scopes['run'])
+
+    @staticmethod
+    def _summary(series: dict) -> dict:
+        endpoints = {}
+        for (_, method, path, _), s in series.items():
+            endpoints[f"{method} {path}"] = endpoints.get(f"{method} {path}", 0) + s.calls
+        return {
+            'calls': sum(s.calls for s in series.values()),
+            'errors': sum(s.calls for k, s in series.items() if not k[3].startswith(('2', '3'))),
+            'retries': sum(s.retries for s in series.values()),
+            'bytes': sum(s.bytes for s in series.values()),
+            'seconds': round(sum(s.seconds for s in series.values()), 6),
+            'endpoints': endpoints
+        }
+
+    def series(self) -> list:
+        """
+        :return: the series of the whole run as dicts with the labels, counters and latency histogram
+        """
+        with self._lock:
+            items = list(self._scopes['run'].items())
+        return [{
+            'keyword': keyword,
+            'method': method,
+            'endpoint': path,
+            'status': status,
+            'calls': s.calls,
+            'seconds': round(s.seconds, 6),
+            'bytes': s.bytes,
+            'retries': s.retries,
+            'buckets': dict(zip((str(b) for b in LATENCY_BUCKETS), s.buckets))
+        } for (keyword, method, path, status), s in sorted(items)]
+
+    def prometheus(self) -> str:
+        """
+        :return: the run metrics in the prometheus text exposition format
+        """
+        lines = []
+        series = self.series()
+
+        def metric(name: str, kind: str, doc: str, value):
+            lines.append(f"# HELP {name} {doc}")
+            lines.append(f"# TYPE {name} {kind}")
+            for s in series:
+                lines.append(f"{name}{{{_labels(s)}}} {value(s)}")
+
+        metric('circleci_api_requests_total', 'counter', 'api requests of the library', lambda s: s['calls'])
+        metric('circleci_api_response_bytes_total', 'counter', 'received response bytes', lambda s: s['bytes'])
+        metric('circleci_api_retries_total', 'counter', 'retried api requests', lambda s: s['retries'])
+        name = 'circleci_api_request_duration_seconds'
+        lines.append(f"# HELP {name} latency of the api requests")
+        lines.append(f"# TYPE {name} histogram")
+        for s in series:
+            cumulative = 0
+            for bound, count in s['buckets'].items():
+                cumulative += count
+                lines.append(f"{name}_bucket{{{_labels(s)},le=\"{bound}\"}} {cumulative}")
+            lines.append(f"{name}_bucket{{{_labels(s)},le=\"+Inf\"}} {s['calls']}")
+            lines.append(f"{name}_sum{{{_labels(s)}}} {s['seconds']}")
+            lines.append(f"{name}_count{{{_labels(s)}}} {s['calls']}")
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(series: dict) -> str:
+    def escape(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{k}="{escape(series[k])}"' for k in ('keyword', 'method', 'endpoint', 'status'))
+
+
+def _write(path: str, text: str):
+    """writes the file atomically, a textfile collector never reads a partial file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class MetricsListener:
+    """
+    robot framework listener of the library which attributes the api requests to the library keywords
+
+    Every library keyword logs the api requests it made. The summaries of the tests and the series of the
+    whole run are written to a json report and, optionally, to a prometheus textfile at the end of the run.
+    The keywords are recognized by the name the library instance is imported with, e.g. ``WITH NAME``.
+    """
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def __init__(self, metrics: ApiMetrics, report: str = None, textfile: str = None, library=None):
+        """
+        :param metrics: metrics of the library session
+        :param report: path of the json report (optional)
+        :param textfile: path of the prometheus textfile (optional)
+        :param library: the library instance whose keywords are measured
+        """
+        self.metrics = metrics
+        self.report = report
+        self.textfile = textfile
+        self.library = library
+        self.tests = {}
+        self._depth = 0
+        self._name = None
+
+    def _library_name(self) -> str:
+        if self._name is None:
+            try:
+                libraries = BuiltIn().get_library_instance(all=True)
+            except RobotNotRunningError:
+                return type(self.library).__name__
+            self._name = next((name for name, lib in libraries.items() if lib is self.library), None)
+        return self._name
+
+    def start_suite(self, name, attrs):
+        # a suite may import the library under another name
+        self._name = None
+
+    def start_test(self, name, attrs):
+        self.metrics.take('test')
+
+    def end_test(self, name, attrs):
+        self.tests[attrs['longname']] = self.metrics.take('test')
+
+    def start_keyword(self, name, attrs):
+        if self._depth or attrs.get('libname') == self._library_name():
+            if self._depth == 0:
+                self.metrics.keyword = attrs['kwname']
+                self.metrics.take('keyword')
+            self._depth += 1
+
+    def end_keyword(self, name, attrs):
+        if not self._depth:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            self.metrics.keyword = None
+            summary = self.metrics.take('keyword')
+            if summary['calls']:
+                info(f"{summary['calls']} api calls in {summary['seconds'] * 1000:.0f} ms, "
+                     f"{summary['retries']} retries, {summary['bytes']} bytes: "
+                     f"{', '.join(f'{e} {n}x' for e, n in summary['endpoints'].items())}")
+
+    def close(self):
+        if self.report:
+            _write(self.report, json.dumps({
+                'summary': self.metrics.summary(),
+                'tests': self.tests,
+                'series': self.metrics.series()
+            }, indent=2))
+        if self.textfile:
+            _write(self.textfile, self.metrics.prometheus())
@@ -1,11 +1,85 @@
-from dataclasses import dataclass
+import re
+from collections import Counter
 from datetime import datetime
 from enum import Enum, unique
 
+_FRACTION = re.compile(r'^(.*T\d\d:\d\d:\d\d)(?:\.(\d+))?(.*)$')
 
-@dataclass
-class Project:
+
+def parse_datetime(dt_str: str) -> datetime:
+    """
+    parses an ISO-8601 timestamp of the circleci api, with or without fractional seconds
+
+    :param dt_str: timestamp like ``2021-05-21T13:44:31.668Z`` or ``2021-05-21T14:39:08Z``
+
+    :return: timezone aware datetime or None
+    """
+    if dt_str is None:
+        return None
+    if dt_str.endswith('Z'):
+        dt_str = dt_str[:-1] + '+00:00'
+    try:
+        return datetime.fromisoformat(dt_str)
+    except ValueError:
+        # python < 3.11 only accepts 3 or 6 fractional digits
+        match = _FRACTION.match(dt_str)
+        if match is None or match.group(2) is None:
+            raise
+        return datetime.fromisoformat(f"{match.group(1)}.{match.group(2)[:6].ljust(6, '0')}{match.group(3)}")
+
+
+class _Lazy:
+    """
+    model field which is decoded from the raw json of the model on first access
+
+    The decoded value is stored in the slot ``_<name>``; an unset slot means "not decoded yet".
+    """
+
+    def __init__(self, key: str, decode):
+        self.key = key
+        self.decode = decode
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.slot = getattr(owner, f"_{name}")
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        try:
+            return self.slot.__get__(obj, owner)
+        except AttributeError:
+            value = self.decode(obj._json.get(self.key))
+            self.slot.__set__(obj, value)
+            return value
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+
+
+class _Model:
+    """base of the slotted models: field based equality and representation"""
+    __slots__ = ()
+    _fields = ()
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, f) for f in self._fields)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __repr__(self):
+        fields = ', '.join(f"{f}={getattr(self, f)!r}" for f in self._fields)
+        return f"{self.__class__.__qualname__}({fields})"
+
+
+class Project(_Model):
     """circleci project"""
+    __slots__ = ('vcs_type', 'username', 'reponame')
+    _fields = ('username', 'reponame', 'vcs_type')
+
     @staticmethod
     def from_json(d: dict):
         return Project(
@@ -14,91 +88,86 @@ class Project:
             reponame=d['reponame']
         )
 
-    username: str
-    reponame: str
-    vcs_type: str
-
     def __init__(self, vcs_type: str, username: str, reponame: str):
         self.vcs_type = vcs_type
         self.username = username
         self.reponame = reponame
 
+    @property
+    def slug(self) -> str:
+        """project slug ``vcs_type/username/reponame`` of the v2 api"""
+        return f"{self.vcs_type}/{self.username}/{self.reponame}"
 
-@dataclass
-class Pipeline:
+    def __hash__(self):
+        return hash(self._values())
+
+
+class Pipeline(_Model):
     """circleci pipeline object"""
-    @staticmethod
-    def parse_datetime(dt_str: str) -> datetime:
-        if dt_str is None:
-            return None
-        return datetime.strptime(dt_str, '%Y-%m-%dT%H:%M:%S.%f%z')
+    __slots__ = ('id', 'number', 'state', '_json', '_created_at', '_updated_at', '_errors', '_vcs', '_trigger_parameters')
+    _fields = ('id', 'number', 'state', 'created_at', 'updated_at', 'errors', 'vcs', 'trigger_parameters')
 
-    @dataclass
-    class Error:
+    parse_datetime = staticmethod(parse_datetime)
+
+    class Error(_Model):
         """error information of a pipeline"""
+        __slots__ = ('type', 'message')
+        _fields = ('type', 'message')
+
         @staticmethod
         def from_json(d: dict):
             return Pipeline.Error(d['type'], d['message'])
 
-        type: str
-        message: str
-
         def __init__(self, error_type: str, message: str):
             self.type = error_type
             self.message = message
 
-    @dataclass
-    class Vcs:
+    class Vcs(_Model):
         """vcs information of a pipeline"""
+        __slots__ = ('provider_name', 'target_repository_url', 'branch', 'tag', 'revision')
+        _fields = ('provider_name', 'target_repository_url', 'branch', 'tag', 'revision')
+
         @staticmethod
         def from_json(d: dict):
             return Pipeline.Vcs(
                 provider_name=d['provider_name'],
                 target_repository_url=d['target_repository_url'],
                 branch=d.get('branch'),
-                tag=d.get('tag')
+                tag=d.get('tag'),
+                revision=d.get('revision')
             )
 
-        provider_name: str
-        target_repository_url: str
-        branch: str
-        tag: str
+        def __init__(
+                self,
+                provider_name: str,
+                target_repository_url: str,
+                branch: str = None,
+                tag: str = None,
+                revision: str = None
+        ):
+            self.provider_name = provider_name
+            self.target_repository_url = target_repository_url
+            self.branch = branch
+            self.tag = tag
+            self.revision = revision
 
-    def __int__(
-            self,
-            provider_name: str,
-            target_repository_url: str,
-            branch: str,
-            tag: str
-    ):
-        self.provider_name = provider_name
-        self.target_repository_url = target_repository_url
-        self.branch = branch
-        self.tag = tag
+    created_at = _Lazy('created_at', parse_datetime)
+    updated_at = _Lazy('updated_at', parse_datetime)
+    errors = _Lazy('errors', lambda errors: [Pipeline.Error.from_json(e) for e in errors or []])
+    vcs = _Lazy('vcs', lambda vcs: Pipeline.Vcs.from_json(vcs) if vcs is not None else None)
+    trigger_parameters = _Lazy('trigger_parameters', lambda parameters: parameters or {})
 
     @staticmethod
     def from_json(d: dict):
-        created = Pipeline.parse_datetime(d['created_at'])
-        updated_at = Pipeline.parse_datetime(d.get('updated_at'))
-        errors = [Pipeline.Error.from_json(j) for j in d.get('errors', [])]
-        vcs = Pipeline.Vcs.from_json(d['vcs']) if 'vcs' in d.keys() else None
-        return Pipeline(
-            pipeline_id=d['id'],
-            number=d['number'],
-            state=d['state'],
-            created_at=created,
-            updated_at=updated_at,
-            errors=errors,
-            vcs=vcs
-        )
-
-    id: str
-    number: int
-    state: str
-    created_at: datetime
-    updated_at: datetime
-    errors: list[Error]
-    vcs: Vcs
+        """
+        decodes a pipeline, rarely read fields are decoded on first access
+        """
+        pipeline = Pipeline.__new__(Pipeline)
+        pipeline.id = d['id']
+        pipeline.number = d['number']
+        pipeline.state = d['state']
+        pipeline._json = d
+        return pipeline
 
     def __init__(
             self,
@@ -107,21 +176,35 @@ class Pipeline:
             state: str,
             created_at: datetime,
             updated_at: datetime,
-            errors: list[Error],
-            vcs: Vcs
+            errors: list,
+            vcs: Vcs,
+            trigger_parameters: dict = None
     ):
         self.number = number
         self.state = state
         self.id = pipeline_id
+        self._json = None
         self.created_at = created_at
         self.updated_at = updated_at
         self.errors = errors
         self.vcs = vcs
+        self.trigger_parameters = trigger_parameters or {}
 
+    def __hash__(self):
+        return hash(self.id)
 
-@dataclass
-class Workflow:
+
+class Workflow(_Model):
     """circleci workflow object"""
+    __slots__ = (
+        'id', 'name', 'pipeline_id', 'pipeline_number', 'project_slug', 'status', 'started_by',
+        '_json', '_created_at', '_stopped_at'
+    )
+    _fields = (
+        'id', 'name', 'pipeline_id', 'pipeline_number', 'project_slug', 'status',
+        'started_by', 'created_at', 'stopped_at'
+    )
+
     @unique
     class Status(Enum):
         """status which a circleci workflow could have"""
@@ -135,36 +218,24 @@ class Workflow:
         CANCELLED = 'canceled'
         UNAUTHORIZED = 'unauthorized'
 
-    id: str
-    name: str
-    pipeline_id: str
-    pipeline_number: str
-    project_slug: str
-    status: Status
-    started_by: str
-    created_at: datetime
-    stopped_at: datetime
+    created_at = _Lazy('created_at', parse_datetime)
+    stopped_at = _Lazy('stopped_at', parse_datetime)
 
     @staticmethod
     def from_json(d: dict):
-        def parse_datetime(dt_str: str):
-            if dt_str is None:
-                return None
-            return datetime.strptime(dt_str, '%Y-%m-%dT%H:%M:%S%z')
-
-        created = parse_datetime(d['created_at'])
-        stopped = parse_datetime(d['stopped_at'])
-        return Workflow(
-            workflow_id=d['id'],
-            name=d['name'],
-            pipeline_id=d['pipeline_id'],
-            pipeline_number=d['pipeline_number'],
-            project_slug=d['project_slug'],
-            status=Workflow.Status(d['status']),
-            started_by=d['started_by'],
-            created_at=created,
-            stopped_at=stopped
-        )
+        """
+        decodes a workflow, the timestamps are decoded on first access
+        """
+        workflow = Workflow.__new__(Workflow)
+        workflow.id = d['id']
+        workflow.name = d['name']
+        workflow.pipeline_id = d['pipeline_id']
+        workflow.pipeline_number = d['pipeline_number']
+        workflow.project_slug = d['project_slug']
+        workflow.status = _STATUS.get(d['status']) or Workflow.Status(d['status'])
+        workflow.started_by = d['started_by']
+        workflow._json = d
+        return workflow
 
     def __init__(
             self,
@@ -185,34 +256,244 @@ class Workflow:
         self.project_slug = project_slug
         self.status = status
         self.started_by = started_by
+        self._json = None
         self.created_at = created_at
         self.stopped_at = stopped_at
 
     def in_progress(self) -> bool:
-        return self.stopped_at is None
+        try:
+            return self._stopped_at is None
+        except AttributeError:
+            return self._json.get('stopped_at') is None
+
+
+_STATUS = {s.value: s for s in Workflow.Status}
+
+FAILURE_STATUSES = frozenset({
+    Workflow.Status.FAILED,
+    Workflow.Status.FAILING,
+    Workflow.Status.ERROR,
+    Workflow.Status.UNAUTHORIZED
+})
+
+
+class Job(_Model):
+    """circleci job of a workflow"""
+    __slots__ = ('id', 'name', 'job_number', 'project_slug', 'status', 'type', '_json', '_started_at', '_stopped_at')
+    _fields = ('id', 'name', 'job_number', 'project_slug', 'status', 'type', 'started_at', 'stopped_at')
+
+    started_at = _Lazy('started_at', parse_datetime)
+    stopped_at = _Lazy('stopped_at', parse_datetime)
+
+    @staticmethod
+    def from_json(d: dict):
+        """
+        decodes a job, the timestamps are decoded on first access
+        """
+        job = Job.__new__(Job)
+        job.id = d['id']
+        job.name = d['name']
+        job.job_number = d.get('job_number')
+        job.project_slug = d['project_slug']
+        job.status = d['status']
+        job.type = d.get('type')
+        job._json = d
+        return job
+
+    def __init__(
+            self,
+            job_id: str,
+            name: str,
+            job_number: int,
+            project_slug: str,
+            status: str,
+            job_type: str = 'build',
+            started_at: datetime = None,
+            stopped_at: datetime = None
+    ):
+        self.id = job_id
+        self.name = name
+        self.job_number = job_number
+        self.project_slug = project_slug
+        self.status = status
+        self.type = job_type
+        self._json = None
+        self.started_at = started_at
+        self.stopped_at = stopped_at
+
+
+def _status_value(status) -> str:
+    return getattr(status, 'value', status)
+
+
+class Transition(_Model):
+    """status change of a workflow between two polls, ``previous`` is None for a new workflow"""
+    __slots__ = ('workflow', 'previous')
+    _fields = ('workflow', 'previous')
+
+    def __init__(self, workflow: Workflow, previous: Workflow.Status = None):
+        self.workflow = workflow
+        self.previous = previous
+
+    @property
+    def current(self) -> Workflow.Status:
+        return self.workflow.status
+
+    def __str__(self):
+        previous = _status_value(self.previous) if self.previous is not None else 'new'
+        return f"{self.workflow.name}: {previous} -> {_status_value(self.current)}"
 
 
 class WorkflowList(list[Workflow]):
-    """a list of circleci workflow objects"""
+    """
+    a list of circleci workflow objects
+
+    The list keeps the number of workflows per status, the number of running workflows and an index
+    by workflow id up to date on every change, so status checks do not iterate over the workflows.
+    """
+    def __init__(self, workflows=()):
+        super().__init__(workflows)
+        self._reindex()
+
+    def __reduce__(self):
+        return WorkflowList, (list(self),)
+
     @staticmethod
     def from_list(l: list):
-        wl = WorkflowList()
-        wl.extend(l)
-        return wl
+        return WorkflowList(l)
+
+    def _reindex(self):
+        self._counts = Counter()
+        self._running = 0
+        self._by_id = {}
+        for w in self:
+            self._added(w)
+
+    def _added(self, w: Workflow):
+        self._counts[w.status] += 1
+        self._running += w.in_progress()
+        self._by_id[w.id] = w
+
+    def _removed(self, w: Workflow):
+        self._counts[w.status] -= 1
+        self._running -= w.in_progress()
+        if self._by_id.get(w.id) is w:
+            del self._by_id[w.id]
+
+    def append(self, w: Workflow):
+        super().append(w)
+        self._added(w)
+
+    def extend(self, workflows):
+        workflows = list(workflows)
+        super().extend(workflows)
+        for w in workflows:
+            self._added(w)
+
+    def __iadd__(self, workflows):
+        self.extend(workflows)
+        return self
+
+    def insert(self, index, w: Workflow):
+        super().insert(index, w)
+        self._added(w)
+
+    def pop(self, index=-1) -> Workflow:
+        w = super().pop(index)
+        self._removed(w)
+        return w
+
+    def remove(self, w: Workflow):
+        super().remove(w)
+        self._reindex()
+
+    def clear(self):
+        super().clear()
+        self._reindex()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._reindex()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._reindex()
+
+    def get(self, workflow_id: str) -> Workflow:
+        """
+        :return: the workflow with the given id or None
+        """
+        return self._by_id.get(workflow_id)
+
+    def status_counts(self) -> dict:
+        """
+        :return: number of workflows per status value
+        """
+        return {_status_value(status): n for status, n in self._counts.items() if n}
+
+    def merge(self, workflows) -> list:
+        """
+        merges the workflows of a fresh poll into this list
+
+        Known workflows are replaced by their fresh state, new workflows (e.g. reruns) are appended.
+
+        :param workflows: workflows of the fresh poll
+        :return: the ``Transition`` of every new workflow and every workflow whose status changed
+        """
+        positions = {w.id: i for i, w in enumerate(self)} if len(self) else {}
+        transitions = []
+        for w in workflows:
+            old = self._by_id.get(w.id)
+            if old is None:
+                self.append(w)
+                transitions.append(Transition(w))
+                continue
+            if old is not w:
+                self._removed(old)
+                super().__setitem__(positions[w.id], w)
+                self._added(w)
+            if old.status != w.status:
+                transitions.append(Transition(w, old.status))
+        return transitions
 
     def completed(self) -> bool:
         """
         :return: True if all workflows of this pipeline are complete
         """
-        if len(self) == 0:
-            return False
-        in_progress = [w for w in self if w.in_progress()]
-        return len(in_progress) == 0
+        return len(self) > 0 and self._running == 0
+
+    def failed(self) -> bool:
+        """
+        :return: True if at least one workflow failed or is failing
+        """
+        return any(self._counts[s] for s in FAILURE_STATUSES)
 
     def overall_status(self, status: Workflow.Status):
         """
         :param status: desired status
         :return: True if all workflows have the given status
         """
-        success_workflows = [w for w in self if w.status == status]
-        return len(self) == len(success_workflows)
+        return self._counts[status] == len(self)
+
+
+class Artifact(_Model):
+    """artifact of a circleci job"""
+    __slots__ = ('path', 'url', 'node_index', 'job_number', 'project_slug')
+    _fields = ('path', 'url', 'node_index', 'job_number', 'project_slug')
+
+    @staticmethod
+    def from_json(d: dict, job_number: int = None, project_slug: str = None):
+        return Artifact(
+            path=d['path'],
+            url=d['url'],
+            node_index=d.get('node_index', 0),
+            job_number=job_number,
+            project_slug=project_slug
+        )
+
+    def __init__(self, path: str, url: str, node_index: int = 0, job_number: int = None, project_slug: str = None):
+        self.path = path
+        self.url = url
+        self.node_index = node_index
+        self.job_number = job_number
+        self.project_slug = project_slug
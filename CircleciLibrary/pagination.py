@@ -0,0 +1,50 @@
+from concurrent.futures import Executor
+
+
+def page_items(response) -> tuple:
+    """
+    splits a response of a paginated v2 endpoint
+
+    :param response: a dict with ``items`` and ``next_page_token`` or a plain list of items
+
+    :return: tuple of the items and the token of the next page (None on the last page)
+    """
+    if isinstance(response, list):
+        return response, None
+    if isinstance(response, dict):
+        return response['items'], response.get('next_page_token')
+    raise RuntimeError(f"list or dict expected for the response: {response}")
+
+
+def paginate(fetch_page, executor: Executor = None, on_page=None):
+    """
+    streams the items of a paginated endpoint
+
+    While the items of a page are consumed, the next page is already fetched in the background
+    if an executor is given. Closing the generator early skips all further pages.
+
+    :param fetch_page: function returning ``(items, next_page_token)`` for a page token (None for the first page)
+    :param executor: executor for prefetching the next page (optional)
+    :param on_page: function called by the consuming thread after it received a prefetched page (optional)
+
+    :return: generator of the items of all pages
+    """
+    pending = None
+    try:
+        items, token = fetch_page(None)
+        while True:
+            if token and executor is not None:
+                pending = executor.submit(fetch_page, token)
+            yield from items
+            if not token:
+                return
+            if pending is not None:
+                items, token = pending.result()
+                pending = None
+                if on_page is not None:
+                    on_page()
+            else:
+                items, token = fetch_page(token)
+    finally:
+        if pending is not None:
+            pending.cancel()
@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+
+
+class PollTimeoutError(Exception):
+    """
+    this exception will be raised if a poll did not reach its goal within the timeout
+    """
+
+
+class Backoff:
+    """exponential backoff schedule with jitter and an upper cap"""
+
+    def __init__(
+            self,
+            initial: float = 1.0,
+            maximum: float = 30.0,
+            factor: float = 2.0,
+            jitter: float = 0.2,
+            rng=random.random
+    ):
+        """
+        :param initial: first delay in seconds
+        :param maximum: upper cap for a single delay in seconds
+        :param factor: growth factor between two delays
+        :param jitter: relative random deviation of a delay (0.2 means +/- 20%)
+        :param rng: random number generator returning floats in [0, 1)
+        """
+        if initial < 0 or maximum < 0:
+            raise ValueError("backoff delays must not be negative")
+        if factor < 1:
+            raise ValueError(f"backoff factor must be >= 1, got {factor}")
+        if not 0 <= jitter <= 1:
+            raise ValueError(f"backoff jitter must be between 0 and 1, got {jitter}")
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+        self._rng = rng
+
+    def __iter__(self):
+        delay = min(self.initial, self.maximum)
+        while True:
+            spread = delay * self.jitter
+            yield max(0.0, delay - spread + 2 * spread * self._rng())
+            delay = min(delay * self.factor, self.maximum)
+
+
+class PollResult:
+    """result of a poll: the last value and how much it cost to get it"""
+    __slots__ = ('value', 'calls', 'elapsed')
+
+    def __init__(self, value, calls: int, elapsed: float):
+        self.value = value
+        self.calls = calls
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return f"PollResult(value={self.value!r}, calls={self.calls}, elapsed={self.elapsed:.3f})"
+
+
+class RequestCount:
+    """thread safe number of the api requests sent for one wait, the polls may run on several threads"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self, requests: int = 1):
+        with self._lock:
+            self.value += requests
+
+
+class VirtualClock:
+    """
+    clock whose ``sleep`` returns at once and only advances the time, e.g. to replay recorded polls
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += max(seconds, 0.0)
+
+
+def poll(fetch, done, timeout: float, backoff: Backoff, sleep=None, clock=None, schedule=None) -> PollResult:
+    """
+    calls ``fetch`` until ``done(value)`` is true, sleeping according to ``backoff`` in between
+
+    :param fetch: callable returning the current value
+    :param done: predicate deciding whether the value is final
+    :param timeout: total time budget in seconds
+    :param backoff: delay schedule between two calls
+    :param sleep: sleep function (default: time.sleep)
+    :param clock: monotonic clock (default: time.monotonic)
+    :param schedule: function of the last value and the backoff delay returning the actual delay (optional)
+
+    :return: PollResult with the final value
+
+    :raise: PollTimeoutError if the timeout expired, the last result is attached as ``result``
+    """
+    sleep = sleep or time.sleep
+    clock = clock or time.monotonic
+    start = clock()
+    deadline = start + timeout
+    calls = 0
+    for delay in backoff:
+        value = fetch()
+        calls += 1
+        now = clock()
+        if done(value):
+            return PollResult(value, calls, now - start)
+        if now >= deadline:
+            error = PollTimeoutError(f"no final result after {calls} calls in {now - start:.1f}s")
+            error.result = PollResult(value, calls, now - start)
+            raise error
+        if schedule is not None:
+            delay = schedule(value, delay)
+        sleep(min(delay, deadline - now))
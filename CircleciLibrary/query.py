@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+from itertools import islice
+from CircleciLibrary.model import Pipeline, parse_datetime
+
+
+def to_datetime(value) -> datetime:
+    """
+    :param value: datetime or ISO-8601 string like ``2021-05-21``, ``2021-05-21 13:44:31`` or ``2021-05-21T13:44:31Z``
+
+    :return: timezone aware datetime, UTC if no timezone is given, or None
+    """
+    if value is None or value == '':
+        return None
+    dt = value if isinstance(value, datetime) else parse_datetime(str(value).strip())
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def _lookup(parameters: dict, path: str):
+    value = parameters
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def _same(actual, expected) -> bool:
+    return actual == expected or (actual is not None and str(actual).lower() == str(expected).lower())
+
+
+class PipelineQuery:
+    """
+    filter of the pipeline history of a project
+
+    The pipelines of a project are listed newest first, so a query with ``created_after`` ends the scan
+    at the first older pipeline.
+    """
+
+    def __init__(
+            self,
+            branch: str = None,
+            tag: str = None,
+            state: str = None,
+            created_after=None,
+            created_before=None,
+            parameters: dict = None,
+            revision: str = None
+    ):
+        """
+        :param branch: vcs branch, sent to the api as filter
+        :param tag: vcs tag
+        :param state: pipeline state, e.g. ``created`` or ``errored``
+        :param created_after: only pipelines created at or after this time
+        :param created_before: only pipelines created before this time
+        :param parameters: trigger parameters the pipeline must have, nested keys are joined with dots
+            like ``git.branch``
+        :param revision: commit sha or its prefix
+        """
+        self.branch = branch or None
+        self.tag = tag or None
+        self.state = state or None
+        self.created_after = to_datetime(created_after)
+        self.created_before = to_datetime(created_before)
+        self.parameters = parameters or {}
+        self.revision = revision or None
+
+    def matches(self, pipeline: Pipeline) -> bool:
+        """
+        :return: True if the pipeline passes all filters
+        """
+        if self.state is not None and pipeline.state != self.state:
+            return False
+        if self.created_after is not None or self.created_before is not None:
+            created_at = pipeline.created_at
+            if self.created_after is not None and created_at < self.created_after:
+                return False
+            if self.created_before is not None and created_at >= self.created_before:
+                return False
+        if self.branch is not None or self.tag is not None or self.revision is not None:
+            vcs = pipeline.vcs
+            if vcs is None:
+                return False
+            if self.branch is not None and vcs.branch != self.branch:
+                return False
+            if self.tag is not None and vcs.tag != self.tag:
+                return False
+            if self.revision is not None and not (vcs.revision or '').startswith(self.revision):
+                return False
+        parameters = pipeline.trigger_parameters if self.parameters else None
+        return all(_same(_lookup(parameters, k), v) for k, v in self.parameters.items())
+
+    def exhausted(self, pipeline: Pipeline) -> bool:
+        """
+        :return: True if this and all older pipelines are before ``created_after``
+        """
+        return self.created_after is not None and pipeline.created_at < self.created_after
+
+    def select(self, pipelines, limit: int = None):
+        """
+        :param pipelines: pipelines, newest first
+        :param limit: maximum number of selected pipelines (default: all)
+
+        :return: generator of the matching pipelines, it stops consuming ``pipelines`` when it is done
+        """
+        def matching():
+            for pipeline in pipelines:
+                if self.exhausted(pipeline):
+                    return
+                if self.matches(pipeline):
+                    yield pipeline
+
+        return islice(matching(), limit) if limit else matching()
@@ -0,0 +1,85 @@
+import heapq
+import threading
+from collections import Counter
+
+FAILED_RESULTS = frozenset({'failure', 'failed', 'error'})
+
+
+class TestResultSummary:
+    """
+    compact aggregate of the test metadata of many jobs
+
+    Test results are folded in as they arrive, only the counters, the slowest tests and the names of
+    the failing tests are kept.
+    """
+    __test__ = False
+
+    def __init__(self, slowest: int = 10):
+        """
+        :param slowest: number of slowest tests to keep
+        """
+        self.slowest_limit = slowest
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._slowest = []
+        self._failing = []
+        self._jobs = set()
+        self.total = 0
+        self.run_time = 0.0
+
+    @staticmethod
+    def test_name(item: dict) -> str:
+        classname = item.get('classname')
+        return f"{classname}.{item['name']}" if classname else item['name']
+
+    def add(self, job_key, job_name: str, items):
+        """
+        folds the test results of a job into the summary
+
+        :param job_key: unique key of the job like its project slug and job number, jobs are counted by it
+        :param job_name: label of the job in the failing and slowest tests
+        :param items: iterable of test metadata items of the v2 api
+        """
+        counts = Counter()
+        slowest = []
+        failing = []
+        run_time = 0.0
+        for item in items:
+            result = item.get('result') or 'unknown'
+            counts[result] += 1
+            seconds = float(item.get('run_time') or 0.0)
+            run_time += seconds
+            entry = (seconds, self.test_name(item), job_name)
+            if len(slowest) < self.slowest_limit:
+                heapq.heappush(slowest, entry)
+            elif self.slowest_limit:
+                heapq.heappushpop(slowest, entry)
+            if result in FAILED_RESULTS:
+                failing.append(f"{job_name}: {self.test_name(item)}")
+        with self._lock:
+            self._jobs.add(job_key)
+            self._counts.update(counts)
+            self.total += sum(counts.values())
+            self.run_time += run_time
+            self._failing.extend(failing)
+            for entry in slowest:
+                if len(self._slowest) < self.slowest_limit:
+                    heapq.heappush(self._slowest, entry)
+                else:
+                    heapq.heappushpop(self._slowest, entry)
+
+    def to_dict(self) -> dict:
+        """
+        :return: dict with ``total``, ``jobs``, ``run_time``, ``counts`` by result, ``failed``,
+            the ``failing`` test names and the ``slowest`` tests as ``(run_time, name, job)``
+        """
+        with self._lock:
+            return {
+                'total': self.total,
+                'jobs': len(self._jobs),
+                'run_time': round(self.run_time, 3),
+                'counts': dict(self._counts),
+                'failed': sum(self._counts[r] for r in FAILED_RESULTS),
+                'failing': sorted(self._failing),
+                'slowest': sorted(self._slowest, reverse=True)
+            }
@@ -0,0 +1,127 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class _Poll:
+    __slots__ = ('fetch', 'future')
+
+    def __init__(self, fetch):
+        self.fetch = fetch
+        self.future = Future()
+
+
+class PollScheduler:
+    """
+    one background scheduler for the polls of all waiting keywords
+
+    The next poll of every key, e.g. the workflows of a pipeline, is kept in a priority queue ordered by its
+    due time. All requests for a key which arrive before its poll completed share this one poll, and a key is
+    polled at most once per ``min_interval``. The api traffic therefore grows with the number of distinct
+    pipelines, not with the number of waiters.
+    """
+
+    def __init__(self, min_interval: float, workers: int = 8, clock=time.monotonic, max_keys: int = 4096):
+        """
+        :param min_interval: minimum seconds between the start of two polls of the same key
+        :param workers: number of threads executing the polls
+        :param max_keys: number of keys whose last poll time is remembered
+        """
+        self.min_interval = min_interval
+        self.max_keys = max_keys
+        self._clock = clock
+        self._heap = []
+        self._sequence = itertools.count()
+        self._pending = {}
+        self._last = {}
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='circleci-poll',
+            initializer=self._mark_worker
+        )
+        self._thread = None
+        self._closed = False
+
+    def _mark_worker(self):
+        self._local.worker = True
+
+    def in_scheduler(self) -> bool:
+        """
+        :return: True if the current thread executes a poll
+        """
+        return getattr(self._local, 'worker', False)
+
+    def request(self, key, fetch) -> Future:
+        """
+        :param key: key of the polled resource
+        :param fetch: function which polls the resource, used if no poll of the key is pending
+
+        :return: future of the next poll of the key
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("the poll scheduler is closed")
+            poll = self._pending.get(key)
+            if poll is not None:
+                return poll.future
+            poll = self._pending[key] = _Poll(fetch)
+            due = self._last.get(key, float('-inf')) + self.min_interval
+            heapq.heappush(self._heap, (due, next(self._sequence), key))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='circleci-scheduler', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+            return poll.future
+
+    def poll(self, key, fetch):
+        """
+        :return: the result of the next poll of the key, blocks until it is available
+        """
+        return self.request(key, fetch).result()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        return
+                    now = self._clock()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    self._condition.wait(self._heap[0][0] - now if self._heap else None)
+                _, _, key = heapq.heappop(self._heap)
+                poll = self._pending[key]
+                self._last[key] = now
+                if len(self._last) > self.max_keys:
+                    self._last = {k: t for k, t in self._last.items() if now - t < self.min_interval}
+            self._executor.submit(self._execute, key, poll)
+
+    def _execute(self, key, poll: _Poll):
+        try:
+            value = poll.fetch()
+        except BaseException as e:
+            with self._condition:
+                del self._pending[key]
+            poll.future.set_exception(e)
+            return
+        with self._condition:
+            del self._pending[key]
+        poll.future.set_result(value)
+
+    def close(self):
+        """
+        stops the scheduler, pending polls are cancelled
+        """
+        with self._condition:
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._heap.clear()
+            self._condition.notify()
+        for poll in pending:
+            poll.future.cancel()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,161 @@
+import re
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
+from CircleciLibrary.cache import ResponseCache
+from CircleciLibrary.metrics import ApiMetrics
+from CircleciLibrary.cassette import Cassette, RecordingAdapter, ReplayAdapter
+
+RETRY_STATUS = (408, 429, 500, 502, 503, 504, 520, 521, 522, 523, 524)
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+CACHEABLE_URL = re.compile(r'/v2/(pipeline|workflow)/')
+
+
+class TokenBucket:
+    """
+    client side rate limiter: ``rate`` requests per second with bursts of up to ``capacity`` requests
+
+    ``acquire`` blocks until a token is available, so concurrent callers slow down instead of
+    running into the rate limit of the server.
+    """
+
+    def __init__(self, rate: float, capacity: int = None, clock=time.monotonic, sleep=time.sleep):
+        """
+        :param rate: tokens added per second
+        :param capacity: maximum number of tokens (default: one second worth of tokens, at least 1)
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be > 0, got {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """
+        takes one token, waiting for it if the bucket is empty
+
+        :return: the time waited in seconds
+        """
+        wait = self._reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class CircleciSession(requests.Session):
+    """
+    requests session of the library with an optional client side rate limit
+
+    With a response cache, pipeline and workflow reads are sent as conditional requests. With metrics,
+    every request is recorded; the time waiting for the rate limiter is not part of its latency.
+    """
+
+    def __init__(
+            self,
+            rate_limiter: TokenBucket = None,
+            response_cache: ResponseCache = None,
+            metrics: ApiMetrics = None
+    ):
+        super().__init__()
+        self.rate_limiter = rate_limiter
+        self.response_cache = response_cache
+        self.metrics = metrics
+
+    def request(self, method, url, *args, **kwargs):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        if self.response_cache is None or method.upper() != 'GET' or not CACHEABLE_URL.search(url):
+            return self._send(method, url, *args, **kwargs)
+        key = (url, tuple(sorted((kwargs.get('params') or {}).items())))
+        headers = dict(kwargs.pop('headers', None) or {})
+        headers.update(ResponseCache.conditional_headers(self.response_cache.get(key)))
+        response = self._send(method, url, *args, headers=headers, **kwargs)
+        self.response_cache.update(key, response)
+        return response
+
+    def _send(self, method, url, *args, **kwargs):
+        # measured before the response cache replaces the empty body of a 304
+        if self.metrics is None:
+            return super().request(method, url, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except Exception:
+            self.metrics.record(method, url, 'error', time.perf_counter() - start)
+            raise
+        self.metrics.observe(method, url, response, time.perf_counter() - start, stream=kwargs.get('stream', False))
+        return response
+
+
+def create_session(
+        pool_size: int = 10,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 60.0,
+        rate_limit: float = None,
+        rate_burst: int = None,
+        response_cache: ResponseCache = None,
+        metrics: ApiMetrics = None,
+        cassette: Cassette = None
+) -> CircleciSession:
+    """
+    creates a pooled keep-alive session which retries idempotent requests
+
+    Failed ``GET`` requests are retried with exponential backoff on connection errors, 429 and 5xx.
+    A ``Retry-After`` header of the server takes precedence over the backoff.
+
+    :param pool_size: number of kept alive connections per host
+    :param max_retries: maximum number of retries of a request
+    :param backoff_factor: backoff factor between two retries in seconds
+    :param backoff_max: upper cap of the backoff in seconds (urllib3 >= 2 only)
+    :param rate_limit: maximum requests per second of this session (default: unlimited)
+    :param rate_burst: maximum burst of requests of the rate limit (default: one second worth of requests)
+    :param response_cache: cache for conditional pipeline and workflow reads (default: no cache)
+    :param metrics: recorder of all requests (default: no metrics)
+    :param cassette: records the responses to or, without any network access, replays them from
+        this cassette (default: live requests)
+
+    :return: the session
+    """
+    retry_options = dict(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=IDEMPOTENT_METHODS,
+        raise_on_redirect=False,
+        raise_on_status=False,
+        respect_retry_after_header=True
+    )
+    try:
+        retry = Retry(backoff_max=backoff_max, **retry_options)
+    except TypeError:
+        # urllib3 < 2 has a fixed backoff cap
+        retry = Retry(**retry_options)
+    if cassette is not None and cassette.mode == 'replay':
+        adapter = ReplayAdapter(cassette)
+        # replayed responses are served instantly, there is no server to protect
+        rate_limit = None
+    elif cassette is not None:
+        adapter = RecordingAdapter(cassette, pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    else:
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = CircleciSession(TokenBucket(rate_limit, rate_burst) if rate_limit else None, response_cache, metrics)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
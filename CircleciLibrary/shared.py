@@ -0,0 +1,217 @@
+import atexit
+import json
+import os
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS entries ("
+    " key TEXT PRIMARY KEY, value BLOB, fetched_at REAL NOT NULL DEFAULT 0,"
+    " lease_until REAL NOT NULL DEFAULT 0, owner TEXT)",
+    "CREATE TABLE IF NOT EXISTS clients (owner TEXT PRIMARY KEY, host TEXT NOT NULL, pid INTEGER NOT NULL)"
+)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SharedStore:
+    """
+    sqlite file which shares decoded api results between the processes of a run, e.g. pabot workers
+
+    A value is fetched by exactly one process: the first process which finds no fresh value takes a lease
+    on the key, calls the api and stores the pickled result. Other processes wait for the result instead
+    of calling the api themselves. An expired lease, e.g. of a crashed process, is taken over.
+
+    Every process registers as a client of the store. The last client which closes the store, at the
+    latest when its interpreter exits, deletes the file.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            lease: float = 30.0,
+            wait_interval: float = 0.05,
+            clock=time.time,
+            sleep=time.sleep
+    ):
+        """
+        :param path: path of the sqlite file, created if missing
+        :param lease: seconds a process may take to refresh a value before others take over
+        :param wait_interval: seconds between two checks for a value refreshed by another process
+        """
+        self.path = path
+        self.lease = lease
+        self.wait_interval = wait_interval
+        self._clock = clock
+        self._sleep = sleep
+        self._owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._closed = False
+        with self._transaction() as db:
+            for statement in _SCHEMA:
+                db.execute(statement)
+            db.execute(
+                "INSERT OR REPLACE INTO clients (owner, host, pid) VALUES (?, ?, ?)",
+                (self._owner, socket.gethostname(), os.getpid())
+            )
+        atexit.register(self.close)
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            with self._lock:
+                self._connections.append(db)
+        return db
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def get_or_refresh(self, key: str, freshness: float, fetch):
+        """
+        :param key: key of the value, e.g. ``workflows/<pipeline id>``
+        :param freshness: maximum age in seconds of a stored value
+        :param fetch: function which fetches the value if it is missing or stale
+
+        :return: the stored or fetched value
+        """
+        while True:
+            now = self._clock()
+            with self._transaction() as db:
+                row = db.execute(
+                    "SELECT value, fetched_at, lease_until, owner FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[0] is not None and now - row[1] < freshness:
+                    return pickle.loads(row[0])
+                if row is None or row[2] <= now or row[3] == self._owner:
+                    db.execute(
+                        "INSERT INTO entries (key, lease_until, owner) VALUES (?, ?, ?) "
+                        "ON CONFLICT (key) DO UPDATE SET lease_until = excluded.lease_until, owner = excluded.owner",
+                        (key, now + self.lease, self._owner)
+                    )
+                    break
+            self._sleep(self.wait_interval)
+        try:
+            value = fetch()
+        except BaseException:
+            with self._transaction() as db:
+                db.execute("UPDATE entries SET lease_until = 0 WHERE key = ? AND owner = ?", (key, self._owner))
+            raise
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE entries SET value = ?, fetched_at = ?, lease_until = 0 WHERE key = ?",
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._clock(), key)
+            )
+        return value
+
+    def close(self):
+        """
+        unregisters this process, the last client deletes the store
+        """
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        host = socket.gethostname()
+        with self._transaction() as db:
+            db.execute("DELETE FROM clients WHERE owner = ?", (self._owner,))
+            for owner, pid in db.execute("SELECT owner, pid FROM clients WHERE host = ?", (host,)).fetchall():
+                if not _alive(pid):
+                    db.execute("DELETE FROM clients WHERE owner = ?", (owner,))
+            last = db.execute("SELECT COUNT(*) FROM clients").fetchone()[0] == 0
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        if last:
+            for suffix in ('', '-wal', '-shm'):
+                try:
+                    os.remove(self.path + suffix)
+                except FileNotFoundError:
+                    pass
+
+
+class TriggerRegistry:
+    """
+    de-duplicates pipeline triggers
+
+    The first caller of a key triggers, concurrent callers wait for it and later callers within the window
+    get the same result. Threads are serialized by a lock per key, processes by the optional ``SharedStore``.
+    """
+
+    def __init__(self, store: SharedStore = None, clock=time.monotonic):
+        """
+        :param store: store which shares the triggered pipelines with other processes (optional)
+        """
+        self.store = store
+        self._clock = clock
+        self._triggered = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(project_slug: str, branch: str, tag: str, parameters: dict) -> str:
+        """
+        :return: stable key of a trigger, independent of the order of the parameters
+        """
+        return json.dumps([project_slug, branch, tag, parameters or {}], sort_keys=True, default=str)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def trigger(self, key: str, window: float, func):
+        """
+        :param key: key of the trigger
+        :param window: seconds in which a trigger of the same key returns the first result
+        :param func: function which triggers the pipeline
+
+        :return: the result of ``func``, of this or of an earlier call
+        """
+        with self._key_lock(key):
+            now = self._clock()
+            triggered = self._triggered.get(key)
+            if triggered is not None and now - triggered[0] < window:
+                return triggered[1]
+            if self.store is not None:
+                value = self.store.get_or_refresh(f"trigger/{key}", window, func)
+            else:
+                value = func()
+            with self._lock:
+                self._triggered = {k: t for k, t in self._triggered.items() if now - t[0] < window}
+                self._triggered[key] = (now, value)
+            return value
+
+
+class _Transaction:
+    """``BEGIN IMMEDIATE`` transaction, serializes the writers of all processes"""
+
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute("ROLLBACK" if exc_type is not None else "COMMIT")
@@ -0,0 +1,239 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SIGNATURE_HEADER = 'circleci-signature'
+WORKFLOW_COMPLETED = 'workflow-completed'
+JOB_COMPLETED = 'job-completed'
+
+
+def sign(secret: str, body: bytes) -> str:
+    """
+    :return: the ``circleci-signature`` header value of a webhook body
+    """
+    return 'v1=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: str, body: bytes, header: str) -> bool:
+    """
+    :param secret: secret of the webhook
+    :param body: raw request body
+    :param header: value of the ``circleci-signature`` header like ``v1=<hex>``, several versions are
+        separated by commas
+
+    :return: True if one v1 signature of the header matches the body
+    """
+    expected = sign(secret, body)
+    return any(hmac.compare_digest(expected, s.strip()) for s in (header or '').split(','))
+
+
+class Subscription:
+    """
+    interest of one waiting keyword in the workflow events of a pipeline
+
+    ``sleep`` and ``wait`` return early when an event of the pipeline arrived since the previous call;
+    ``woken`` tells whether the last one did so.
+    """
+
+    def __init__(self, receiver: 'WebhookReceiver', pipeline_id: str):
+        self._receiver = receiver
+        self.pipeline_id = pipeline_id
+        self._seen = receiver._subscribe(pipeline_id)
+        self.woken = False
+
+    def _future(self):
+        future = Future()
+        if not self._receiver._add_waiter(self.pipeline_id, self._seen, future):
+            future.set_result(None)
+        return future
+
+    def _done(self, future: Future):
+        self._receiver._remove_waiter(self.pipeline_id, future)
+        self._seen, self.woken = self._receiver._generation(self.pipeline_id, self._seen)
+
+    def sleep(self, seconds: float):
+        """
+        blocks for ``seconds`` or until a workflow event of the pipeline arrives
+        """
+        future = self._future()
+        try:
+            future.result(max(seconds, 0.0))
+        except FutureTimeoutError:
+            pass
+        self._done(future)
+
+    async def wait(self, seconds: float):
+        """
+        asynchronous counterpart of ``sleep``
+        """
+        future = self._future()
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(future), max(seconds, 0.0))
+        except asyncio.TimeoutError:
+            pass
+        self._done(future)
+
+    def close(self):
+        self._receiver._unsubscribe(self.pipeline_id)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _reject(self, status: int):
+        self.close_connection = True
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+    def do_POST(self):
+        header = self.headers.get('Content-Length')
+        if header is None:
+            self._reject(411)
+            return
+        try:
+            length = int(header)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._reject(400)
+            return
+        if length > self.server.receiver.max_body:
+            self._reject(413)
+            return
+        body = self.rfile.read(length)
+        status = self.server.receiver.receive(body, self.headers.get(SIGNATURE_HEADER))
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookReceiver:
+    """
+    embedded http server receiving the ``workflow-completed`` and ``job-completed`` webhooks of circleci
+
+    Requests without a valid ``Content-Length`` or with a body above ``max_body`` are rejected before the
+    body is read, events with a wrong signature with 401. A ``workflow-completed`` event wakes all
+    subscriptions of its pipeline; ``job-completed`` events are accepted and counted only.
+    """
+
+    def __init__(self, secret: str, host: str = '127.0.0.1', port: int = 0, max_body: int = 1 << 20):
+        """
+        :param secret: secret of the circleci webhook
+        :param host: interface to listen on
+        :param port: port to listen on, 0 picks a free port
+        :param max_body: maximum size of an event in bytes
+        """
+        if not secret:
+            raise ValueError("the webhook receiver requires a secret")
+        self._secret = secret
+        self.max_body = max_body
+        self.events = Counter()
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._subscribers = Counter()
+        self._waiters = {}
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.receiver = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name='circleci-webhooks', daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self) -> str:
+        """
+        local url of the receiver, the loopback address if it listens on all interfaces
+        """
+        host, port = self._server.server_address[:2]
+        if host in ('0.0.0.0', ''):
+            host = '127.0.0.1'
+        return f"http://{host}:{port}/"
+
+    def receive(self, body: bytes, signature: str) -> int:
+        """
+        handles the body of one webhook request
+
+        :return: the http status of the response
+        """
+        if not verify_signature(self._secret, body, signature):
+            self.events['rejected'] += 1
+            return 401
+        try:
+            event = json.loads(body)
+            event_type = event['type']
+        except (ValueError, TypeError, KeyError):
+            self.events['invalid'] += 1
+            return 400
+        self.events[event_type] += 1
+        if event_type == WORKFLOW_COMPLETED:
+            pipeline_id = (event.get('pipeline') or {}).get('id')
+            if pipeline_id:
+                self.notify(pipeline_id)
+        return 204
+
+    def notify(self, pipeline_id: str):
+        """
+        wakes all subscriptions of the pipeline
+        """
+        with self._lock:
+            if pipeline_id not in self._generations:
+                return
+            self._generations[pipeline_id] += 1
+            waiters = self._waiters.pop(pipeline_id, ())
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
+
+    def subscribe(self, pipeline_id: str) -> Subscription:
+        """
+        :return: a subscription to the workflow events of the pipeline, close it when the wait ended
+        """
+        return Subscription(self, pipeline_id)
+
+    def _subscribe(self, pipeline_id: str) -> int:
+        with self._lock:
+            self._subscribers[pipeline_id] += 1
+            return self._generations.setdefault(pipeline_id, 0)
+
+    def _unsubscribe(self, pipeline_id: str):
+        with self._lock:
+            self._subscribers[pipeline_id] -= 1
+            if self._subscribers[pipeline_id] <= 0:
+                del self._subscribers[pipeline_id]
+                self._generations.pop(pipeline_id, None)
+
+    def _add_waiter(self, pipeline_id: str, seen: int, future: Future) -> bool:
+        with self._lock:
+            if self._generations.get(pipeline_id, seen) != seen:
+                return False
+            self._waiters.setdefault(pipeline_id, set()).add(future)
+            return True
+
+    def _remove_waiter(self, pipeline_id: str, future: Future):
+        with self._lock:
+            waiters = self._waiters.get(pipeline_id)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del self._waiters[pipeline_id]
+
+    def _generation(self, pipeline_id: str, seen: int) -> tuple:
+        with self._lock:
+            current = self._generations.get(pipeline_id, seen)
+        return current, current != seen
+
+    def close(self):
+        """
+        stops the http server
+        """
+        self._server.shutdown()
+        self._server.server_close()
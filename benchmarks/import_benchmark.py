@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+startup cost of the library in fresh interpreters: importing robot framework, importing the library,
+constructing it like a pabot worker or libdoc does and building the api client on the first keyword
+
+    python3 benchmarks/import_benchmark.py [--rounds 20]
+
+Every stage is measured in its own interpreter, the reported time of a stage excludes the stages before it.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from os.path import abspath, dirname, join
+
+ROOT = join(dirname(abspath(__file__)), '..')
+
+STAGES = (
+    ('import robot', "import robot.api.deco"),
+    ('import CircleciLibrary', "import CircleciLibrary"),
+    ('CircleciLibrary()', "c = CircleciLibrary.CircleciLibrary('token')"),
+    ('first keyword', "c.api")
+)
+
+SCRIPT = """
+import time
+{setup}
+setup = time.perf_counter()
+{stage}
+print(time.perf_counter() - setup)
+"""
+
+
+def measure(setup: str, stage: str) -> float:
+    code = SCRIPT.format(setup=setup, stage=stage)
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'stage':<24} {'p50 ms':>8} {'min ms':>8}")
+    for i, (name, stage) in enumerate(STAGES):
+        setup = '\n'.join(code for _, code in STAGES[:i])
+        timings = [measure(setup, stage) * 1000 for _ in range(args.rounds)]
+        print(f"{name:<24} {statistics.median(timings):>8.1f} {min(timings):>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
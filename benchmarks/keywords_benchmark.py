@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+api calls, keyword latency, cpu time and peak memory of triggering and waiting for 1, 10 and 500 pipelines
+against the local circleci api simulator of the tests
+
+    python3 benchmarks/keywords_benchmark.py [--backend async] [--sizes 1 10 500] [--latency 0.02]
+
+The simulator runs in a separate process, the cpu time is the one of the library only.
+"""
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from os.path import abspath, dirname, join
+
+sys.path.insert(0, join(dirname(abspath(__file__)), '..'))
+sys.path.insert(0, join(dirname(abspath(__file__)), '..', 'tests'))
+
+from CircleciLibrary import CircleciLibrary  # noqa: E402
+from CircleciLibrary.model import Project  # noqa: E402
+from simulator import Simulator  # noqa: E402
+
+PROJECT = Project('github', 'org', 'repo')
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, round(p / 100 * (len(values) - 1)))]
+
+
+def run_round(circleci: CircleciLibrary, size: int, interval: str) -> dict:
+    timings = {}
+    start = time.perf_counter()
+    pipelines = circleci.trigger_pipelines([PROJECT] * size)
+    timings['Trigger Pipelines'] = time.perf_counter() - start
+    start = time.perf_counter()
+    circleci.wait_for_pipelines(pipelines, initial_interval=interval, max_interval=interval)
+    timings['Wait For Pipelines'] = time.perf_counter() - start
+    return timings
+
+
+def bench(size: int, rounds: int, backend: str, latency: float, polls: int, interval: str):
+    script = ('running',) * polls + ('success',)
+    with Simulator(process=True, script=script, workflows=2, latency=latency) as simulator:
+        circleci = CircleciLibrary(
+            'token',
+            base_url=simulator.base_url,
+            backend=backend,
+            max_concurrency=min(size, 64),
+            pool_size=min(size, 64)
+        )
+        timings = {}
+        requests = simulator.statistics()['requests']
+        cpu = time.process_time()
+        for _ in range(rounds):
+            for name, seconds in run_round(circleci, size, interval).items():
+                timings.setdefault(name, []).append(seconds)
+        cpu = (time.process_time() - cpu) / rounds
+        calls = (simulator.statistics()['requests'] - requests) / rounds
+        tracemalloc.start()
+        run_round(circleci, size, interval)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    for name, values in timings.items():
+        print(f"{size:>5} pipelines  {name:<20} p50 {percentile(values, 50) * 1000:9.1f} ms"
+              f"  p95 {percentile(values, 95) * 1000:9.1f} ms")
+    print(f"{size:>5} pipelines  {'per round':<20} {calls:9.0f} api calls  {cpu * 1000:9.1f} ms cpu"
+          f"  {peak / 1024 / 1024:7.1f} MiB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=CircleciLibrary.BACKENDS, default='sync')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 500])
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds the simulator delays every response')
+    parser.add_argument('--polls', type=int, default=3, help='polls until the workflows of a pipeline succeed')
+    parser.add_argument('--interval', default='50ms', help='poll interval of the wait keywords')
+    args = parser.parse_args()
+    for size in args.sizes:
+        bench(size, args.rounds, args.backend, args.latency, args.polls, args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+decode cost of 1,000 workflows and pipelines before and after the lazy, slotted model
+
+    python3 benchmarks/model_benchmark.py
+"""
+import sys
+import timeit
+from datetime import datetime
+from os.path import abspath, dirname, join
+
+sys.path.insert(0, join(dirname(abspath(__file__)), '..'))
+
+from CircleciLibrary.model import Pipeline, Workflow  # noqa: E402
+
+WORKFLOWS = [{
+    'pipeline_id': 'E57868E8-9533-4625-AD83-F2AB2ABB70BD',
+    'id': f'0A3EF846-8A63-4851-98E2-{i:012d}',
+    'name': 'build',
+    'project_slug': 'gh/trustedshops/circleci_api_test_dummy',
+    'status': 'success' if i % 2 else 'running',
+    'started_by': 'DA2E42D1-DD08-4D4F-9E78-1B0C3C4D3183',
+    'pipeline_number': i,
+    'created_at': '2021-05-21T14:39:08Z',
+    'stopped_at': '2021-05-21T14:40:08Z' if i % 2 else None
+} for i in range(1000)]
+
+PIPELINES = [{
+    'id': f'E57868E8-9533-4625-AD83-{i:012d}',
+    'errors': [],
+    'project_slug': 'gh/trustedshops/circleci_api_test_dummy',
+    'updated_at': '2021-05-21T13:44:31.668Z',
+    'number': i,
+    'state': 'created',
+    'created_at': '2021-05-21T13:44:31.668Z',
+    'vcs': {
+        'target_repository_url': 'https://github.com/trustedshops/robotframework_circleci_test_dummy',
+        'provider_name': 'GitHub',
+        'branch': 'main'
+    }
+} for i in range(1000)]
+
+
+def legacy_workflow(d: dict) -> tuple:
+    """the eager decoding of the former dataclass model"""
+    def parse(dt_str):
+        return None if dt_str is None else datetime.strptime(dt_str, '%Y-%m-%dT%H:%M:%S%z')
+    return (d['id'], d['name'], d['pipeline_id'], d['pipeline_number'], d['project_slug'],
+            Workflow.Status(d['status']), d['started_by'], parse(d['created_at']), parse(d['stopped_at']))
+
+
+def legacy_pipeline(d: dict) -> tuple:
+    """the eager decoding of the former dataclass model"""
+    def parse(dt_str):
+        return None if dt_str is None else datetime.strptime(dt_str, '%Y-%m-%dT%H:%M:%S.%f%z')
+    vcs = d['vcs']
+    return (d['id'], d['number'], d['state'], parse(d['created_at']), parse(d.get('updated_at')),
+            [(e['type'], e['message']) for e in d.get('errors', [])],
+            (vcs['provider_name'], vcs['target_repository_url'], vcs.get('branch'), vcs.get('tag')))
+
+
+def bench(name: str, func, repeat: int = 5, number: int = 20):
+    best = min(timeit.repeat(func, repeat=repeat, number=number)) / number
+    print(f"{name:<45} {best * 1000:8.3f} ms / 1,000")
+
+
+def main():
+    bench("workflows before (eager strptime)", lambda: [legacy_workflow(w) for w in WORKFLOWS])
+    bench("workflows after (lazy)", lambda: [Workflow.from_json(w) for w in WORKFLOWS])
+    bench("workflows after + completion check", lambda: [Workflow.from_json(w).in_progress() for w in WORKFLOWS])
+    bench("workflows after + all fields read", lambda: [Workflow.from_json(w)._values() for w in WORKFLOWS])
+    bench("pipelines before (eager strptime)", lambda: [legacy_pipeline(p) for p in PIPELINES])
+    bench("pipelines after (lazy)", lambda: [Pipeline.from_json(p) for p in PIPELINES])
+    bench("pipelines after + all fields read", lambda: [Pipeline.from_json(p)._values() for p in PIPELINES])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import threading
+from unittest import TestCase
+from CircleciLibrary.aio import AsyncBackend
+from CircleciLibrary.polling import Backoff, PollTimeoutError
+
+
+class AsyncBackendUnitTest(TestCase):
+    def setUp(self):
+        self.backend = AsyncBackend(workers=2)
+
+    def tearDown(self):
+        self.backend.close()
+
+    def test_poll(self):
+        values = iter([1, 2, 3])
+        result = self.backend.run(self.backend.poll(lambda: next(values), lambda v: v == 3, timeout=5,
+                                                    backoff=Backoff(initial=0.001, jitter=0)))
+        self.assertEqual(3, result.value)
+        self.assertEqual(3, result.calls)
+
+    def test_poll_timeout(self):
+        with self.assertRaises(PollTimeoutError) as ctx:
+            self.backend.run(self.backend.poll(lambda: 0, lambda v: False, timeout=0.01,
+                                               backoff=Backoff(initial=0.001, jitter=0)))
+        self.assertGreater(ctx.exception.result.calls, 1)
+
+    def test_gather_bounds_the_concurrency(self):
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def work(i):
+            with lock:
+                running.append(i)
+                peak.append(len(running))
+            with lock:
+                running.remove(i)
+            return i * 2
+
+        async def item(i):
+            return await self.backend.call(work, i)
+
+        self.assertEqual([i * 2 for i in range(50)], self.backend.run(self.backend.gather(item, range(50), 5)))
+        self.assertLessEqual(max(peak), 2)
+
+    def test_gather_raises_the_first_error(self):
+        async def item(i):
+            if i % 2:
+                raise ValueError(i)
+            return i
+
+        with self.assertRaises(ValueError) as ctx:
+            self.backend.run(self.backend.gather(item, range(4), 4))
+        self.assertEqual((1,), ctx.exception.args)
+
+    def test_call_sync_runs_directly_inside_the_backend(self):
+        self.assertEqual('circleci-loop', self.backend.run(self._thread_name()))
+        self.assertTrue(self.backend.call_sync(threading.current_thread).name.startswith('circleci-io'))
+        nested = self.backend.call_sync(lambda: self.backend.call_sync(threading.current_thread))
+        self.assertTrue(nested.name.startswith('circleci-io'))
+
+    async def _thread_name(self):
+        return threading.current_thread().name
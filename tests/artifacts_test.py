@@ -0,0 +1,155 @@
+import gzip
+import json
+import os
+import re
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from CircleciLibrary import CircleciLibrary
+from CircleciLibrary.artifacts import ArtifactSizeError, artifact_target, download
+from CircleciLibrary.model import Pipeline
+
+REPORT = bytes(range(256)) * 400
+
+
+class ArtifactHandler(BaseHTTPRequestHandler):
+    """serves the workflows, jobs and artifacts of pipeline P1 and the artifact files with range support"""
+    ranges = []
+    truncate = False
+
+    def _json(self, data):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _file(self, head=False):
+        type(self).ranges.append(self.headers.get('Range'))
+        match = re.match(r'bytes=(\d+)-', self.headers.get('Range') or '')
+        start = int(match.group(1)) if match else 0
+        if start >= len(REPORT) and match:
+            self.send_response(416)
+            self.send_header('Content-Range', f"bytes */{len(REPORT)}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = REPORT[start:]
+        self.send_response(206 if match else 200)
+        if match:
+            self.send_header('Content-Range', f"bytes {start}-{len(REPORT) - 1}/{len(REPORT)}")
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body[:100] if type(self).truncate else body)
+
+    def do_HEAD(self):
+        self._file(head=True)
+
+    def do_GET(self):
+        host = f"http://127.0.0.1:{self.server.server_port}"
+        path = self.path.split('?')[0]
+        if path == '/api/v2/pipeline/P1/workflow':
+            return self._json({'items': [{
+                'pipeline_id': 'P1', 'id': 'W1', 'name': 'build', 'project_slug': 'gh/org/repo', 'status': 'success',
+                'started_by': 'U1', 'pipeline_number': 1, 'created_at': '2021-05-21T14:39:08Z',
+                'stopped_at': '2021-05-21T14:40:08Z'
+            }], 'next_page_token': None})
+        if path == '/api/v2/workflow/W1/job':
+            return self._json({'items': [
+                {'id': f'J{n}', 'name': f'job{n}', 'job_number': n, 'project_slug': 'gh/org/repo',
+                 'status': 'success', 'type': 'build'} for n in (1, 2)
+            ] + [{'id': 'A1', 'name': 'approve', 'project_slug': 'gh/org/repo', 'status': 'success', 'type': 'approval'}],
+                'next_page_token': None})
+        match = re.match(r'/api/v2/project/gh/org/repo/(\d+)/artifacts', path)
+        if match:
+            n = match.group(1)
+            return self._json({'items': [
+                {'path': f'reports/junit-{n}.xml', 'url': f'{host}/files/{n}/junit.xml', 'node_index': 0},
+                {'path': f'logs/build-{n}.log', 'url': f'{host}/files/{n}/build.log', 'node_index': 0}
+            ], 'next_page_token': None})
+        if path.startswith('/files/'):
+            return self._file()
+        self.send_error(404)
+
+    def log_message(self, *args):
+        pass
+
+
+class ArtifactsTest(TestCase):
+    def setUp(self):
+        ArtifactHandler.ranges = []
+        ArtifactHandler.truncate = False
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ArtifactHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.circleci = CircleciLibrary("TOKEN", base_url=f"http://127.0.0.1:{self.server.server_port}/api")
+        self.pipeline = Pipeline(pipeline_id='P1', number=1, state="", created_at=None, updated_at=None, errors=[], vcs=None)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get_artifacts_of_all_jobs(self):
+        artifacts = self.circleci.get_artifacts(self.pipeline)
+        self.assertEqual(4, len(artifacts))
+        junit = self.circleci.get_artifacts(self.pipeline, pattern='reports/*.xml')
+        self.assertEqual(['reports/junit-1.xml', 'reports/junit-2.xml'], sorted(a.path for a in junit))
+        self.assertEqual({1, 2}, {a.job_number for a in junit})
+
+    def test_download_artifacts(self):
+        summary = self.circleci.download_artifacts(self.pipeline, self.directory.name, pattern='reports/*')
+        self.assertEqual(2, summary['files'])
+        self.assertEqual(2 * len(REPORT), summary['bytes'])
+        with open(os.path.join(self.directory.name, '1', 'reports', 'junit-1.xml'), 'rb') as f:
+            self.assertEqual(REPORT, f.read())
+
+        # complete files are skipped
+        summary = self.circleci.download_artifacts(self.pipeline, self.directory.name, pattern='reports/*')
+        self.assertEqual(2, summary['skipped'])
+        self.assertEqual(0, summary['bytes'])
+
+    def test_downloads_are_recorded_to_body_files(self):
+        cassette = os.path.join(self.directory.name, 'circleci.json.gz')
+        base_url = f"http://127.0.0.1:{self.server.server_port}/api"
+        recorder = CircleciLibrary("TOKEN", base_url=base_url, mode='record', cassette=cassette)
+        recorder.download_artifacts(self.pipeline, os.path.join(self.directory.name, 'recorded'), pattern='reports/*')
+        recorder._cassette.save()
+        with gzip.open(cassette, 'rt') as f:
+            responses = [i['response'] for i in json.load(f)['interactions']]
+        self.assertEqual(2, sum('body_file' in r for r in responses))
+        self.assertLess(max(len(r['body'] or '') for r in responses), len(REPORT))
+
+        player = CircleciLibrary("TOKEN", base_url=base_url, mode='replay', cassette=cassette)
+        summary = player.download_artifacts(self.pipeline, os.path.join(self.directory.name, 'replayed'), pattern='reports/*')
+        self.assertEqual(2 * len(REPORT), summary['bytes'])
+        with open(os.path.join(self.directory.name, 'replayed', '2', 'reports', 'junit-2.xml'), 'rb') as f:
+            self.assertEqual(REPORT, f.read())
+
+    def test_partial_download_is_resumed(self):
+        target = artifact_target(self.directory.name, 1, 'junit.xml')
+        url = f"http://127.0.0.1:{self.server.server_port}/files/1/junit.xml"
+        os.makedirs(os.path.dirname(target))
+        with open(f"{target}.part", 'wb') as f:
+            f.write(REPORT[:1000])
+        downloaded, skipped = download(self.circleci.api._session, url, target, chunk_size=4096)
+        self.assertEqual((len(REPORT) - 1000, False), (downloaded, skipped))
+        self.assertEqual(['bytes=1000-'], ArtifactHandler.ranges)
+        with open(target, 'rb') as f:
+            self.assertEqual(REPORT, f.read())
+
+    def test_size_mismatch_is_detected(self):
+        ArtifactHandler.truncate = True
+        target = artifact_target(self.directory.name, 1, 'junit.xml')
+        url = f"http://127.0.0.1:{self.server.server_port}/files/1/junit.xml"
+        with self.assertRaises(ArtifactSizeError):
+            download(self.circleci.api._session, url, target, chunk_size=10)
+        self.assertFalse(os.path.exists(target))
+        self.assertEqual(100, os.path.getsize(f"{target}.part"))
+
+    def test_artifact_target_stays_in_the_directory(self):
+        self.assertEqual(os.path.join(os.path.abspath('out'), '3', 'a', 'b.txt'), artifact_target('out', 3, '/a/b.txt'))
+        self.assertRaises(ValueError, artifact_target, 'out', 3, '../../etc/passwd')
@@ -0,0 +1,98 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from CircleciLibrary import CircleciLibrary
+from CircleciLibrary.model import Pipeline
+
+
+WORKFLOWS = {
+    'items': [{
+        'pipeline_id': 'P1',
+        'id': 'W1',
+        'name': 'build',
+        'project_slug': 'gh/trustedshops/dummy',
+        'status': 'running',
+        'started_by': 'U1',
+        'pipeline_number': 1,
+        'created_at': '2021-05-21T14:39:08Z',
+        'stopped_at': None
+    }],
+    'next_page_token': None
+}
+
+
+class ConditionalHandler(BaseHTTPRequestHandler):
+    """serves workflows with an ETag for pipeline P1 and without validators for P2"""
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append((self.path, self.headers.get('If-None-Match')))
+        body = json.dumps(WORKFLOWS).encode()
+        if '/P1/' in self.path and self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if '/P1/' in self.path:
+            self.send_header('ETag', '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        ConditionalHandler.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ConditionalHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/api"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @staticmethod
+    def pipeline(pipeline_id):
+        return Pipeline(pipeline_id=pipeline_id, number=1, state="", created_at=None, updated_at=None, errors=[], vcs=None)
+
+    def test_not_modified_reuses_the_decoded_workflows(self):
+        circleci = CircleciLibrary("TOKEN", base_url=self.base_url)
+        first = circleci.get_workflows(self.pipeline('P1'))
+        second = circleci.get_workflows(self.pipeline('P1'))
+        self.assertIs(first, second)
+        self.assertEqual([None, '"v1"'], [r[1] for r in ConditionalHandler.requests])
+        statistics = circleci.get_response_cache_statistics()
+        self.assertEqual(1, statistics['not_modified'])
+        self.assertEqual(1, statistics['misses'])
+        self.assertEqual(1, statistics['decode_hits'])
+
+    def test_metrics_count_no_bytes_for_not_modified(self):
+        circleci = CircleciLibrary("TOKEN", base_url=self.base_url, api_metrics=True)
+        circleci.get_workflows(self.pipeline('P1'))
+        circleci.get_workflows(self.pipeline('P1'))
+        series = {s['status']: s for s in circleci._metrics.series()}
+        self.assertEqual(len(json.dumps(WORKFLOWS)), series['200']['bytes'])
+        self.assertEqual(1, series['304']['calls'])
+        self.assertEqual(0, series['304']['bytes'])
+
+    def test_unchanged_body_without_validators_is_recognized(self):
+        circleci = CircleciLibrary("TOKEN", base_url=self.base_url)
+        first = circleci.get_workflows(self.pipeline('P2'))
+        second = circleci.get_workflows(self.pipeline('P2'))
+        self.assertIs(first, second)
+        statistics = circleci.get_response_cache_statistics()
+        self.assertEqual(1, statistics['unchanged'])
+        self.assertEqual(0, statistics['not_modified'])
+
+    def test_cache_can_be_disabled(self):
+        circleci = CircleciLibrary("TOKEN", base_url=self.base_url, response_cache_size=0)
+        first = circleci.get_workflows(self.pipeline('P1'))
+        second = circleci.get_workflows(self.pipeline('P1'))
+        self.assertIsNot(first, second)
+        self.assertEqual([None, None], [r[1] for r in ConditionalHandler.requests])
+        self.assertNotIn('not_modified', circleci.get_response_cache_statistics())
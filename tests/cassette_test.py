@@ -0,0 +1,64 @@
+import os
+import tempfile
+import time
+from unittest import TestCase
+from unittest.mock import patch
+from CircleciLibrary import CircleciLibrary
+from CircleciLibrary.cassette import CassetteError
+from CircleciLibrary.model import Project
+from simulator import Simulator
+
+
+class CassetteTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cassette = os.path.join(self.directory.name, 'circleci.json.gz')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @staticmethod
+    def scenario(circleci: CircleciLibrary) -> list:
+        project = circleci.get_project('repo')
+        pipelines = circleci.trigger_pipelines([project, (project, 'refs/tags/1.0.0', {'deploy': True})])
+        waited = circleci.wait_for_pipelines(pipelines, initial_interval='50ms', max_interval='50ms')
+        jobs = circleci.get_workflow_jobs(waited[pipelines[0]][0])
+        return [repr(project), repr(pipelines), repr(list(waited.values())), repr(jobs)]
+
+    def test_replay_returns_the_recorded_results_without_waiting(self):
+        with Simulator(script=('running', 'running', 'running', 'success'), workflows=2) as simulator:
+            base_url = simulator.base_url
+            recorder = CircleciLibrary('token', base_url=base_url, mode='record', cassette=self.cassette)
+            recorded = self.scenario(recorder)
+            recorder._cassette.save()
+
+        for backend in CircleciLibrary.BACKENDS:
+            player = CircleciLibrary('token', base_url=base_url, mode='replay', cassette=self.cassette, backend=backend)
+            start = time.monotonic()
+            self.assertEqual(recorded, self.scenario(player))
+            self.assertLess(time.monotonic() - start, 0.15)
+
+    def test_unrecorded_requests_fail(self):
+        with Simulator() as simulator:
+            base_url = simulator.base_url
+            recorder = CircleciLibrary('token', base_url=base_url, mode='record', cassette=self.cassette)
+            recorder.get_projects()
+            recorder._cassette.save()
+        player = CircleciLibrary('token', base_url=base_url, mode='replay', cassette=self.cassette)
+        self.assertEqual(1, len(player.get_projects()))
+        with self.assertRaises(CassetteError):
+            player.trigger_pipeline(Project('github', 'org', 'repo'))
+
+    @patch('pycircleci.api.CIRCLE_TOKEN', None)
+    def test_replay_needs_no_token(self):
+        with Simulator() as simulator:
+            base_url = simulator.base_url
+            recorder = CircleciLibrary('token', base_url=base_url, mode='record', cassette=self.cassette)
+            recorder.get_projects()
+            recorder._cassette.save()
+        player = CircleciLibrary(base_url=base_url, mode='replay', cassette=self.cassette)
+        self.assertEqual(1, len(player.get_projects()))
+
+    def test_modes_are_validated(self):
+        self.assertRaises(ValueError, CircleciLibrary, 'token', mode='replay')
+        self.assertRaises(ValueError, CircleciLibrary, 'token', mode='offline', cassette=self.cassette)
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+from CircleciLibrary import CircleciLibrary
+from CircleciLibrary.history import DurationHistory
+from CircleciLibrary.model import Project, Workflow
+from simulator import Simulator
+
+START = datetime(2021, 5, 21, 14, 0, tzinfo=timezone.utc)
+
+
+def workflow(workflow_id: str, status: str = 'success', seconds: float = None, name: str = 'build') -> Workflow:
+    stopped_at = START + timedelta(seconds=seconds) if seconds is not None else None
+    return Workflow(workflow_id, name, 'P1', 1, 'gh/org/repo', Workflow.Status(status), 'U1', START, stopped_at)
+
+
+class DurationHistoryTest(TestCase):
+    def test_successful_workflows_are_recorded_once(self):
+        history = DurationHistory(min_samples=3)
+        workflows = [workflow('W1', seconds=60), workflow('W2', 'failed', 5), workflow('W3', 'running')]
+        self.assertEqual(1, history.record(workflows))
+        self.assertEqual(0, history.record(workflows))
+        self.assertIsNone(history.percentile('gh/org/repo', 'build', 50))
+        history.record([workflow('W4', seconds=120), workflow('W5', seconds=180)])
+        self.assertEqual(120, history.percentile('gh/org/repo', 'build', 50))
+        self.assertEqual(150, history.percentile('gh/org/repo', 'build', 75))
+
+    def test_only_the_last_samples_are_kept(self):
+        history = DurationHistory(max_samples=2, min_samples=1)
+        history.record([workflow(f"W{i}", seconds=i) for i in range(1, 6)])
+        self.assertEqual(4, history.percentile('gh/org/repo', 'build', 0))
+
+    def test_seed_spreads_the_insights_quantiles(self):
+        history = DurationHistory()
+        metrics = {'min': 60, 'median': 100, 'p95': 200, 'max': 400, 'mean': 110}
+        self.assertTrue(history.seed('gh/org/repo', 'build', metrics))
+        self.assertFalse(history.seed('gh/org/repo', 'deploy', {'median': 10}))
+        self.assertAlmostEqual(100, history.percentile('gh/org/repo', 'build', 50), delta=5)
+        self.assertEqual(60, history.percentile('gh/org/repo', 'build', 0))
+        self.assertEqual(400, history.percentile('gh/org/repo', 'build', 100))
+
+    def test_remaining_time_of_the_running_workflows(self):
+        history = DurationHistory(min_samples=1)
+        history.record([workflow('W1', seconds=300), workflow('W2', seconds=600, name='deploy')])
+        now = START + timedelta(seconds=100)
+        running = [workflow('W3', 'running'), workflow('W4', 'running', name='deploy')]
+        self.assertEqual(500, history.remaining(running, 50, now))
+        self.assertEqual(200, history.remaining(running[:1], 50, now))
+        self.assertIsNone(history.remaining(running + [workflow('W5', 'running', name='test')], 50, now))
+        self.assertIsNone(history.remaining([workflow('W6', seconds=1)], 50, now))
+
+    def test_history_is_kept_across_runs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'durations.json')
+            history = DurationHistory(path, min_samples=1)
+            history.record([workflow('W1', seconds=42)])
+            history.save()
+            self.assertEqual(42, DurationHistory(path, min_samples=1).percentile('gh/org/repo', 'build', 50))
+
+
+class PredictedWaitTest(TestCase):
+    def test_wait_sleeps_until_the_expected_end(self):
+        insights = {'workflow-0': {'min': 0.3, 'median': 0.4, 'p95': 0.5, 'max': 0.6}}
+        for backend in CircleciLibrary.BACKENDS:
+            with self.subTest(backend=backend), Simulator(script=('running', 'success'), insights=insights) as simulator:
+                circleci = CircleciLibrary('token', base_url=simulator.base_url, backend=backend, predict_durations=True)
+                project = Project('github', 'org', 'repo')
+                self.assertEqual(1, circleci.seed_workflow_durations(project))
+                pipeline = circleci.trigger_pipeline(project)
+                start = time.monotonic()
+                workflows = circleci.wait_for_pipeline(pipeline, initial_interval='10ms', max_interval='10ms')
+                self.assertTrue(workflows.completed())
+                self.assertGreaterEqual(time.monotonic() - start, 0.25)
+                self.assertEqual(2, simulator.state.calls['GET workflows'])
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+from os.path import abspath, dirname, join
+from unittest import TestCase
+from CircleciLibrary import CircleciLibrary
+
+ROOT = join(dirname(abspath(__file__)), '..')
+NETWORK_MODULES = ('requests', 'pycircleci', 'sqlite3', 'http.server')
+
+
+def loaded_modules(code: str) -> list:
+    """
+    :return: the network modules loaded after running the code in a fresh interpreter
+    """
+    script = f"import sys\n{code}\nprint(' '.join(m for m in {NETWORK_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+class ImportTest(TestCase):
+    def test_import_and_construction_defer_the_network_dependencies(self):
+        self.assertEqual([], loaded_modules("import CircleciLibrary\nCircleciLibrary.CircleciLibrary('token')"))
+
+    def test_libdoc_does_not_build_the_client(self):
+        code = "from robot.libdoc import LibraryDocumentation\nLibraryDocumentation('CircleciLibrary')"
+        self.assertEqual([], loaded_modules(code))
+
+    def test_first_access_connects(self):
+        circleci = CircleciLibrary('token', base_url='http://127.0.0.1:9')
+        self.assertNotIn('api', vars(circleci))
+        self.assertEqual('http://127.0.0.1:9', circleci.api.url)
+        self.assertIsNone(circleci._aio)
+        self.assertRaises(AttributeError, getattr, circleci, 'missing')
@@ -0,0 +1,79 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+from CircleciLibrary import CircleciLibrary
+from CircleciLibrary.index import PipelineIndex
+from CircleciLibrary.keywords import PipelineNotFoundError
+from CircleciLibrary.model import Pipeline, Project
+from simulator import Simulator
+
+
+def pipeline(number: int) -> Pipeline:
+    return Pipeline.from_json({
+        'id': f"P{number}", 'number': number, 'state': 'created', 'project_slug': 'gh/org/repo', 'vcs': {},
+        'trigger_parameters': {}, 'created_at': None
+    })
+
+
+class PipelineIndexTest(TestCase):
+    project = Project('github', 'org', 'repo')
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'pipelines.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_lookups_are_served_from_the_index(self):
+        with Simulator(page_size=1) as simulator:
+            circleci = CircleciLibrary('token', base_url=simulator.base_url, pipeline_index=self.path)
+            triggered = [circleci.trigger_pipeline(self.project, branch=b) for b in ('main', 'feature', 'main')]
+            revision = simulator.state.pipelines[triggered[1].id]['vcs']['revision']
+
+            pipeline = circleci.find_pipeline_for_revision(self.project, revision[:12])
+            self.assertEqual(triggered[1].id, pipeline.id)
+            self.assertEqual(revision, pipeline.vcs.revision)
+            listed = simulator.state.calls['GET project_pipelines']
+            self.assertEqual(triggered[1].id, circleci.find_pipeline_for_revision(self.project, revision).id)
+            self.assertEqual([3, 1], [p.number for p in circleci.lookup_pipelines(self.project, branch='main')])
+            self.assertEqual(listed, simulator.state.calls['GET project_pipelines'])
+
+            newer = [circleci.trigger_pipeline(self.project, tag='1.0.0') for _ in range(3)]
+            self.assertEqual(3, circleci.refresh_pipeline_index(self.project))
+            # pipelines 6 to 3, the prefetch of pipeline 2 may have been sent already
+            self.assertIn(simulator.state.calls['GET project_pipelines'] - listed, (4, 5))
+            self.assertEqual(newer[-1].id, circleci.lookup_pipelines(self.project, tag='1.0.0', limit=1)[0].id)
+
+            with self.assertRaises(PipelineNotFoundError):
+                circleci.find_pipeline_for_revision(self.project, 'ffffffff')
+
+        # an api request of the reopened index would fail
+        reopened = CircleciLibrary('token', base_url='http://127.0.0.1:9', pipeline_index=self.path, max_retries=0)
+        self.assertEqual(triggered[1].id, reopened.find_pipeline_for_revision(self.project, revision).id)
+
+    def test_memory_index_keeps_the_last_pipelines(self):
+        index = PipelineIndex(max_pipelines=10)
+        for number in range(1, 26):
+            index.add([pipeline(number)])
+        index.set_synced_number('gh/org/repo', 25)
+        index.add([pipeline(26)])
+        numbers = [p.number for p in index.lookup('gh/org/repo')]
+        self.assertLessEqual(len(numbers), 10)
+        self.assertEqual(list(range(26, 26 - len(numbers), -1)), numbers)
+        self.assertEqual(25, index.synced_number('gh/org/repo'))
+        for number in range(27, 40):
+            index.add([pipeline(number)])
+        # the next refresh reads the dropped pipelines again
+        self.assertIsNone(index.synced_number('gh/org/repo'))
+        self.assertIsNone(PipelineIndex(self.path).max_pipelines)
+
+    def test_repeated_polls_are_not_indexed_again(self):
+        with Simulator() as simulator:
+            circleci = CircleciLibrary('token', base_url=simulator.base_url)
+            pipeline = circleci.trigger_pipeline(self.project)
+            with patch.object(circleci._pipelines, 'add', wraps=circleci._pipelines.add) as add_mock:
+                for _ in range(3):
+                    circleci.get_pipeline(pipeline.id)
+                self.assertEqual(1, add_mock.call_count)
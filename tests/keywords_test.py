@@ -1,8 +1,10 @@
+import threading
 from unittest.mock import Mock, patch
-from CircleciLibrary.keywords import WorkflowRunningError, WorkflowStatusError
+from CircleciLibrary.keywords import WorkflowRunningError, WorkflowStatusError, ProjectNotFoundError, PipelineNotFoundError
 from keywords import KeywordsTestCase
 from CircleciLibrary import CircleciLibrary
-from CircleciLibrary.model import Pipeline, Workflow
+from CircleciLibrary.model import Pipeline, Workflow, Project
+from CircleciLibrary.results import TestResultSummary
 
 
 class KeywordsUnitTest(KeywordsTestCase):
@@ -48,8 +50,7 @@ class KeywordsUnitTest(KeywordsTestCase):
         api_mock = Mock()
         api_constructor_mock.return_value = api_mock
 
-        api_mock.get_pipeline_workflow = Mock()
-        api_mock.get_pipeline_workflow.side_effect = [
+        api_mock._request.side_effect = [
             [ self.workflow_item(stopped=True, status='success') ],
             self.workflows(stopped=True, status='success'),
             "Wrong Object"
@@ -101,8 +102,7 @@ class KeywordsUnitTest(KeywordsTestCase):
                 }
             }
 
-        api_mock.get_pipeline_workflow = Mock()
-        api_mock.get_pipeline_workflow.side_effect = [
+        api_mock._request.side_effect = [
             [ self.workflow_item(stopped=False, status='running') ],
             self.workflows(stopped=False, status='running'),
             self.workflows(stopped=False, status='running'),
@@ -205,4 +205,370 @@ class KeywordsUnitTest(KeywordsTestCase):
         project = self._test_get_project()
         self.assertEqual('robotframework_circleci_test_dummy', project.reponame)
         self.assertEqual('trustedshops', project.username)
-        self.assertEqual('github', project.vcs_type)
\ No newline at end of file
+        self.assertEqual('github', project.vcs_type)
+
+    @patch('CircleciLibrary.polling.time.sleep')
+    @patch('CircleciLibrary.keywords.Api')
+    def test_wait_for_pipeline(self, api_constructor_mock, sleep_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        api_mock._request.side_effect = [
+            self.workflows(stopped=False, status='running'),
+            self.workflows(stopped=False, status='running'),
+            self.workflows(stopped=True, status='success')
+        ]
+        pipeline = Pipeline(pipeline_id="ID", number=1, state="", created_at=None, updated_at=None, errors=[], vcs=None)
+
+        circleci = CircleciLibrary(self.api_token)
+        workflows = circleci.wait_for_pipeline(pipeline, initial_interval='1s', max_interval='2s', jitter=0)
+        self.assertTrue(workflows.completed())
+        self.assertEqual(3, api_mock._request.call_count)
+        self.assertEqual([1.0, 2.0], [c.args[0] for c in sleep_mock.call_args_list])
+
+    @patch('CircleciLibrary.polling.time.sleep')
+    @patch('CircleciLibrary.keywords.Api')
+    def test_wait_for_pipeline_timeout(self, api_constructor_mock, sleep_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        api_mock._request.return_value = self.workflows(stopped=False, status='running')
+        pipeline = Pipeline(pipeline_id="ID", number=1, state="", created_at=None, updated_at=None, errors=[], vcs=None)
+
+        circleci = CircleciLibrary(self.api_token)
+        with self.assertRaises(WorkflowRunningError):
+            circleci.wait_for_pipeline(pipeline, timeout='0s')
+        self.assertEqual(1, api_mock._request.call_count)
+
+    @patch('CircleciLibrary.polling.time.sleep')
+    @patch('CircleciLibrary.keywords.Api')
+    def test_wait_for_pipeline_fail_fast(self, api_constructor_mock, sleep_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        failed = dict(self.workflow_item(stopped=True, status='failed'), id='W1', name='lint')
+        running = dict(self.workflow_item(stopped=False, status='running'), id='W2', name='e2e')
+        api_mock._request.side_effect = [
+            {'items': [dict(failed, status='running', stopped_at=None), running]},
+            {'items': [failed, running]}
+        ]
+        pipeline = Pipeline(pipeline_id="ID", number=1, state="", created_at=None, updated_at=None, errors=[], vcs=None)
+
+        circleci = CircleciLibrary(self.api_token)
+        workflows = circleci.wait_for_pipeline(pipeline, fail_fast=True, cancel_remaining=True)
+        self.assertFalse(workflows.completed())
+        self.assertTrue(workflows.failed())
+        self.assertEqual(2, api_mock._request.call_count)
+        api_mock.cancel_workflow.assert_called_once_with('W2')
+
+    @patch('CircleciLibrary.polling.time.sleep')
+    @patch('CircleciLibrary.keywords.Api')
+    def test_wait_for_pipeline_fail_fast_without_cancel(self, api_constructor_mock, sleep_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        api_mock._request.return_value = self.workflows(stopped=False, status='failing')
+        pipeline = Pipeline(pipeline_id="ID", number=1, state="", created_at=None, updated_at=None, errors=[], vcs=None)
+
+        circleci = CircleciLibrary(self.api_token)
+        workflows = circleci.wait_for_pipeline(pipeline, fail_fast=True)
+        self.assertEqual(Workflow.Status.FAILING, workflows[0].status)
+        self.assertEqual(1, api_mock._request.call_count)
+        api_mock.cancel_workflow.assert_not_called()
+
+    @patch('CircleciLibrary.keywords.Api')
+    def test_get_workflow_transitions(self, api_constructor_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        api_mock._request.side_effect = [
+            self.workflows(stopped=False, status='running'),
+            self.workflows(stopped=False, status='running'),
+            self.workflows(stopped=True, status='failed')
+        ]
+        pipeline = Pipeline(pipeline_id="ID", number=1, state="", created_at=None, updated_at=None, errors=[], vcs=None)
+
+        circleci = CircleciLibrary(self.api_token)
+        self.assertEqual(['build: new -> running'], [str(t) for t in circleci.get_workflow_transitions(pipeline)])
+        self.assertEqual([], circleci.get_workflow_transitions(pipeline))
+        self.assertEqual(['build: running -> failed'], [str(t) for t in circleci.get_workflow_transitions(pipeline)])
+
+    @patch('CircleciLibrary.keywords.Api')
+    def test_trigger_pipeline_deduplicates_concurrent_triggers(self, api_constructor_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        started = threading.Event()
+        release = threading.Event()
+
+        def trigger(username, project, branch, tag, vcs_type, params):
+            started.set()
+            release.wait(5)
+            return {'id': f'{branch}-{api_mock.trigger_pipeline.call_count}', 'number': 1, 'state': 'pending'}
+
+        api_mock.trigger_pipeline.side_effect = trigger
+        project = Project('github', 'org', 'repo')
+        circleci = CircleciLibrary(self.api_token, trigger_dedup_window='1m')
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                circleci.trigger_pipeline(project, branch='main', parameters={'a': 1, 'b': 2})))
+            for _ in range(4)
+        ]
+        for t in threads:
+            t.start()
+        started.wait(5)
+        release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(['main-1'] * 4, [p.id for p in results])
+        self.assertEqual('main-1', circleci.trigger_pipeline(project, branch='main', parameters={'b': 2, 'a': 1}).id)
+        self.assertEqual('main-2', circleci.trigger_pipeline(project, branch='main').id)
+        self.assertEqual('main-3', circleci.trigger_pipeline(project, branch='main', dedup_window='0s').id)
+        self.assertEqual(3, api_mock.trigger_pipeline.call_count)
+
+    @patch('CircleciLibrary.keywords.Api')
+    def test_trigger_pipelines(self, api_constructor_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        api_mock.trigger_pipeline.side_effect = lambda **kwargs: {
+            'number': 1,
+            'state': 'pending',
+            'id': f"{kwargs['project']}-{kwargs['branch']}-{kwargs['tag']}",
+            'created_at': '2021-05-21T13:44:31.668Z'
+        }
+        other_project = Project('github', 'trustedshops', 'other')
+
+        circleci = CircleciLibrary(self.api_token)
+        pipelines = circleci.trigger_pipelines([
+            self.test_project,
+            (other_project, 'refs/tags/1.0.0'),
+            (other_project, 'feature', {'stage': 'qa'}),
+            {'project': other_project, 'branch': 'main'}
+        ], concurrency=2)
+        self.assertEqual([
+            'robotframework_circleci_test_dummy-None-None',
+            'other-None-1.0.0',
+            'other-feature-None',
+            'other-main-None'
+        ], [p.id for p in pipelines])
+        api_mock.trigger_pipeline.assert_any_call(
+            username='trustedshops', project='other', branch='feature', tag=None, vcs_type='github', params={'stage': 'qa'})
+        self.assertRaises(ValueError, circleci.trigger_pipelines, ['no spec'])
+
+    @patch('CircleciLibrary.polling.time.sleep')
+    @patch('CircleciLibrary.keywords.Api')
+    def test_wait_for_pipelines(self, api_constructor_mock, sleep_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        polls = {'P1': 0, 'P2': 0}
+
+        def workflows(verb, endpoint, **kwargs):
+            pipeline_id = endpoint.split('/')[1]
+            polls[pipeline_id] += 1
+            return self.workflows(stopped=polls[pipeline_id] > 1, status='success')
+
+        api_mock._request.side_effect = workflows
+        pipelines = [
+            Pipeline(pipeline_id=i, number=1, state="", created_at=None, updated_at=None, errors=[], vcs=None)
+            for i in ('P1', 'P2')
+        ]
+
+        circleci = CircleciLibrary(self.api_token)
+        results = circleci.wait_for_pipelines(pipelines)
+        self.assertEqual(pipelines, list(results.keys()))
+        self.assertTrue(all(w.completed() for w in results.values()))
+        self.assertEqual({'P1': 2, 'P2': 2}, polls)
+
+    @patch('CircleciLibrary.keywords.Api')
+    def test_wait_for_pipelines_with_async_backend(self, api_constructor_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        polls = {}
+        threads = set()
+
+        def workflows(verb, endpoint, **kwargs):
+            pipeline_id = endpoint.split('/')[1]
+            threads.add(threading.current_thread().name)
+            polls[pipeline_id] = polls.get(pipeline_id, 0) + 1
+            return self.workflows(stopped=polls[pipeline_id] > 2, status='success')
+
+        api_mock._request.side_effect = workflows
+        pipelines = [
+            Pipeline(pipeline_id=f"P{i}", number=i, state="", created_at=None, updated_at=None, errors=[], vcs=None)
+            for i in range(300)
+        ]
+
+        circleci = CircleciLibrary(self.api_token, max_concurrency=4, backend='async')
+        results = circleci.wait_for_pipelines(pipelines, initial_interval='10ms', max_interval='20ms', concurrency=300)
+        self.assertEqual(300, len(results))
+        self.assertTrue(all(w.completed() for w in results.values()))
+        self.assertTrue(all(c == 3 for c in polls.values()))
+        self.assertLessEqual(len(threads), 4)
+
+        workflows = circleci.wait_for_pipeline(pipelines[0], initial_interval='10ms')
+        self.assertTrue(workflows.completed())
+        self.assertRaises(ValueError, CircleciLibrary, self.api_token, backend='threads')
+
+    @patch('CircleciLibrary.keywords.Api')
+    def test_get_project_uses_the_project_cache(self, api_constructor_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        projects = [
+            {'reponame': 'repo1', 'username': 'my-org', 'vcs_type': 'github'},
+            {'reponame': 'repo1', 'username': 'other-org', 'vcs_type': 'bitbucket'}
+        ]
+        api_mock.get_projects.side_effect = lambda: list(projects)
+
+        circleci = CircleciLibrary(self.api_token, project_cache_ttl='1h')
+        self.assertEqual('my-org', circleci.get_project('repo1').username)
+        self.assertEqual('other-org', circleci.get_project('repo1', username='other-org').username)
+        self.assertEqual('other-org', circleci.get_project('repo1', vcs_type='bitbucket').username)
+        self.assertEqual('my-org', circleci.get_project('repo1', 'my-org', 'github').username)
+        self.assertEqual(2, len(circleci.get_projects()))
+        self.assertEqual(1, api_mock.get_projects.call_count)
+
+        # a miss refreshes the cache once
+        projects.append({'reponame': 'repo2', 'username': 'my-org', 'vcs_type': 'github'})
+        self.assertEqual('repo2', circleci.get_project('repo2').reponame)
+        self.assertEqual(2, api_mock.get_projects.call_count)
+        with self.assertRaises(ProjectNotFoundError):
+            circleci.get_project('repo3')
+        self.assertEqual(3, api_mock.get_projects.call_count)
+
+        circleci.invalidate_project_cache()
+        circleci.get_project('repo1')
+        self.assertEqual(4, api_mock.get_projects.call_count)
+
+    @patch('CircleciLibrary.keywords.Api')
+    def test_get_workflows_follows_all_pages(self, api_constructor_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        second = dict(self.workflow_item(stopped=True, status='success'), id='W2')
+
+        def pages(verb, endpoint, params=None, api_version=None):
+            if endpoint == 'pipeline/ID/workflow':
+                if params is None:
+                    return {'items': [self.workflow_item(stopped=True, status='success')], 'next_page_token': 'T2'}
+                return {'items': [second], 'next_page_token': None}
+            if endpoint == 'workflow/W2/job':
+                return {'items': [{
+                    'id': 'J1', 'name': 'test', 'job_number': 7, 'project_slug': 'gh/org/repo',
+                    'status': 'success', 'type': 'build', 'started_at': '2021-05-21T14:39:08Z', 'stopped_at': None
+                }], 'next_page_token': None}
+            raise AssertionError(endpoint)
+
+        api_mock._request.side_effect = pages
+        pipeline = Pipeline(pipeline_id="ID", number=1, state="", created_at=None, updated_at=None, errors=[], vcs=None)
+
+        circleci = CircleciLibrary(self.api_token)
+        workflows = circleci.get_workflows(pipeline)
+        self.assertEqual(['0A3EF846-8A63-4851-98E2-055486715DEF', 'W2'], [w.id for w in workflows])
+        api_mock._request.assert_any_call('GET', 'pipeline/ID/workflow', params={'page-token': 'T2'}, api_version='v2')
+
+        jobs = circleci.get_workflow_jobs(workflows[1])
+        self.assertEqual([7], [j.job_number for j in jobs])
+        self.assertEqual(14, jobs[0].started_at.hour)
+
+    @staticmethod
+    def pipeline_item(number: int, branch: str = 'main', state: str = 'created', parameters: dict = None):
+        return {
+            'id': f'P{number}',
+            'number': number,
+            'state': state,
+            'created_at': f'2021-05-{number:02d}T10:00:00.000Z',
+            'updated_at': f'2021-05-{number:02d}T10:00:00.000Z',
+            'errors': [],
+            'trigger_parameters': parameters or {},
+            'vcs': {'provider_name': 'GitHub', 'target_repository_url': 'https://github.com/org/repo',
+                    'branch': branch, 'revision': f'{number:040x}'}
+        }
+
+    @patch('CircleciLibrary.keywords.Api')
+    def test_get_project_pipelines_and_find_latest_pipeline(self, api_constructor_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        pages = {
+            None: {'items': [self.pipeline_item(30), self.pipeline_item(29, 'feature'), self.pipeline_item(28, state='errored')],
+                   'next_page_token': 'T2'},
+            'T2': {'items': [self.pipeline_item(27, parameters={'git': {'branch': 'main'}, 'deploy': True}),
+                             self.pipeline_item(26)],
+                   'next_page_token': 'T3'},
+            'T3': {'items': [self.pipeline_item(25), self.pipeline_item(24)], 'next_page_token': None}
+        }
+        workflows = {
+            'P30': self.workflows(stopped=True, status='failed'),
+            'P28': self.workflows(stopped=True, status='success'),
+            'P27': self.workflows(stopped=True, status='success')
+        }
+
+        def request(verb, endpoint, params=None, api_version=None):
+            if endpoint == 'project/github/org/repo/pipeline':
+                return pages[(params or {}).get('page-token')]
+            return workflows[endpoint.split('/')[1]]
+
+        api_mock._request.side_effect = request
+        project = Project('github', 'org', 'repo')
+        circleci = CircleciLibrary(self.api_token)
+
+        pipelines = circleci.get_project_pipelines(project, state='created', limit=2)
+        self.assertEqual([30, 29], [p.number for p in pipelines])
+        # at most the next page was prefetched
+        self.assertLessEqual(api_mock._request.call_count, 2)
+
+        api_mock._request.reset_mock()
+        pipelines = circleci.get_project_pipelines(project, created_after='2021-05-26', limit=0)
+        self.assertEqual([30, 29, 28, 27, 26], [p.number for p in pipelines])
+        self.assertEqual(f'{30:040x}', pipelines[0].vcs.revision)
+
+        pipeline = circleci.find_latest_pipeline(project, parameters={'git.branch': 'main', 'deploy': 'true'})
+        self.assertEqual(27, pipeline.number)
+        self.assertEqual(True, pipeline.trigger_parameters['deploy'])
+
+        pipeline = circleci.find_latest_pipeline(project, branch='main', workflow_status='success')
+        self.assertEqual(28, pipeline.number)
+        with self.assertRaises(PipelineNotFoundError):
+            circleci.find_latest_pipeline(project, tag='1.0.0')
+        with self.assertRaises(PipelineNotFoundError):
+            circleci.find_latest_pipeline(project, branch='feature', created_before='2021-05-29')
+
+    @patch('CircleciLibrary.keywords.Api')
+    def test_get_pipeline_test_results(self, api_constructor_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+
+        def test_item(name, result, run_time):
+            return {'name': name, 'classname': 'suite', 'result': result, 'run_time': run_time,
+                    'message': None, 'source': 'junit', 'file': None}
+
+        responses = {
+            ('pipeline/ID/workflow', None): self.workflows(stopped=True, status='failed'),
+            ('workflow/0A3EF846-8A63-4851-98E2-055486715DEF/job', None): {'items': [
+                {'id': 'J1', 'name': 'unit', 'job_number': 1, 'project_slug': 'gh/org/repo', 'status': 'failed', 'type': 'build'},
+                {'id': 'J2', 'name': 'it', 'job_number': 2, 'project_slug': 'gh/org/repo', 'status': 'success', 'type': 'build'},
+                {'id': 'J3', 'name': 'hold', 'project_slug': 'gh/org/repo', 'status': 'success', 'type': 'approval'}
+            ]},
+            ('project/gh/org/repo/1/tests', None): {
+                'items': [test_item('a', 'success', 0.5), test_item('b', 'failure', 3.0)], 'next_page_token': 'T2'},
+            ('project/gh/org/repo/1/tests', 'T2'): {
+                'items': [test_item('c', 'skipped', 0.0)], 'next_page_token': None},
+            ('project/gh/org/repo/2/tests', None): {
+                'items': [test_item('d', 'success', 7.5), test_item('e', 'success', 1.0)], 'next_page_token': None}
+        }
+        api_mock._request.side_effect = lambda verb, endpoint, params=None, api_version=None: \
+            responses[(endpoint, (params or {}).get('page-token'))]
+        pipeline = Pipeline(pipeline_id="ID", number=1, state="", created_at=None, updated_at=None, errors=[], vcs=None)
+
+        circleci = CircleciLibrary(self.api_token)
+        results = circleci.get_pipeline_test_results(pipeline, slowest=2)
+        self.assertEqual(5, results['total'])
+        self.assertEqual(2, results['jobs'])
+        self.assertEqual({'success': 3, 'failure': 1, 'skipped': 1}, results['counts'])
+        self.assertEqual(1, results['failed'])
+        self.assertEqual(['build/unit: suite.b'], results['failing'])
+        self.assertEqual([(7.5, 'suite.d', 'build/it'), (3.0, 'suite.b', 'build/unit')], results['slowest'])
+        self.assertEqual(12.0, results['run_time'])
+
+    def test_same_named_jobs_of_different_workflows_are_counted_apart(self):
+        summary = TestResultSummary()
+        summary.add(('gh/org/repo', 1), 'build/test', [{'name': 'a', 'result': 'failure', 'run_time': 1.0}])
+        summary.add(('gh/org/repo', 2), 'nightly/test', [{'name': 'a', 'result': 'failure', 'run_time': 2.0}])
+        results = summary.to_dict()
+        self.assertEqual(2, results['jobs'])
+        self.assertEqual(['build/test: a', 'nightly/test: a'], results['failing'])
+        self.assertEqual([(2.0, 'a', 'nightly/test'), (1.0, 'a', 'build/test')], results['slowest'])
@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+from CircleciLibrary.log import Tracer, trace_enabled
+
+
+class TracerUnitTest(TestCase):
+    def test_trace_is_disabled_outside_of_robot(self):
+        self.assertFalse(trace_enabled())
+
+    @patch('CircleciLibrary.log.BuiltIn')
+    @patch('CircleciLibrary.log.trace_enabled', return_value=False)
+    def test_nothing_is_done_without_trace_level(self, enabled_mock, builtin_mock):
+        class Payload:
+            def __str__(self):
+                raise AssertionError("must not be stringified")
+
+        payload = Payload()
+        self.assertIs(payload, Tracer()(payload, 'pipeline/1'))
+        builtin_mock.assert_not_called()
+
+    @patch('CircleciLibrary.log.BuiltIn')
+    @patch('CircleciLibrary.log.trace_enabled', return_value=True)
+    def test_only_changes_are_traced_and_truncated(self, enabled_mock, builtin_mock):
+        tracer = Tracer(max_length=10)
+        tracer({'state': 'running'}, 'pipeline/1')
+        tracer({'state': 'running'}, 'pipeline/1')
+        tracer({'state': 'running'}, 'pipeline/2')
+        tracer({'state': 'success'}, 'pipeline/1')
+        messages = [c.args[0] for c in builtin_mock.return_value.log.call_args_list]
+        self.assertEqual([
+            "pipeline/1: {'state': ... (20 characters, truncated)",
+            "pipeline/2: {'state': ... (20 characters, truncated)",
+            "pipeline/1: {'state': ... (20 characters, truncated)"
+        ], messages)
+
+    @patch('CircleciLibrary.log.BuiltIn')
+    @patch('CircleciLibrary.log.trace_enabled', return_value=False)
+    def test_sink_receives_full_responses(self, enabled_mock, builtin_mock):
+        with tempfile.TemporaryDirectory() as directory:
+            sink = os.path.join(directory, 'trace.jsonl')
+            tracer = Tracer(max_length=5, sink=sink)
+            tracer({'state': 'running'}, 'pipeline/1')
+            tracer({'state': 'running'}, 'pipeline/1')
+            tracer({'state': 'success'}, 'pipeline/1')
+            with open(sink) as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual(['running', 'success'], [line['response']['state'] for line in lines])
+        self.assertEqual({'pipeline/1'}, {line['endpoint'] for line in lines})
+        builtin_mock.assert_not_called()
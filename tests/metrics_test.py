@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+from CircleciLibrary import CircleciLibrary
+from CircleciLibrary.metrics import endpoint
+from CircleciLibrary.model import Project
+from simulator import Simulator
+
+
+class MetricsTest(TestCase):
+    def test_endpoint(self):
+        self.assertEqual('/v2/pipeline/{id}/workflow',
+                         endpoint('https://circleci.com/api/v2/pipeline/E57868E8-9533-4625-AD83-F2AB2ABB70BD/workflow'))
+        self.assertEqual('/v2/project/{slug}/{id}/artifacts',
+                         endpoint('https://circleci.com/api/v2/project/gh/org/repo/123/artifacts?page-token=x'))
+        self.assertEqual('/v1.1/projects', endpoint('http://127.0.0.1:8080/api/v1.1/projects'))
+        self.assertEqual('{download}', endpoint('https://output.circle-artifacts.com/output/job/1/artifacts/0/a.txt'))
+
+    @patch('CircleciLibrary.metrics.info')
+    @patch('CircleciLibrary.metrics.BuiltIn')
+    def test_listener_recognizes_the_library_imported_with_name(self, builtin_mock, info_mock):
+        with Simulator(script=('success',)) as simulator:
+            circleci = CircleciLibrary('token', base_url=simulator.base_url, api_metrics=True)
+            builtin_mock.return_value.get_library_instance.return_value = {'BuiltIn': object(), 'CI': circleci}
+            listener = circleci.ROBOT_LIBRARY_LISTENER
+            listener.start_keyword('CircleciLibrary.Trigger Pipeline',
+                                   {'kwname': 'Trigger Pipeline', 'libname': 'CircleciLibrary'})
+            listener.end_keyword('CircleciLibrary.Trigger Pipeline', {})
+            listener.start_keyword('CI.Trigger Pipeline', {'kwname': 'Trigger Pipeline', 'libname': 'CI'})
+            circleci.trigger_pipeline(Project('github', 'org', 'repo'))
+            listener.end_keyword('CI.Trigger Pipeline', {})
+
+            self.assertEqual(1, info_mock.call_count)
+            self.assertEqual({'Trigger Pipeline'}, {s['keyword'] for s in circleci._metrics.series()})
+
+    @patch('CircleciLibrary.metrics.info')
+    def test_listener_attributes_the_calls_to_keywords_and_tests(self, info_mock):
+        with tempfile.TemporaryDirectory() as directory, Simulator(script=('success',), throttle_every=3) as simulator:
+            report = os.path.join(directory, 'metrics.json')
+            textfile = os.path.join(directory, 'textfile', 'circleci.prom')
+            circleci = CircleciLibrary('token', base_url=simulator.base_url, retry_backoff=0,
+                                       metrics_report=report, metrics_textfile=textfile)
+            listener = circleci.ROBOT_LIBRARY_LISTENER
+            listener.start_test('Trigger', {'longname': 'Suite.Trigger'})
+            listener.start_keyword('CircleciLibrary.Trigger Pipeline',
+                                   {'kwname': 'Trigger Pipeline', 'libname': 'CircleciLibrary'})
+            pipeline = circleci.trigger_pipeline(Project('github', 'org', 'repo'))
+            listener.end_keyword('CircleciLibrary.Trigger Pipeline', {})
+            listener.start_keyword('BuiltIn.Log', {'kwname': 'Log', 'libname': 'BuiltIn'})
+            listener.end_keyword('BuiltIn.Log', {})
+            listener.end_test('Trigger', {'longname': 'Suite.Trigger'})
+            listener.start_test('Wait', {'longname': 'Suite.Wait'})
+            listener.start_keyword('CircleciLibrary.Wait For Pipeline',
+                                   {'kwname': 'Wait For Pipeline', 'libname': 'CircleciLibrary'})
+            circleci.wait_for_pipeline(pipeline, initial_interval='10ms')
+            circleci.wait_for_pipeline(pipeline, initial_interval='10ms')
+            listener.end_keyword('CircleciLibrary.Wait For Pipeline', {})
+            listener.end_test('Wait', {'longname': 'Suite.Wait'})
+            listener.close()
+
+            self.assertEqual(2, info_mock.call_count)
+            self.assertIn('POST /v2/project/{slug}/pipeline 1x', info_mock.call_args_list[0].args[0])
+            with open(report) as f:
+                data = json.load(f)
+            self.assertEqual(1, data['tests']['Suite.Trigger']['calls'])
+            self.assertEqual({'GET /v2/pipeline/{id}/workflow': 2}, data['tests']['Suite.Wait']['endpoints'])
+            self.assertEqual(1, data['summary']['retries'])
+            self.assertEqual(3, data['summary']['calls'])
+            self.assertEqual({'Trigger Pipeline', 'Wait For Pipeline'}, {s['keyword'] for s in data['series']})
+            with open(textfile) as f:
+                prometheus = f.read()
+            self.assertIn('# TYPE circleci_api_request_duration_seconds histogram', prometheus)
+            self.assertIn('circleci_api_requests_total{keyword="Wait For Pipeline",method="GET",'
+                          'endpoint="/v2/pipeline/{id}/workflow",status="200"} 2', prometheus)
+            self.assertIn('circleci_api_retries_total{keyword="Wait For Pipeline",method="GET",'
+                          'endpoint="/v2/pipeline/{id}/workflow",status="200"} 1', prometheus)
+            self.assertEqual(3, circleci.get_api_metrics()['calls'])
+
+    def test_metrics_are_disabled_by_default(self):
+        circleci = CircleciLibrary('token')
+        self.assertIsNone(circleci.api._session.metrics)
+        self.assertFalse(hasattr(circleci, 'ROBOT_LIBRARY_LISTENER'))
+        self.assertRaises(RuntimeError, circleci.get_api_metrics)
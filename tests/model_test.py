@@ -0,0 +1,110 @@
+import pickle
+from datetime import datetime, timezone
+from unittest import TestCase
+from CircleciLibrary.model import Pipeline, Project, Workflow, WorkflowList, parse_datetime
+
+
+class ModelUnitTest(TestCase):
+    pipeline_json = {
+        'id': 'E57868E8-9533-4625-AD83-F2AB2ABB70BD',
+        'errors': [{'type': 'config', 'message': 'broken'}],
+        'updated_at': '2021-05-21T13:44:31.668Z',
+        'number': 129,
+        'state': 'created',
+        'created_at': '2021-05-21T13:44:31.668Z',
+        'vcs': {
+            'target_repository_url': 'https://github.com/trustedshops/robotframework_circleci_test_dummy',
+            'provider_name': 'GitHub',
+            'tag': '1.0.2'
+        }
+    }
+    workflow_json = {
+        'pipeline_id': 'E57868E8-9533-4625-AD83-F2AB2ABB70BD',
+        'id': '0A3EF846-8A63-4851-98E2-055486715DEF',
+        'name': 'build',
+        'project_slug': 'gh/trustedshops/circleci_api_test_dummy',
+        'status': 'success',
+        'started_by': 'DA2E42D1-DD08-4D4F-9E78-1B0C3C4D3183',
+        'pipeline_number': 134,
+        'created_at': '2021-05-21T14:39:08Z',
+        'stopped_at': '2021-05-21T14:40:08Z'
+    }
+
+    def test_parse_datetime(self):
+        expected = datetime(2021, 5, 21, 13, 44, 31, 668000, tzinfo=timezone.utc)
+        self.assertEqual(expected, parse_datetime('2021-05-21T13:44:31.668Z'))
+        self.assertEqual(expected, parse_datetime('2021-05-21T13:44:31.668+00:00'))
+        self.assertEqual(expected, parse_datetime('2021-05-21T13:44:31.66800012Z'))
+        self.assertEqual(datetime(2021, 5, 21, 13, 44, 31, 600000, tzinfo=timezone.utc),
+                         parse_datetime('2021-05-21T13:44:31.6Z'))
+        self.assertEqual(datetime(2021, 5, 21, 14, 39, 8, tzinfo=timezone.utc), parse_datetime('2021-05-21T14:39:08Z'))
+        self.assertIsNone(parse_datetime(None))
+        self.assertRaises(ValueError, parse_datetime, 'yesterday')
+
+    def test_pipeline_fields_are_decoded_lazily(self):
+        pipeline = Pipeline.from_json(self.pipeline_json)
+        self.assertFalse(hasattr(pipeline, '__dict__'))
+        self.assertRaises(AttributeError, getattr, pipeline, '_vcs')
+        self.assertEqual('1.0.2', pipeline.vcs.tag)
+        self.assertIsNone(pipeline.vcs.branch)
+        self.assertEqual([Pipeline.Error('config', 'broken')], pipeline.errors)
+        self.assertEqual(2021, pipeline.created_at.year)
+
+    def test_pipeline_without_optional_fields(self):
+        pipeline = Pipeline.from_json({'id': 'ID', 'number': 1, 'state': 'pending', 'created_at': '2021-05-21T13:44:31.668Z'})
+        self.assertIsNone(pipeline.vcs)
+        self.assertIsNone(pipeline.updated_at)
+        self.assertEqual([], pipeline.errors)
+
+    def test_models_compare_pickle_and_hash_like_values(self):
+        pipeline = Pipeline.from_json(self.pipeline_json)
+        copy = pickle.loads(pickle.dumps(Pipeline.from_json(self.pipeline_json)))
+        self.assertEqual(pipeline, copy)
+        self.assertEqual(hash(pipeline), hash(copy))
+        self.assertEqual(Project('github', 'org', 'repo'), Project('github', 'org', 'repo'))
+        self.assertEqual(1, len({Project('github', 'org', 'repo'), Project('github', 'org', 'repo')}))
+        self.assertIn("Project(username='org', reponame='repo', vcs_type='github')", repr(Project('github', 'org', 'repo')))
+
+    def test_workflow(self):
+        workflow = Workflow.from_json(self.workflow_json)
+        self.assertIs(Workflow.Status.SUCCESS, workflow.status)
+        self.assertFalse(workflow.in_progress())
+        self.assertEqual(datetime(2021, 5, 21, 14, 40, 8, tzinfo=timezone.utc), workflow.stopped_at)
+        self.assertEqual(workflow, pickle.loads(pickle.dumps(workflow)))
+        self.assertTrue(Workflow.from_json(dict(self.workflow_json, stopped_at=None)).in_progress())
+        self.assertRaises(ValueError, Workflow.from_json, dict(self.workflow_json, status='unknown'))
+
+    def workflow(self, workflow_id: str, status: str):
+        stopped_at = None if status in ('running', 'failing', 'on_hold') else '2021-05-21T14:40:08Z'
+        return Workflow.from_json(dict(self.workflow_json, id=workflow_id, name=workflow_id, status=status, stopped_at=stopped_at))
+
+    def test_workflow_list_keeps_its_index_up_to_date(self):
+        workflows = WorkflowList([self.workflow('a', 'success'), self.workflow('b', 'running')])
+        self.assertFalse(workflows.completed())
+        self.assertFalse(workflows.failed())
+        self.assertEqual({'success': 1, 'running': 1}, workflows.status_counts())
+        self.assertEqual('b', workflows.get('b').name)
+        workflows.pop()
+        self.assertTrue(workflows.completed())
+        self.assertTrue(workflows.overall_status(Workflow.Status.SUCCESS))
+        workflows.append(self.workflow('c', 'failed'))
+        self.assertTrue(workflows.failed())
+        del workflows[0]
+        self.assertIsNone(workflows.get('a'))
+        self.assertTrue(workflows.overall_status(Workflow.Status.FAILED))
+        self.assertFalse(WorkflowList().completed())
+        self.assertEqual(workflows.status_counts(), pickle.loads(pickle.dumps(workflows)).status_counts())
+
+    def test_workflow_list_merge_yields_transitions(self):
+        workflows = WorkflowList()
+        first = workflows.merge([self.workflow('a', 'running'), self.workflow('b', 'running')])
+        self.assertEqual(['a: new -> running', 'b: new -> running'], [str(t) for t in first])
+        self.assertEqual([], workflows.merge([self.workflow('a', 'running'), self.workflow('b', 'running')]))
+        changed = workflows.merge([self.workflow('a', 'failed'), self.workflow('b', 'running'), self.workflow('c', 'running')])
+        self.assertEqual(['a: running -> failed', 'c: new -> running'], [str(t) for t in changed])
+        self.assertIs(Workflow.Status.RUNNING, changed[0].previous)
+        self.assertIs(Workflow.Status.FAILED, changed[0].current)
+        self.assertEqual(['a', 'b', 'c'], [w.id for w in workflows])
+        self.assertEqual({'failed': 1, 'running': 2}, workflows.status_counts())
+        self.assertTrue(workflows.failed())
+        self.assertFalse(workflows.completed())
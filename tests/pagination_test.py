@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from CircleciLibrary.pagination import page_items, paginate
+
+
+class PaginationUnitTest(TestCase):
+    pages = {
+        None: ([1, 2], 'p2'),
+        'p2': ([3, 4], 'p3'),
+        'p3': ([5], None)
+    }
+
+    def setUp(self):
+        self.fetched = []
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def fetch_page(self, token):
+        self.fetched.append(token)
+        return self.pages[token]
+
+    def test_page_items(self):
+        self.assertEqual(([1], None), page_items([1]))
+        self.assertEqual(([1], 'next'), page_items({'items': [1], 'next_page_token': 'next'}))
+        self.assertEqual(([1], None), page_items({'items': [1]}))
+        self.assertRaises(RuntimeError, page_items, "Wrong Object")
+
+    def test_all_pages_are_streamed(self):
+        self.assertEqual([1, 2, 3, 4, 5], list(paginate(self.fetch_page)))
+        self.assertEqual([None, 'p2', 'p3'], self.fetched)
+
+    def test_next_page_is_prefetched(self):
+        stream = paginate(self.fetch_page, self.executor)
+        self.assertEqual(1, next(stream))
+        self.executor.submit(lambda: None).result()
+        self.assertEqual([None, 'p2'], self.fetched)
+        self.assertEqual([2, 3, 4, 5], list(stream))
+
+    def test_early_exit_skips_the_remaining_pages(self):
+        for item in paginate(self.fetch_page, self.executor):
+            if item == 3:
+                break
+        self.executor.submit(lambda: None).result()
+        self.assertLessEqual(len(self.fetched), 3)
+        self.fetched.clear()
+        self.assertEqual([1], [i for i, _ in zip(paginate(self.fetch_page), range(1))])
+        self.assertEqual([None], self.fetched)
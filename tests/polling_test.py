@@ -0,0 +1,55 @@
+from unittest import TestCase
+from CircleciLibrary.polling import Backoff, PollTimeoutError, poll
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class PollingUnitTest(TestCase):
+    def test_backoff_grows_exponentially_up_to_the_cap(self):
+        delays = iter(Backoff(initial=1, maximum=10, factor=2, jitter=0))
+        self.assertEqual([1, 2, 4, 8, 10, 10], [next(delays) for _ in range(6)])
+
+    def test_backoff_jitter_stays_within_bounds(self):
+        low = iter(Backoff(initial=10, maximum=10, jitter=0.2, rng=lambda: 0.0))
+        high = iter(Backoff(initial=10, maximum=10, jitter=0.2, rng=lambda: 0.999999))
+        self.assertAlmostEqual(8.0, next(low))
+        self.assertAlmostEqual(12.0, next(high), places=3)
+
+    def test_backoff_rejects_invalid_values(self):
+        self.assertRaises(ValueError, Backoff, factor=0.5)
+        self.assertRaises(ValueError, Backoff, jitter=2)
+
+    def test_poll_returns_value_calls_and_elapsed_time(self):
+        clock = FakeClock()
+        values = iter([1, 2, 3])
+        result = poll(lambda: next(values), lambda v: v == 3, timeout=100,
+                      backoff=Backoff(initial=1, factor=2, jitter=0), sleep=clock.sleep, clock=clock)
+        self.assertEqual(3, result.value)
+        self.assertEqual(3, result.calls)
+        self.assertEqual(3.0, result.elapsed)
+
+    def test_poll_respects_the_timeout(self):
+        clock = FakeClock()
+        with self.assertRaises(PollTimeoutError) as ctx:
+            poll(lambda: 'running', lambda v: False, timeout=10,
+                 backoff=Backoff(initial=4, factor=1, jitter=0), sleep=clock.sleep, clock=clock)
+        self.assertEqual(4, ctx.exception.result.calls)
+        self.assertEqual(10.0, ctx.exception.result.elapsed)
+
+    def test_poll_schedule_replaces_the_backoff_delay(self):
+        clock = FakeClock()
+        values = iter([60, 1, 0])
+        result = poll(lambda: next(values), lambda v: v == 0, timeout=100,
+                      backoff=Backoff(initial=1, factor=1, jitter=0), sleep=clock.sleep, clock=clock,
+                      schedule=lambda remaining, delay: max(remaining, delay))
+        self.assertEqual(3, result.calls)
+        self.assertEqual(61.0, result.elapsed)
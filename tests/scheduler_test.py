@@ -0,0 +1,92 @@
+import threading
+import time
+from unittest import TestCase
+from CircleciLibrary import CircleciLibrary
+from CircleciLibrary.model import Project
+from CircleciLibrary.scheduler import PollScheduler
+from simulator import Simulator
+
+
+class PollSchedulerTest(TestCase):
+    def setUp(self):
+        self.scheduler = PollScheduler(min_interval=0.1)
+
+    def tearDown(self):
+        self.scheduler.close()
+
+    def test_concurrent_requests_share_one_poll(self):
+        calls = []
+        release = threading.Event()
+
+        def fetch():
+            calls.append(time.monotonic())
+            release.wait(1)
+            return len(calls)
+
+        futures = [self.scheduler.request('pipeline', fetch) for _ in range(20)]
+        release.set()
+        self.assertEqual([1] * 20, [f.result(1) for f in futures])
+        self.assertEqual(1, len(calls))
+
+    def test_polls_of_one_key_are_spaced_by_the_min_interval(self):
+        calls = []
+        for _ in range(3):
+            self.scheduler.poll('pipeline', lambda: calls.append(time.monotonic()))
+        self.assertEqual(3, len(calls))
+        self.assertGreaterEqual(calls[1] - calls[0], 0.09)
+        self.assertGreaterEqual(calls[2] - calls[1], 0.09)
+        # other keys are not delayed
+        start = time.monotonic()
+        self.scheduler.poll('other', lambda: None)
+        self.assertLess(time.monotonic() - start, 0.09)
+
+    def test_errors_are_delivered_to_all_waiters(self):
+        def fetch():
+            time.sleep(0.05)
+            raise RuntimeError("boom")
+
+        futures = [self.scheduler.request('pipeline', fetch) for _ in range(3)]
+        for future in futures:
+            self.assertRaises(RuntimeError, future.result, 1)
+        self.assertEqual(2, self.scheduler.poll('pipeline', lambda: 2))
+
+    def test_closed_scheduler_rejects_requests(self):
+        self.scheduler.close()
+        self.assertRaises(RuntimeError, self.scheduler.request, 'pipeline', lambda: None)
+
+
+class CoalescedPollsTest(TestCase):
+    def test_concurrent_reads_of_a_pipeline_send_one_request(self):
+        with Simulator(script=('running',), latency=0.05) as simulator:
+            circleci = CircleciLibrary('token', base_url=simulator.base_url, coalesce_polls=True)
+            pipeline = circleci.trigger_pipeline(Project('github', 'org', 'repo'))
+            barrier = threading.Barrier(16)
+
+            def read():
+                barrier.wait()
+                return circleci.all_workflows_stopped(pipeline)
+
+            threads = [threading.Thread(target=read) for _ in range(16)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(1, simulator.state.calls['GET workflows'])
+
+    def test_wait_keywords_use_the_scheduler(self):
+        for backend in CircleciLibrary.BACKENDS:
+            with self.subTest(backend=backend), Simulator(script=('running',) * 3 + ('success',)) as simulator:
+                circleci = CircleciLibrary(
+                    'token',
+                    base_url=simulator.base_url,
+                    backend=backend,
+                    coalesce_polls=True,
+                    min_poll_interval='50ms'
+                )
+                pipelines = circleci.trigger_pipelines([Project('github', 'org', 'repo')] * 4)
+                start = time.monotonic()
+                results = circleci.wait_for_pipelines(pipelines, initial_interval='10ms', max_interval='10ms')
+                self.assertTrue(all(w.completed() for w in results.values()))
+                # the pipelines are polled every 50ms instead of every 10ms
+                self.assertGreaterEqual(time.monotonic() - start, 0.15)
+                self.assertEqual(16, simulator.state.calls['GET workflows'])
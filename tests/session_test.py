@@ -0,0 +1,98 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from unittest.mock import Mock, patch
+from CircleciLibrary import CircleciLibrary
+from CircleciLibrary.session import TokenBucket, CircleciSession, create_session
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """answers the first requests with 429 and Retry-After, then with 200"""
+    failures = 0
+    calls = 0
+
+    def _answer(self):
+        type(self).calls += 1
+        if type(self).calls <= type(self).failures:
+            self.send_response(429)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _answer
+    do_POST = _answer
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class SessionUnitTest(TestCase):
+    def setUp(self):
+        FlakyHandler.calls = 0
+        FlakyHandler.failures = 2
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/v2/pipeline/1"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_get_is_retried_on_429(self):
+        session = create_session(max_retries=3, backoff_factor=0)
+        response = session.get(self.url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(3, FlakyHandler.calls)
+
+    def test_post_is_not_retried(self):
+        session = create_session(max_retries=3, backoff_factor=0)
+        response = session.post(self.url, json={})
+        self.assertEqual(429, response.status_code)
+        self.assertEqual(1, FlakyHandler.calls)
+
+    def test_connections_are_reused(self):
+        FlakyHandler.failures = 0
+        session = create_session(pool_size=2)
+        for _ in range(5):
+            self.assertEqual(200, session.get(self.url).status_code)
+        pool = session.get_adapter(self.url).poolmanager.connection_from_url(self.url)
+        self.assertEqual(1, pool.num_connections)
+
+    def test_token_bucket(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+        self.assertEqual([0.0, 0.0, 0.5, 0.5], [bucket.acquire() for _ in range(4)])
+        self.assertEqual(1.0, clock.now)
+        clock.now += 10
+        self.assertEqual(0.0, bucket.acquire())
+        self.assertRaises(ValueError, TokenBucket, rate=0)
+
+    @patch('CircleciLibrary.keywords.Api')
+    def test_library_installs_the_session(self, api_constructor_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        circleci = CircleciLibrary("MOCK", pool_size=4, rate_limit=5)
+        api_constructor_mock.assert_not_called()
+        self.assertIs(api_mock, circleci.api)
+        self.assertIsInstance(api_mock._session, CircleciSession)
+        self.assertEqual(5.0, api_mock._session.rate_limiter.rate)
+        adapter = api_mock._session.get_adapter('https://circleci.com')
+        self.assertEqual(4, adapter._pool_maxsize)
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import threading
+from unittest import TestCase
+from unittest.mock import Mock, patch
+from CircleciLibrary import CircleciLibrary
+from CircleciLibrary.model import Pipeline, Project
+from CircleciLibrary.shared import SharedStore
+
+
+class SharedStoreTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'circleci.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_one_client_fetches_while_the_others_wait(self):
+        stores = [SharedStore(self.path, wait_interval=0.01) for _ in range(8)]
+        calls = []
+        fetching = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            fetching.wait(5)
+            return {'value': 42}
+
+        results = []
+        threads = [threading.Thread(target=lambda s=s: results.append(s.get_or_refresh('k', 60, fetch))) for s in stores]
+        for t in threads:
+            t.start()
+        fetching.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(1, len(calls))
+        self.assertEqual([{'value': 42}] * 8, results)
+        for s in stores:
+            s.close()
+
+    def test_stale_values_and_expired_leases_are_refreshed(self):
+        now = [1000.0]
+        store = SharedStore(self.path, lease=10, clock=lambda: now[0])
+        other = SharedStore(self.path, lease=10, clock=lambda: now[0], sleep=lambda s: now.__setitem__(0, now[0] + s))
+        self.assertEqual(1, store.get_or_refresh('k', 5, lambda: 1))
+        self.assertEqual(1, other.get_or_refresh('k', 5, lambda: 2))
+        now[0] += 6
+        self.assertEqual(2, other.get_or_refresh('k', 5, lambda: 2))
+        with self.assertRaises(RuntimeError):
+            store.get_or_refresh('failing', 5, Mock(side_effect=RuntimeError))
+        self.assertEqual(3, other.get_or_refresh('failing', 5, lambda: 3))
+        store.close()
+        other.close()
+
+    def test_last_client_deletes_the_store(self):
+        first = SharedStore(self.path)
+        second = SharedStore(self.path)
+        first.get_or_refresh('k', 5, lambda: 1)
+        first.close()
+        self.assertTrue(os.path.exists(self.path))
+        second.close()
+        self.assertFalse(os.path.exists(self.path))
+
+    @patch('CircleciLibrary.keywords.Api')
+    def test_library_instances_share_workflow_polls(self, api_constructor_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        api_mock._request.return_value = {'items': [{
+            'pipeline_id': 'P1', 'id': 'W1', 'name': 'build', 'project_slug': 'gh/org/repo', 'status': 'success',
+            'started_by': 'U1', 'pipeline_number': 1, 'created_at': '2021-05-21T14:39:08Z',
+            'stopped_at': '2021-05-21T14:40:08Z'
+        }], 'next_page_token': None}
+        pipeline = Pipeline(pipeline_id="P1", number=1, state="", created_at=None, updated_at=None, errors=[], vcs=None)
+
+        libraries = [CircleciLibrary('token', shared_cache=self.path, shared_cache_freshness='1m') for _ in range(3)]
+        for library in libraries:
+            self.assertTrue(library.all_workflows_stopped(pipeline))
+        self.assertEqual(1, api_mock._request.call_count)
+        for library in libraries:
+            library._shared.close()
+        self.assertFalse(os.path.exists(self.path))
+
+    @patch('CircleciLibrary.keywords.Api')
+    def test_library_instances_share_triggered_pipelines(self, api_constructor_mock):
+        api_mock = Mock()
+        api_constructor_mock.return_value = api_mock
+        api_mock.trigger_pipeline.return_value = {'id': 'P1', 'number': 1, 'state': 'pending'}
+        project = Project('github', 'org', 'repo')
+
+        libraries = [CircleciLibrary('token', shared_cache=self.path, trigger_dedup_window='1m') for _ in range(3)]
+        pipelines = [library.trigger_pipeline(project, tag='1.0.0') for library in libraries]
+        self.assertEqual(['P1'] * 3, [p.id for p in pipelines])
+        self.assertEqual(1, api_mock.trigger_pipeline.call_count)
+        for library in libraries:
+            library._shared.close()
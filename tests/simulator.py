@@ -0,0 +1,378 @@
+"""
+local stand-in of the circleci api for offline tests and benchmarks
+
+    with Simulator(script=('running', 'running', 'success'), page_size=2, throttle_every=10) as simulator:
+        circleci = CircleciLibrary('token', base_url=simulator.base_url)
+"""
+import json
+import multiprocessing
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+RUNNING_STATUSES = {'running', 'failing', 'on_hold'}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+class SimulatorState:
+    """pipelines, workflows and request counters of the simulated api"""
+
+    def __init__(
+            self,
+            workflows: int = 1,
+            script=('running', 'success'),
+            scripts: list = None,
+            page_size: int = 20,
+            latency: float = 0.0,
+            throttle_every: int = 0,
+            projects: list = None,
+            insights: dict = None,
+            rerun_script=('running', 'success')
+    ):
+        """
+        :param workflows: number of workflows of a triggered pipeline
+        :param script: workflow status of the first, second, ... poll of a pipeline, the last one stays
+        :param scripts: one script per workflow, overrides ``workflows`` and ``script``
+        :param page_size: maximum number of items of a page
+        :param latency: seconds every response is delayed
+        :param throttle_every: every n-th request is answered with 429, 0 never
+        :param projects: v1.1 project list (default: one project ``gh/org/repo``)
+        :param insights: duration metrics of the insights api per workflow name
+        :param rerun_script: workflow status of the polls of a rerun workflow, counted from the rerun
+        """
+        self.scripts = scripts or [script] * workflows
+        self.page_size = page_size
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.projects = projects or [{'vcs_type': 'github', 'username': 'org', 'reponame': 'repo'}]
+        self.insights = insights or {}
+        self.rerun_script = rerun_script
+        self.pipelines = {}
+        self.workflows = {}
+        self.polls = Counter()
+        self.calls = Counter()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self, method: str, route: str) -> bool:
+        """
+        :return: False if the request should be throttled
+        """
+        with self._lock:
+            self.requests += 1
+            self.calls[f"{method} {route}"] += 1
+            return not self.throttle_every or self.requests % self.throttle_every
+
+    def trigger(self, slug: str, body: dict) -> dict:
+        with self._lock:
+            number = len(self.pipelines) + 1
+            pipeline_id = str(uuid.uuid4())
+            pipeline = {
+                'id': pipeline_id,
+                'number': number,
+                'state': 'created',
+                'created_at': _now(),
+                'updated_at': _now(),
+                'errors': [],
+                'project_slug': slug,
+                'trigger_parameters': body.get('parameters') or {},
+                'vcs': {
+                    'provider_name': 'GitHub',
+                    'target_repository_url': f"https://github.com/{slug.split('/', 1)[-1]}",
+                    'revision': uuid.uuid4().hex + uuid.uuid4().hex[:8],
+                    'branch': body.get('branch') if body.get('branch') or body.get('tag') else 'main',
+                    'tag': body.get('tag')
+                }
+            }
+            if pipeline['vcs']['tag']:
+                pipeline['vcs']['branch'] = None
+            self.pipelines[pipeline_id] = pipeline
+            for i, script in enumerate(self.scripts):
+                workflow_id = str(uuid.uuid4())
+                self.workflows[workflow_id] = {
+                    'script': script,
+                    'cancelled': False,
+                    'offset': 0,
+                    'pipeline_id': pipeline_id,
+                    'id': workflow_id,
+                    'name': f"workflow-{i}",
+                    'project_slug': slug,
+                    'started_by': 'U1',
+                    'pipeline_number': number,
+                    'created_at': pipeline['created_at']
+                }
+            return {'id': pipeline_id, 'number': number, 'state': 'pending', 'created_at': pipeline['created_at']}
+
+    def workflow_items(self, pipeline_id: str, first_page: bool = True) -> list:
+        with self._lock:
+            if first_page:
+                self.polls[pipeline_id] += 1
+            poll = self.polls[pipeline_id] - 1
+            items = []
+            for w in self.workflows.values():
+                if w['pipeline_id'] != pipeline_id:
+                    continue
+                step = max(poll - w['offset'], 0)
+                status = 'canceled' if w['cancelled'] else w['script'][min(step, len(w['script']) - 1)]
+                item = {k: v for k, v in w.items() if k not in ('script', 'cancelled', 'offset')}
+                item['status'] = status
+                item['stopped_at'] = None if status in RUNNING_STATUSES else w.setdefault('stopped_at', _now())
+                items.append(item)
+            return items
+
+    def cancel(self, workflow_id: str):
+        with self._lock:
+            self.workflows[workflow_id]['cancelled'] = True
+
+    def rerun(self, workflow_id: str) -> str:
+        with self._lock:
+            workflow = self.workflows[workflow_id]
+            rerun_id = str(uuid.uuid4())
+            self.workflows[rerun_id] = dict(
+                workflow,
+                id=rerun_id,
+                script=self.rerun_script,
+                cancelled=False,
+                offset=self.polls[workflow['pipeline_id']],
+                created_at=_now()
+            )
+            self.workflows[rerun_id].pop('stopped_at', None)
+            return rerun_id
+
+    def page(self, items: list, token: str) -> dict:
+        start = int(token or 0)
+        end = start + self.page_size
+        return {'items': items[start:end], 'next_page_token': str(end) if end < len(items) else None}
+
+    def statistics(self) -> dict:
+        with self._lock:
+            return {'requests': self.requests, 'calls': dict(self.calls)}
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    """routes the requests of the library to the ``SimulatorState`` of the server"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    routes = [
+        ('POST', re.compile(r'^/api/v2/project/(?P<slug>[^/]+/[^/]+/[^/]+)/pipeline$'), 'trigger'),
+        ('GET', re.compile(r'^/api/v2/project/(?P<slug>[^/]+/[^/]+/[^/]+)/pipeline$'), 'project_pipelines'),
+        ('GET', re.compile(r'^/api/v2/pipeline/(?P<id>[^/]+)$'), 'pipeline'),
+        ('GET', re.compile(r'^/api/v2/pipeline/(?P<id>[^/]+)/workflow$'), 'workflows'),
+        ('GET', re.compile(r'^/api/v2/workflow/(?P<id>[^/]+)/job$'), 'jobs'),
+        ('POST', re.compile(r'^/api/v2/workflow/(?P<id>[^/]+)/cancel$'), 'cancel'),
+        ('POST', re.compile(r'^/api/v2/workflow/(?P<id>[^/]+)/rerun$'), 'rerun'),
+        ('GET', re.compile(r'^/api/v2/insights/(?P<slug>[^/]+/[^/]+/[^/]+)/workflows$'), 'insights'),
+        ('GET', re.compile(r'^/api/v1.1/projects$'), 'projects'),
+        ('GET', re.compile(r'^/_statistics$'), 'statistics')
+    ]
+
+    @property
+    def state(self) -> SimulatorState:
+        return self.server.state
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method: str):
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+        for route_method, pattern, name in self.routes:
+            match = pattern.match(url.path)
+            if route_method == method and match:
+                break
+        else:
+            return self._send(404, {'message': 'Not found'})
+        if name != 'statistics':
+            if not self.state.count(method, name):
+                return self._send(429, {'message': 'Rate limit exceeded'}, {'Retry-After': '0'})
+            if self.state.latency:
+                time.sleep(self.state.latency)
+        status, payload = getattr(self, f"_{name}")(match, query, body)
+        self._send(status, payload)
+
+    def _send(self, status: int, payload, headers: dict = None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _trigger(self, match, query, body):
+        return 201, self.state.trigger(match['slug'], body)
+
+    def _project_pipelines(self, match, query, body):
+        pipelines = [p for p in reversed(list(self.state.pipelines.values())) if p['project_slug'] == match['slug']]
+        if query.get('branch'):
+            pipelines = [p for p in pipelines if p['vcs']['branch'] == query['branch']]
+        return 200, self.state.page(pipelines, query.get('page-token'))
+
+    def _pipeline(self, match, query, body):
+        pipeline = self.state.pipelines.get(match['id'])
+        return (200, pipeline) if pipeline else (404, {'message': 'Pipeline not found'})
+
+    def _workflows(self, match, query, body):
+        token = query.get('page-token')
+        return 200, self.state.page(self.state.workflow_items(match['id'], first_page=token is None), token)
+
+    def _jobs(self, match, query, body):
+        workflow = self.state.workflows[match['id']]
+        job = {'id': workflow['id'], 'name': 'build', 'job_number': workflow['pipeline_number'],
+               'project_slug': workflow['project_slug'], 'status': 'success', 'type': 'build'}
+        return 200, self.state.page([job], query.get('page-token'))
+
+    def _cancel(self, match, query, body):
+        if match['id'] not in self.state.workflows:
+            return 404, {'message': 'Workflow not found'}
+        self.state.cancel(match['id'])
+        return 202, {'message': 'Accepted.'}
+
+    def _insights(self, match, query, body):
+        items = [{'name': name, 'metrics': {'duration_metrics': metrics}} for name, metrics in self.state.insights.items()]
+        return 200, self.state.page(items, query.get('page-token'))
+
+    def _rerun(self, match, query, body):
+        if match['id'] not in self.state.workflows:
+            return 404, {'message': 'Workflow not found'}
+        return 202, {'workflow_id': self.state.rerun(match['id'])}
+
+    def _projects(self, match, query, body):
+        return 200, self.state.projects
+
+    def _statistics(self, match, query, body):
+        return 200, self.state.statistics()
+
+    def log_message(self, *args):
+        pass
+
+
+def workflow_completed_event(pipeline: dict, workflow: dict, status: str = 'success') -> dict:
+    """
+    :return: sample payload of the ``workflow-completed`` webhook of a simulated workflow
+    """
+    slug = pipeline['project_slug']
+    return {
+        'type': 'workflow-completed',
+        'id': str(uuid.uuid4()),
+        'happened_at': _now(),
+        'webhook': {'id': str(uuid.uuid4()), 'name': 'robot'},
+        'workflow': {
+            'id': workflow['id'],
+            'name': workflow['name'],
+            'status': status,
+            'created_at': workflow['created_at'],
+            'stopped_at': _now(),
+            'url': f"https://app.circleci.com/pipelines/{slug}/{pipeline['number']}/workflows/{workflow['id']}"
+        },
+        'pipeline': {k: pipeline[k] for k in ('id', 'number', 'created_at', 'trigger_parameters', 'vcs')},
+        'project': {'id': str(uuid.uuid5(uuid.NAMESPACE_URL, slug)), 'name': slug.rsplit('/', 1)[-1], 'slug': slug},
+        'organization': {'id': str(uuid.uuid5(uuid.NAMESPACE_URL, slug.rsplit('/', 1)[0])), 'name': slug.split('/')[1]}
+    }
+
+
+def post_webhook(url: str, secret: str, event: dict, signature: str = None) -> int:
+    """
+    posts a webhook event signed like circleci does
+
+    :param signature: value of the ``circleci-signature`` header (default: the signature of the event)
+
+    :return: http status of the response
+    """
+    import hashlib
+    import hmac
+    import requests
+    body = json.dumps(event).encode()
+    if signature is None:
+        signature = 'v1=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    headers = {'Content-Type': 'application/json', 'circleci-signature': signature}
+    return requests.post(url, data=body, headers=headers, timeout=10).status_code
+
+
+class Simulator:
+    """
+    runs the simulated api in a background thread, or with ``process=True`` in a separate process so
+    the cpu time of the server is not counted for the library
+    """
+
+    def __init__(self, process: bool = False, **options):
+        """
+        :param process: serve from a separate process
+        :param options: options of the ``SimulatorState``
+        """
+        self.process = process
+        self.options = options
+        self.state = None
+        self._server = None
+        self._child = None
+        self.port = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/api"
+
+    def start(self):
+        if self.process:
+            ports = multiprocessing.Queue()
+            self._child = multiprocessing.Process(target=_serve, args=(self.options, ports), daemon=True)
+            self._child.start()
+            self.port = ports.get(timeout=10)
+        else:
+            self._server = _server(self.options)
+            self.state = self._server.state
+            self.port = self._server.server_port
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def statistics(self) -> dict:
+        """
+        :return: total number of requests and the number of requests per route
+        """
+        import requests
+        return requests.get(f"http://127.0.0.1:{self.port}/_statistics").json()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        if self._child is not None:
+            self._child.terminate()
+            self._child.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _SimulatorServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def _server(options: dict) -> ThreadingHTTPServer:
+    server = _SimulatorServer(('127.0.0.1', 0), SimulatorHandler)
+    server.state = SimulatorState(**options)
+    return server
+
+
+def _serve(options: dict, ports):
+    server = _server(options)
+    ports.put(server.server_port)
+    server.serve_forever()
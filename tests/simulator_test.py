@@ -0,0 +1,146 @@
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+from CircleciLibrary import CircleciLibrary
+from CircleciLibrary.model import Project, Workflow
+from simulator import Simulator
+
+
+class SimulatorTest(TestCase):
+    """runs the keywords against the local stand-in of the circleci api"""
+
+    def test_trigger_and_wait(self):
+        with Simulator(script=('running', 'running', 'success'), workflows=3, page_size=2) as simulator:
+            circleci = CircleciLibrary('token', base_url=simulator.base_url)
+            project = circleci.get_project('repo')
+            pipeline = circleci.trigger_pipeline(project, branch='main')
+            workflows = circleci.wait_for_pipeline(pipeline, initial_interval='10ms', max_interval='10ms')
+            self.assertEqual(3, len(workflows))
+            self.assertTrue(workflows.overall_status(Workflow.Status.SUCCESS))
+            self.assertEqual(3, simulator.state.calls['GET workflows'] // 2)
+            self.assertEqual(1, simulator.state.calls['POST trigger'])
+
+    def test_wait_reports_its_polls_and_api_requests(self):
+        for backend in CircleciLibrary.BACKENDS:
+            with self.subTest(backend=backend), Simulator(script=('running', 'running', 'success'), workflows=2,
+                                                          page_size=1) as simulator, \
+                    patch('CircleciLibrary.log.BuiltIn') as builtin_mock:
+                circleci = CircleciLibrary('token', base_url=simulator.base_url, backend=backend)
+                pipeline = circleci.trigger_pipeline(Project('github', 'org', 'repo'))
+                circleci.wait_for_pipeline(pipeline, initial_interval='10ms', max_interval='10ms')
+                messages = [c.args[0] for c in builtin_mock.return_value.log.call_args_list]
+                self.assertEqual(6, simulator.state.calls['GET workflows'])
+                self.assertTrue(any(m.startswith(f"Pipeline {pipeline.id} stopped after 3 polls and 6 api requests")
+                                    for m in messages))
+
+    def test_throttled_requests_are_retried(self):
+        with Simulator(script=('success',)) as simulator:
+            circleci = CircleciLibrary('token', base_url=simulator.base_url, retry_backoff=0)
+            pipelines = circleci.trigger_pipelines([Project('github', 'org', 'repo')] * 3)
+            # only idempotent requests are retried
+            simulator.state.throttle_every = 2
+            results = circleci.wait_for_pipelines(pipelines, initial_interval='10ms')
+            self.assertTrue(all(w.completed() for w in results.values()))
+            self.assertGreater(simulator.statistics()['requests'], 6)
+
+    def test_fail_fast_cancels_the_scripted_workflows(self):
+        scripts = [('running', 'failed'), ('running',)]
+        with Simulator(scripts=scripts) as simulator:
+            circleci = CircleciLibrary('token', base_url=simulator.base_url)
+            pipeline = circleci.trigger_pipeline(Project('github', 'org', 'repo'))
+            circleci.wait_for_pipeline(pipeline, initial_interval='10ms', fail_fast=True, cancel_remaining=True)
+            self.assertEqual(1, simulator.state.calls['POST cancel'])
+            statuses = sorted(w.status.value for w in circleci.get_workflows(pipeline))
+            self.assertEqual(['canceled', 'failed'], statuses)
+
+    def test_fail_fast_cancels_failing_workflows(self):
+        with Simulator(script=('running', 'failing'), workflows=2) as simulator, \
+                patch('CircleciLibrary.log.BuiltIn') as builtin_mock:
+            circleci = CircleciLibrary('token', base_url=simulator.base_url)
+            pipeline = circleci.trigger_pipeline(Project('github', 'org', 'repo'))
+            circleci.wait_for_pipeline(pipeline, initial_interval='10ms', fail_fast=True, cancel_remaining=True)
+            self.assertEqual(2, simulator.state.calls['POST cancel'])
+            messages = [c.args[0] for c in builtin_mock.return_value.log.call_args_list]
+            self.assertIn('Cancelled workflows: workflow-0, workflow-1', messages)
+
+    def test_nothing_to_cancel_is_not_logged(self):
+        with Simulator(script=('failed',)) as simulator, patch('CircleciLibrary.log.BuiltIn') as builtin_mock:
+            circleci = CircleciLibrary('token', base_url=simulator.base_url)
+            pipeline = circleci.trigger_pipeline(Project('github', 'org', 'repo'))
+            circleci.wait_for_pipeline(pipeline, initial_interval='10ms', fail_fast=True, cancel_remaining=True)
+            self.assertEqual(0, simulator.state.calls['POST cancel'])
+            messages = [c.args[0] for c in builtin_mock.return_value.log.call_args_list]
+            self.assertFalse(any(m.startswith('Cancelled') for m in messages))
+
+    def test_wait_messages_are_logged_by_the_keyword_thread(self):
+        scripts = [('running', 'failed'), ('running',)]
+        for backend in CircleciLibrary.BACKENDS:
+            with self.subTest(backend=backend), Simulator(scripts=scripts) as simulator, \
+                    patch('CircleciLibrary.log.BuiltIn') as builtin_mock:
+                threads = {}
+                builtin_mock.return_value.log.side_effect = \
+                    lambda message, **_: threads.setdefault(message, threading.current_thread())
+                circleci = CircleciLibrary('token', base_url=simulator.base_url, backend=backend)
+                pipelines = circleci.trigger_pipelines([Project('github', 'org', 'repo')] * 2)
+                circleci.wait_for_pipelines(pipelines, initial_interval='10ms', fail_fast=True, cancel_remaining=True)
+                messages = [c.args[0] for c in builtin_mock.return_value.log.call_args_list]
+                self.assertEqual(2, sum('failed fast after' in m for m in messages))
+                self.assertEqual(2, sum(m == 'Cancelled workflows: workflow-1' for m in messages))
+                self.assertEqual(2, sum(m.endswith('workflow-1: new -> running') for m in messages))
+                self.assertEqual({threading.main_thread()}, set(threads.values()))
+
+    @patch('CircleciLibrary.log.trace_enabled', return_value=True)
+    def test_traces_of_prefetched_pages_and_bulk_calls_are_logged_by_the_keyword_thread(self, enabled_mock):
+        for backend in CircleciLibrary.BACKENDS:
+            with self.subTest(backend=backend), Simulator(script=('success',), workflows=3, page_size=1) as simulator, \
+                    patch('CircleciLibrary.log.BuiltIn') as builtin_mock:
+                threads = {}
+                builtin_mock.return_value.log.side_effect = \
+                    lambda message, **_: threads.setdefault(message, threading.current_thread())
+                circleci = CircleciLibrary('token', base_url=simulator.base_url, backend=backend)
+                pipelines = circleci.trigger_pipelines([Project('github', 'org', 'repo')] * 2)
+                circleci.wait_for_pipelines(pipelines, initial_interval='10ms')
+                traces = [c.args[0] for c in builtin_mock.return_value.log.call_args_list
+                          if c.kwargs.get('level') == 'TRACE']
+                for pipeline in pipelines:
+                    pages = [t for t in traces if t.startswith(f"pipeline/{pipeline.id}/workflow?page-token=")]
+                    self.assertEqual(2, len(pages))
+                self.assertEqual({threading.main_thread()}, set(threads.values()))
+
+    def test_cancel_pipelines(self):
+        for backend in CircleciLibrary.BACKENDS:
+            with self.subTest(backend=backend), Simulator(scripts=[('running',), ('success',)]) as simulator:
+                circleci = CircleciLibrary('token', base_url=simulator.base_url, backend=backend)
+                pipelines = circleci.trigger_pipelines([Project('github', 'org', 'repo')] * 3)
+                workflows = circleci.get_workflows(pipelines[0])
+                unknown = Workflow('W0', 'gone', 'P0', 0, 'github/org/repo', Workflow.Status.RUNNING, 'U1', None)
+                results = circleci.cancel_pipelines([workflows, pipelines[1], pipelines[2], unknown], concurrency=2)
+                self.assertEqual(4, len(results))
+                self.assertEqual(['workflow-0'] * 3 + ['gone'], [r['name'] for r in results])
+                self.assertEqual([True, True, True, False], [r['ok'] for r in results])
+                self.assertIn('404', results[3]['error'])
+                self.assertEqual({'pipeline_id', 'workflow_id', 'name', 'status', 'ok', 'error'}, set(results[0]))
+                self.assertEqual(4, simulator.state.calls['POST cancel'])
+                for pipeline in pipelines:
+                    statuses = sorted(w.status.value for w in circleci.get_workflows(pipeline))
+                    self.assertEqual(['canceled', 'success'], statuses)
+
+    def test_rerun_failed_workflows_and_wait(self):
+        scripts = [('running', 'failed'), ('success',)]
+        for backend in CircleciLibrary.BACKENDS:
+            with self.subTest(backend=backend), Simulator(scripts=scripts) as simulator:
+                circleci = CircleciLibrary('token', base_url=simulator.base_url, backend=backend)
+                pipelines = circleci.trigger_pipelines([Project('github', 'org', 'repo')] * 2)
+                finished = circleci.wait_for_pipelines(pipelines, initial_interval='10ms', max_interval='10ms')
+                self.assertEqual([], circleci.rerun_failed_workflows(pipelines, statuses=['error']))
+
+                results = circleci.rerun_failed_workflows(
+                    list(finished.values()), wait=True, initial_interval='10ms', max_interval='10ms'
+                )
+                self.assertEqual(2, simulator.state.calls['POST rerun'])
+                self.assertEqual(['failed', 'failed'], [r['status'] for r in results])
+                self.assertEqual(['success', 'success'], [r['rerun_status'] for r in results])
+                self.assertNotIn('response', results[0])
+                workflows = circleci.get_workflows(pipelines[0])
+                self.assertEqual(3, len(workflows))
+                self.assertEqual('success', workflows.get(results[0]['rerun_workflow_id']).status.value)
@@ -0,0 +1,146 @@
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+from unittest import TestCase
+from CircleciLibrary import CircleciLibrary
+from CircleciLibrary.model import Project, Workflow
+from CircleciLibrary.webhooks import WebhookReceiver, sign, verify_signature
+from simulator import Simulator, post_webhook, workflow_completed_event
+
+SECRET = 'webhook-secret'
+
+
+class SignatureTest(TestCase):
+    def test_verify_signature(self):
+        body = b'{"type": "workflow-completed"}'
+        self.assertTrue(verify_signature(SECRET, body, sign(SECRET, body)))
+        self.assertTrue(verify_signature(SECRET, body, f"v2=abc, {sign(SECRET, body)}"))
+        self.assertFalse(verify_signature(SECRET, body, sign('other', body)))
+        self.assertFalse(verify_signature(SECRET, body + b' ', sign(SECRET, body)))
+        self.assertFalse(verify_signature(SECRET, body, None))
+
+
+class WebhookReceiverTest(TestCase):
+    def setUp(self):
+        self.receiver = WebhookReceiver(SECRET)
+
+    def tearDown(self):
+        self.receiver.close()
+
+    @staticmethod
+    def event(event_type: str = 'workflow-completed', pipeline_id: str = 'P1') -> dict:
+        pipeline = {'id': pipeline_id, 'number': 1, 'created_at': None, 'trigger_parameters': {}, 'vcs': {},
+                    'project_slug': 'gh/org/repo'}
+        event = workflow_completed_event(pipeline, {'id': 'W1', 'name': 'build', 'created_at': None})
+        event['type'] = event_type
+        return event
+
+    def test_events_are_verified(self):
+        self.assertEqual(401, post_webhook(self.receiver.url, SECRET, self.event(), signature='v1=00'))
+        self.assertEqual(204, post_webhook(self.receiver.url, SECRET, self.event('job-completed')))
+        self.assertEqual(204, post_webhook(self.receiver.url, SECRET, self.event()))
+        self.assertEqual(400, post_webhook(self.receiver.url, SECRET, {'no': 'type'}))
+        self.assertEqual({'rejected': 1, 'job-completed': 1, 'workflow-completed': 1, 'invalid': 1},
+                         dict(self.receiver.events))
+
+    def raw_post(self, content_length: str = None, body: bytes = b'') -> bytes:
+        address = urlsplit(self.receiver.url)
+        with socket.create_connection((address.hostname, address.port), timeout=5) as connection:
+            header = '' if content_length is None else f"Content-Length: {content_length}\r\n"
+            connection.sendall(f"POST / HTTP/1.1\r\nHost: localhost\r\n{header}\r\n".encode() + body)
+            response = b''
+            while chunk := connection.recv(4096):
+                response += chunk
+        return response
+
+    def test_bodies_of_unknown_or_excessive_length_are_not_read(self):
+        self.receiver.max_body = 16
+        self.assertTrue(self.raw_post().startswith(b'HTTP/1.1 411'))
+        self.assertTrue(self.raw_post('-1', b'x' * 64).startswith(b'HTTP/1.1 400'))
+        self.assertTrue(self.raw_post('many', b'x' * 64).startswith(b'HTTP/1.1 400'))
+        # the connection is closed after the rejection, recv returns instead of timing out
+        self.assertTrue(self.raw_post('64', b'x' * 64).startswith(b'HTTP/1.1 413'))
+        self.assertEqual({}, dict(self.receiver.events))
+
+    def test_url_of_a_receiver_on_all_interfaces(self):
+        receiver = WebhookReceiver(SECRET, host='0.0.0.0')
+        self.addCleanup(receiver.close)
+        self.assertTrue(receiver.url.startswith('http://127.0.0.1:'))
+
+    def test_events_wake_the_subscriptions_of_their_pipeline(self):
+        subscription = self.receiver.subscribe('P1')
+        other = self.receiver.subscribe('P2')
+        threading.Timer(0.05, post_webhook, (self.receiver.url, SECRET, self.event())).start()
+        start = time.monotonic()
+        subscription.sleep(5)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertTrue(subscription.woken)
+        other.sleep(0.05)
+        self.assertFalse(other.woken)
+        # an event between two sleeps is not lost
+        post_webhook(self.receiver.url, SECRET, self.event())
+        start = time.monotonic()
+        subscription.sleep(5)
+        self.assertLess(time.monotonic() - start, 1)
+        subscription.sleep(0.01)
+        self.assertFalse(subscription.woken)
+        subscription.close()
+        other.close()
+
+
+class WebhookWaitTest(TestCase):
+    def library(self, simulator: Simulator, backend: str, fallback: str = '5m') -> CircleciLibrary:
+        return CircleciLibrary(
+            'token',
+            base_url=simulator.base_url,
+            backend=backend,
+            webhook_secret=SECRET,
+            webhook_port=0,
+            webhook_host='127.0.0.1',
+            webhook_fallback_interval=fallback
+        )
+
+    @staticmethod
+    def complete(simulator: Simulator, url: str, pipeline_id: str, delay: float):
+        def post():
+            pipeline = simulator.state.pipelines[pipeline_id]
+            for workflow in simulator.state.workflows.values():
+                if workflow['pipeline_id'] == pipeline_id:
+                    post_webhook(url, SECRET, workflow_completed_event(pipeline, workflow))
+
+        threading.Timer(delay, post).start()
+
+    def test_wait_keywords_return_on_the_event(self):
+        for backend in CircleciLibrary.BACKENDS:
+            with self.subTest(backend=backend), Simulator(script=('running', 'success'), workflows=2) as simulator:
+                circleci = self.library(simulator, backend)
+                url = circleci.get_webhook_url()
+                pipelines = circleci.trigger_pipelines([Project('github', 'org', 'repo')] * 2)
+                self.complete(simulator, url, pipelines[0].id, 0.1)
+                self.complete(simulator, url, pipelines[1].id, 0.5)
+                start = time.monotonic()
+                workflows = circleci.wait_for_pipeline(pipelines[0], timeout='10s')
+                self.assertTrue(workflows.overall_status(Workflow.Status.SUCCESS))
+                results = circleci.wait_for_pipelines(pipelines[1:], timeout='10s')
+                self.assertTrue(results[pipelines[1]].completed())
+                self.assertLess(time.monotonic() - start, 5)
+                self.assertEqual(4, simulator.state.calls['GET workflows'])
+
+    def test_lost_events_are_covered_by_the_fallback_polls(self):
+        with Simulator(script=('running', 'running', 'success')) as simulator:
+            circleci = self.library(simulator, 'sync', fallback='50ms')
+            pipeline = circleci.trigger_pipeline(Project('github', 'org', 'repo'))
+            self.assertTrue(circleci.wait_for_pipeline(pipeline, timeout='10s').completed())
+            self.assertEqual(3, simulator.state.calls['GET workflows'])
+
+    def test_webhook_url_is_the_external_url(self):
+        circleci = CircleciLibrary(
+            'token', webhook_secret=SECRET, webhook_port=0, webhook_url='https://ci.example.com/hooks'
+        )
+        self.assertEqual('https://ci.example.com/hooks', circleci.get_webhook_url())
+        circleci._webhooks.close()
+
+    def test_the_receiver_requires_a_secret(self):
+        self.assertRaises(ValueError, CircleciLibrary, 'token', webhook_port=0)
+        self.assertRaises(RuntimeError, CircleciLibrary('token').get_webhook_url)